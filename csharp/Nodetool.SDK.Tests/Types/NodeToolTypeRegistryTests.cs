@@ -0,0 +1,94 @@
+using Nodetool.SDK.Types;
+using Xunit;
+
+namespace Nodetool.SDK.Tests.Types;
+
+public class NodeToolTypeRegistryTests
+{
+    private sealed class ManifestImage
+    {
+        public string type { get; set; } = "image";
+        public string uri { get; set; } = "";
+    }
+
+    private sealed class ManifestAudio
+    {
+        public string type { get; set; } = "audio";
+    }
+
+    private sealed class AlphaModel
+    {
+        public string type { get; set; } = "model";
+    }
+
+    private static NodeToolTypeManifestEntry Entry<T>(string typeName, string csharpName)
+        where T : new()
+        => new(typeName, typeof(T), csharpName, static () => new T());
+
+    [Fact]
+    public void RegisterManifest_ResolvesTagsAndClassNames()
+    {
+        var registry = new NodeToolTypeRegistry();
+
+        registry.RegisterManifest(
+        [
+            Entry<ManifestImage>("image", "Nodetool.Types.Core.ImageRef"),
+            Entry<ManifestAudio>("audio", "Nodetool.Types.Core.AudioRef")
+        ]);
+
+        Assert.Equal(typeof(ManifestImage), registry.GetType("image"));
+        Assert.Equal(typeof(ManifestImage), registry.GetType("ImageRef"));
+        Assert.Equal(typeof(ManifestAudio), registry.GetType("Nodetool.Types.Core.AudioRef"));
+        Assert.Equal("audio", registry.GetTypeName(typeof(ManifestAudio)));
+        Assert.Equal(["audio", "image"], registry.GetAllTypeNames().Order());
+    }
+
+    [Fact]
+    public void CreateInstance_UsesManifestFactory()
+    {
+        var registry = new NodeToolTypeRegistry();
+        registry.RegisterManifest([Entry<ManifestImage>("image", "Nodetool.Types.Core.ImageRef")]);
+
+        var first = registry.CreateInstance("image");
+        var second = registry.CreateInstance("image");
+
+        Assert.IsType<ManifestImage>(first);
+        Assert.NotSame(first, second);
+        Assert.Null(registry.CreateInstance("video"));
+    }
+
+    [Fact]
+    public void RegisterManifest_KeepsFirstEntryForDuplicateTag()
+    {
+        var registry = new NodeToolTypeRegistry();
+
+        registry.RegisterManifest(
+        [
+            Entry<ManifestImage>("image", "Nodetool.Types.Core.ImageRef"),
+            Entry<ManifestAudio>("image", "Nodetool.Types.Core.AudioRef")
+        ]);
+
+        Assert.Equal(typeof(ManifestImage), registry.GetType("image"));
+        Assert.IsType<ManifestImage>(registry.CreateInstance("image"));
+        Assert.Null(registry.GetType("AudioRef"));
+    }
+
+    [Fact]
+    public void RegisterManifest_ResolvesTagSharedByUnrelatedClasses()
+    {
+        // The generator lists a tag shared by unrelated classes under the first of them
+        // by C# name (here Alpha.AlphaModel over Beta.BetaModel), as assembly scanning kept it.
+        var registry = new NodeToolTypeRegistry();
+
+        registry.RegisterManifest(
+        [
+            Entry<ManifestImage>("image", "Nodetool.Types.Core.ImageRef"),
+            Entry<AlphaModel>("model", "Nodetool.Types.Alpha.AlphaModel")
+        ]);
+
+        Assert.Equal(typeof(AlphaModel), registry.GetType("model"));
+        Assert.Equal("model", registry.GetTypeName(typeof(AlphaModel)));
+        Assert.IsType<AlphaModel>(registry.CreateInstance("model"));
+        Assert.Null(registry.GetType("BetaModel"));
+    }
+}
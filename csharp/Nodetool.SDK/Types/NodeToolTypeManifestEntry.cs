@@ -0,0 +1,11 @@
+namespace Nodetool.SDK.Types;
+
+/// <summary>
+/// One entry of a generated type manifest: a NodeTool type tag, the generated class it
+/// names, that class's full C# name and a factory for its default instance.
+/// </summary>
+public sealed record NodeToolTypeManifestEntry(
+    string TypeName,
+    Type Type,
+    string CSharpName,
+    Func<object> Create);
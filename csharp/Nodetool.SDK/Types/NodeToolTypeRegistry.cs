@@ -16,6 +16,7 @@ public class NodeToolTypeRegistry
     private readonly Dictionary<string, Type> _typesByAlias = new(StringComparer.OrdinalIgnoreCase);
     private readonly Dictionary<Type, string> _namesByType = new();
     private readonly Dictionary<Type, PropertyInfo?> _typePropertyCache = new();
+    private readonly Dictionary<string, Func<object>> _factoriesByName = new();
     private bool _isInitialized = false;
 
     public NodeToolTypeRegistry(ILogger<NodeToolTypeRegistry>? logger = null)
@@ -69,6 +70,30 @@ public class NodeToolTypeRegistry
         _logger.LogInformation("Registered {Count} NodeTool types", discoveredTypes);
     }
 
+    /// <summary>
+    /// Registers the types of a generated type manifest (Nodetool.Types.TypeManifest)
+    /// instead of discovering them. No assembly is scanned and no instance is created,
+    /// so registration takes time proportional to the number of entries.
+    /// Call this once during application startup, instead of <see cref="RegisterAllTypes"/>.
+    /// </summary>
+    /// <param name="entries">The manifest entries, one per type tag</param>
+    public void RegisterManifest(IEnumerable<NodeToolTypeManifestEntry> entries)
+    {
+        var registered = 0;
+        foreach (var entry in entries)
+        {
+            var shortName = entry.CSharpName[(entry.CSharpName.LastIndexOf('.') + 1)..];
+            if (Register(entry.Type, entry.TypeName, shortName, entry.CSharpName))
+            {
+                _factoriesByName[entry.TypeName] = entry.Create;
+                registered++;
+            }
+        }
+
+        _isInitialized = true;
+        _logger.LogInformation("Registered {Count} NodeTool types from the type manifest", registered);
+    }
+
     private int RegisterAssemblyTypes(IEnumerable<Type> types)
     {
         var discoveredTypes = 0;
@@ -91,27 +116,31 @@ public class NodeToolTypeRegistry
     /// <param name="type">The .NET type</param>
     /// <param name="typeName">The NodeTool type identifier</param>
     public void RegisterType(Type type, string typeName)
+        => Register(type, typeName, type.Name, type.FullName);
+
+    private bool Register(Type type, string typeName, string name, string? fullName)
     {
         if (string.IsNullOrEmpty(typeName))
         {
-            _logger.LogWarning("Skipping type {Type} - no type name", type.Name);
-            return;
+            _logger.LogWarning("Skipping type {Type} - no type name", name);
+            return false;
         }
 
         if (_typesByName.ContainsKey(typeName))
         {
             _logger.LogWarning("Type name collision: {TypeName} already registered. Skipping {Type}", 
-                typeName, type.Name);
-            return;
+                typeName, name);
+            return false;
         }
 
         _typesByName[typeName] = type;
         _namesByType[type] = typeName;
-        _typesByAlias.TryAdd(type.Name, type);
-        if (type.FullName is { Length: > 0 } fullName)
+        _typesByAlias.TryAdd(name, type);
+        if (fullName is { Length: > 0 })
             _typesByAlias.TryAdd(fullName, type);
 
-        _logger.LogDebug("Registered type: {TypeName} -> {Type}", typeName, type.Name);
+        _logger.LogDebug("Registered type: {TypeName} -> {Type}", typeName, name);
+        return true;
     }
 
     /// <summary>
@@ -139,6 +168,17 @@ public class NodeToolTypeRegistry
         return _namesByType.TryGetValue(type, out var name) ? name : null;
     }
 
+    /// <summary>
+    /// Create an instance of a type registered from a manifest, without reflection.
+    /// </summary>
+    /// <param name="typeName">The NodeTool type identifier</param>
+    /// <returns>A new instance with its default values, or null if the type has no manifest factory</returns>
+    public object? CreateInstance(string typeName)
+    {
+        EnsureInitialized();
+        return _factoriesByName.TryGetValue(typeName, out var create) ? create() : null;
+    }
+
     /// <summary>
     /// Get all registered type names.
     /// </summary>
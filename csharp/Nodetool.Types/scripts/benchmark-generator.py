@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""
+Benchmark for generate-all-types.py on a synthetic package catalog.
+
+Builds a workspace of `nodetool-bench*` packages with a configurable number
+of BaseType and BaseNode subclasses (nested generic annotations, references
+to Core types and to the types of other packages), next to a small stand-in
+for nodetool-core, so neither nodetool nor pydantic need to be installed.
+The generator then runs on it with `--profile` in a fresh interpreter, and
+the benchmark reports classes per second for every phase and the peak memory.
+
+Every package is importable, as with editable installs; Core node discovery
+leaves out the packages' `nodetool/nodes` directories (see
+`discovery.PackageIndex.owns_nodes`). Rates count the classes that were
+described, taken from the run's saved IR.
+
+Runs are repeated (`--repeat`) and each phase is reported from its fastest
+run. `--json PATH` saves the result; `--baseline PATH` compares against a
+saved result and exits with status 1 if a phase got more than
+`--max-regression` slower or the peak memory grew by more than that, which
+is what a CI job checks. Arguments the benchmark does not know are passed
+to the generator, e.g. `--static` or `--render-jobs 4`.
+"""
+import argparse
+import json
+import math
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+GENERATOR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "generate-all-types.py")
+
+# Stand-in nodetool-core: just enough of the BaseType/BaseNode API that the generator uses.
+CORE_FILES = {
+    "nodetool/metadata/types.py": '''
+class _Field:
+    __slots__ = ("annotation", "default")
+
+    def __init__(self, annotation, default):
+        self.annotation = annotation
+        self.default = default
+
+class BaseType:
+    """Collects annotated class attributes into `model_fields`, like pydantic."""
+    model_fields = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        fields = dict(cls.model_fields)
+        for name, annotation in cls.__dict__.get("__annotations__", {}).items():
+            fields[name] = _Field(annotation, cls.__dict__.get(name))
+        cls.model_fields = fields
+
+class AssetRef(BaseType):
+    uri: str = ""
+    asset_id: str | None = None
+
+class ImageRef(AssetRef):
+    width: int = 0
+    height: int = 0
+
+class AudioRef(AssetRef):
+    duration: float = 0.0
+''',
+    "nodetool/workflows/base_node.py": '''
+from nodetool.metadata.types import _Field
+
+class _TypeMetadata:
+    def __init__(self, python_type):
+        self._python_type = python_type
+
+    def get_python_type(self):
+        return self._python_type
+
+class _Property:
+    def __init__(self, name, python_type, default=None):
+        self.name = name
+        self.type = _TypeMetadata(python_type)
+        self.default = default
+
+class _NodeMetadata:
+    def __init__(self, properties, outputs):
+        self.properties = properties
+        self.outputs = outputs
+
+class BaseNode:
+    model_fields = {}
+    __outputs__ = {"output": str}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        fields = dict(cls.model_fields)
+        for name, annotation in cls.__dict__.get("__annotations__", {}).items():
+            if not name.startswith("__"):
+                fields[name] = _Field(annotation, cls.__dict__.get(name))
+        cls.model_fields = fields
+
+    @classmethod
+    def is_visible(cls):
+        return True
+
+    @classmethod
+    def get_metadata(cls):
+        return _NodeMetadata(
+            [_Property(name, f.annotation, f.default) for name, f in cls.model_fields.items()],
+            [_Property(name, tp) for name, tp in cls.__outputs__.items()],
+        )
+''',
+    "nodetool/packages/registry.py": '''
+def discover_node_packages():
+    return []
+''',
+}
+
+# Wrappers applied around a referenced type, one per nesting level.
+_WRAPPERS = ("list[{}]", "dict[str, {}]", "{} | None", "tuple[int, {}]", "Optional[{}]")
+
+def _nested(inner: str, depth: int, seed: int) -> str:
+    for level in range(depth):
+        inner = _WRAPPERS[(seed + level) % len(_WRAPPERS)].format(inner)
+    return inner
+
+def _write(path: str, text: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text.lstrip("\n"))
+
+class Catalog:
+    """The layout of the synthetic packages: which class lives in which module."""
+
+    def __init__(self, packages: int, types: int, nodes: int, modules: int, nesting: int):
+        self.packages = packages
+        self.types_per_package = max(1, math.ceil(types / packages))
+        self.nodes_per_package = max(1, math.ceil(nodes / packages))
+        self.modules = modules
+        self.nesting = nesting
+
+    def _per_module(self, per_package: int) -> int:
+        return max(1, math.ceil(per_package / self.modules))
+
+    def type_module(self, package: int, index: int) -> str:
+        return f"nodetool.types.bench{package}.types_{index // self._per_module(self.types_per_package)}"
+
+    def _type_name(self, package: int, index: int) -> str:
+        return f"Bench{package}Type{index}"
+
+    def _imports(self, names) -> str:
+        by_module = {}
+        for package, index in sorted(names):
+            by_module.setdefault(self.type_module(package, index), []).append(self._type_name(package, index))
+        return "".join(f"from {module} import {', '.join(names)}\n" for module, names in sorted(by_module.items()))
+
+    def type_source(self, package: int, module: int) -> str:
+        per_module = self._per_module(self.types_per_package)
+        indices = range(module * per_module, min((module + 1) * per_module, self.types_per_package))
+        # The same type of the previous package: a reference across packages.
+        imported = {(package - 1, i) for i in indices} if package > 0 else set()
+        classes = []
+        for i in indices:
+            own = self._type_name(package, i - 1) if i > indices[0] else "ImageRef"
+            other = self._type_name(package - 1, i) if package > 0 else "AudioRef"
+            tag = f"bench{package}.type{i}"
+            classes.append(f'''
+class {self._type_name(package, i)}(BaseType):
+    type: Literal["{tag}"] = "{tag}"
+    name: str = ""
+    count: int = 0
+    ratio: float = 1.0
+    enabled: bool = False
+    tags: list[str] = []
+    image: ImageRef = ImageRef()
+    previous: {own} | None = None
+    related: {_nested(other, self.nesting, i)} = None
+''')
+        header = (
+            "from typing import Literal, Optional\n"
+            "from nodetool.metadata.types import AudioRef, BaseType, ImageRef\n"
+            + self._imports(imported)
+        )
+        return header + "".join(classes)
+
+    def node_source(self, package: int, module: int) -> str:
+        per_module = self._per_module(self.nodes_per_package)
+        indices = range(module * per_module, min((module + 1) * per_module, self.nodes_per_package))
+        imported = set()
+        classes = []
+        for n in indices:
+            own = (package, n % self.types_per_package)
+            other = ((package + 1) % self.packages, (n * 7) % self.types_per_package)
+            imported.update((own, other))
+            classes.append(f'''
+class Bench{package}Node{n}(BaseNode):
+    text: str = ""
+    amount: float = 0.5
+    image: ImageRef = ImageRef()
+    item: {self._type_name(*own)} | None = None
+    items: {_nested(self._type_name(*other), self.nesting, n)} = None
+    __outputs__ = {{"output": {self._type_name(*own)}, "labels": list[str]}}
+''')
+        header = (
+            "from typing import Optional\n"
+            "from nodetool.metadata.types import ImageRef\n"
+            "from nodetool.workflows.base_node import BaseNode\n"
+            + self._imports(imported)
+        )
+        return header + "".join(classes)
+
+    def build(self, workspace: str) -> list:
+        """Write the stand-in core and the packages; returns the `src` directories."""
+        # Not named nodetool-*, so it is not mistaken for a workspace package.
+        core_src = os.path.join(workspace, "core", "src")
+        for rel_path, text in CORE_FILES.items():
+            _write(os.path.join(core_src, *rel_path.split("/")), text)
+        srcs = [core_src]
+        for package in range(self.packages):
+            src = os.path.join(workspace, f"nodetool-bench{package}", "src")
+            srcs.append(src)
+            for module in range(min(self.modules, self.types_per_package)):
+                _write(os.path.join(src, "nodetool", "types", f"bench{package}", f"types_{module}.py"),
+                       self.type_source(package, module))
+            for module in range(min(self.modules, self.nodes_per_package)):
+                _write(os.path.join(src, "nodetool", "nodes", f"bench{package}", f"nodes_{module}.py"),
+                       self.node_source(package, module))
+        return srcs
+
+def _child_max_rss() -> int:
+    """Largest resident set of any finished child process, in bytes (0 if unknown)."""
+    if resource is None:
+        return 0
+    rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+def run_once(workspace: str, srcs: list, generator_args: list) -> dict:
+    """Run the generator once; returns its --profile report plus the described class counts."""
+    output_dir = os.path.join(workspace, "out")
+    profile_path = os.path.join(workspace, "profile.json")
+    env = dict(os.environ)
+    # Every package is importable, as with editable installs of each checkout.
+    env["PYTHONPATH"] = os.pathsep.join(srcs + [env["PYTHONPATH"]] if env.get("PYTHONPATH") else srcs)
+    env["NODETOOL_WORKSPACE_ROOT"] = workspace
+    command = [sys.executable, GENERATOR, "--output-dir", output_dir, "--profile", profile_path, *generator_args]
+    started = time.perf_counter()
+    completed = subprocess.run(command, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    elapsed = time.perf_counter() - started
+    if completed.returncode != 0:
+        print(completed.stdout[-4000:])
+        raise RuntimeError(f"generator exited with status {completed.returncode}")
+    with open(profile_path, encoding="utf-8") as f:
+        report = json.load(f)
+    with open(os.path.join(output_dir, ".nodetool-codegen-graph.json"), encoding="utf-8") as f:
+        ir = json.load(f)["ir"]
+    report["process_seconds"] = elapsed
+    report["types"] = sum(len(types) for types in ir["types"].values())
+    report["nodes"] = sum(len(nodes) for nodes in (ir["nodes"] or {}).values())
+    return report
+
+def _classes(phase: str, types: int, nodes: int) -> int:
+    """How many classes a phase handles: discovery phases their kind, everything else both."""
+    if phase == "type discovery":
+        return types
+    if phase == "node discovery":
+        return nodes
+    return types + nodes
+
+def summarize(reports: list) -> dict:
+    """Fastest time per phase over the runs, as seconds and classes per second."""
+    types, nodes = reports[0]["types"], reports[0]["nodes"]
+    phases = {}
+    for name in reports[0]["phases"]:
+        wall = min(r["phases"].get(name, {}).get("wall_seconds", math.inf) for r in reports)
+        classes = _classes(name, types, nodes)
+        phases[name] = {
+            "wall_seconds": wall,
+            "classes": classes,
+            "classes_per_second": classes / wall if wall > 0 else None,
+        }
+    wall = min(r["wall_seconds"] for r in reports)
+    return {
+        "types": types,
+        "nodes": nodes,
+        "phases": phases,
+        "total": {"wall_seconds": wall, "classes": types + nodes, "classes_per_second": (types + nodes) / wall},
+        "process_seconds": min(r["process_seconds"] for r in reports),
+        "tracemalloc_peak_bytes": min(r["tracemalloc_peak_bytes"] or 0 for r in reports),
+        "max_rss_bytes": _child_max_rss(),
+    }
+
+def compare(result: dict, baseline: dict, max_regression: float, min_seconds: float) -> list:
+    """Regressions of `result` against `baseline`, as messages."""
+    problems = []
+    for name, base in list(baseline["phases"].items()) + [("total", baseline["total"])]:
+        current = result["total"] if name == "total" else result["phases"].get(name)
+        if current is None or not base.get("classes_per_second") or base["wall_seconds"] < min_seconds:
+            continue  # absent, or too short to compare reliably
+        ratio = (current["classes_per_second"] or 0) / base["classes_per_second"]
+        if ratio < 1 - max_regression:
+            problems.append(f"{name}: {current['classes_per_second']:.0f} classes/s, "
+                            f"{100 * (1 - ratio):.0f}% below the baseline's {base['classes_per_second']:.0f}")
+    base_peak, peak = baseline.get("tracemalloc_peak_bytes") or 0, result["tracemalloc_peak_bytes"]
+    if base_peak and peak > base_peak * (1 + max_regression):
+        problems.append(f"peak memory: {peak / 1e6:.1f} MB, {100 * (peak / base_peak - 1):.0f}% above the baseline's {base_peak / 1e6:.1f} MB")
+    return problems
+
+def print_result(result: dict) -> None:
+    print(f"\n=== Benchmark: {result['types']} types, {result['nodes']} nodes described ===")
+    print(f"  {'phase':<16} {'seconds':>9} {'classes/s':>12}")
+    for name, phase in sorted(result["phases"].items(), key=lambda item: item[1]["wall_seconds"], reverse=True):
+        rate = phase["classes_per_second"]
+        print(f"  {name:<16} {phase['wall_seconds']:9.3f} {rate if rate is not None else float('nan'):12.0f}")
+    total = result["total"]
+    print(f"  {'total':<16} {total['wall_seconds']:9.3f} {total['classes_per_second']:12.0f}")
+    print(f"  Process: {result['process_seconds']:.2f}s (including interpreter start-up)")
+    print(f"  Peak memory: {result['tracemalloc_peak_bytes'] / 1e6:.1f} MB traced"
+          + (f", {result['max_rss_bytes'] / 1e6:.1f} MB max RSS" if result["max_rss_bytes"] else ""))
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the type generator on a synthetic catalog; unknown arguments are passed to the generator")
+    parser.add_argument("--packages", type=int, default=10, help="Number of synthetic nodetool-* packages")
+    parser.add_argument("--types", type=int, default=2000, help="BaseType subclasses, spread over the packages")
+    parser.add_argument("--nodes", type=int, default=10000, help="BaseNode subclasses, spread over the packages")
+    parser.add_argument("--modules", type=int, default=20, help="Type modules and node modules per package")
+    parser.add_argument("--nesting", type=int, default=3, help="Levels of generic wrappers around referenced types")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs; each phase is reported from its fastest run")
+    parser.add_argument("--workdir", help="Build the catalog here (kept) instead of in a temporary directory")
+    parser.add_argument("--json", metavar="PATH", help="Write the result to PATH (usable as a --baseline)")
+    parser.add_argument("--baseline", metavar="PATH", help="Fail if a phase or the peak memory regressed against this result")
+    parser.add_argument("--max-regression", type=float, default=0.2,
+                        help="Allowed slowdown (or memory growth) against the baseline, as a fraction (default 0.2)")
+    parser.add_argument("--min-seconds", type=float, default=0.05,
+                        help="Do not compare phases that took less than this in the baseline (too noisy)")
+    args, generator_args = parser.parse_known_args()
+    if "--no-cache" not in generator_args:
+        # A warm cache would skip the imports being measured.
+        generator_args.append("--no-cache")
+
+    workspace = os.path.abspath(args.workdir) if args.workdir else tempfile.mkdtemp(prefix="nodetool-bench-")
+    catalog = Catalog(args.packages, args.types, args.nodes, args.modules, args.nesting)
+    try:
+        print(f">>> Building {args.packages} packages in {workspace}...")
+        srcs = catalog.build(workspace)
+        reports = []
+        for i in range(args.repeat):
+            print(f">>> Run {i + 1}/{args.repeat}...")
+            reports.append(run_once(workspace, srcs, generator_args))
+    except RuntimeError as e:
+        print(f"[ERROR] {e}")
+        sys.exit(1)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workspace, ignore_errors=True)
+
+    result = summarize(reports)
+    result["config"] = {key: getattr(args, key) for key in ("packages", "types", "nodes", "modules", "nesting", "repeat")}
+    result["config"]["generator_args"] = generator_args
+    print_result(result)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=1)
+            f.write("\n")
+        print(f"\nSaved result: {os.path.abspath(args.json)}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("config", {}).get("packages") != args.packages or baseline.get("types") != result["types"] \
+                or baseline.get("nodes") != result["nodes"]:
+            print(f"[WARNING] {args.baseline} was measured on a different catalog; rates may not be comparable")
+        problems = compare(result, baseline, args.max_regression, args.min_seconds)
+        for problem in problems:
+            print(f"[ERROR] Regression: {problem}")
+        if problems:
+            sys.exit(1)
+        print(f"[OK] Within {100 * args.max_regression:.0f}% of {args.baseline}")
+
+if __name__ == "__main__":
+    main()
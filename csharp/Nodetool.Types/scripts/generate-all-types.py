@@ -5,7 +5,15 @@ Generates C# types from nodetool-core AND all installed packages in one centrali
 This avoids code duplication by generating everything in the SDK.
 """
 import os
+import sys
 import argparse
+from generation.cache import CACHE_FILE_NAME
+from generation.graph import load_graph
+from generation.ir import load_ir, save_ir
+from generation.quarantine import QUARANTINE_FILE_NAME
+from generation import profiling
+from generation.render import RenderMismatch
+from generation.stubs import DEFAULT_STUBBED_PACKAGES
 from generation.orchestrator import (
     generate_all_types, 
     generate_all_nodes, 
@@ -20,20 +28,163 @@ def main():
     parser.add_argument("--namespace", default="Nodetool.Types", help="C# namespace for generated classes")
     parser.add_argument("--types-only", action="store_true", help="Generate only types (not nodes)")
     parser.add_argument("--nodes-only", action="store_true", help="Generate only nodes (not nodes)")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                       help="Discover each package in its own worker process, N at a time (0 = one per CPU core)")
+    parser.add_argument("--render-jobs", type=int, default=1, metavar="N",
+                       help="Render files on N worker processes while they are written (0 = one per CPU core)")
+    parser.add_argument("--check-render", action="store_true",
+                       help="Also render every file serially and fail if any differs from what was written")
+    parser.add_argument("--static", action="store_true",
+                       help="Parse sources with ast first and import only modules that define types or nodes")
+    parser.add_argument("--no-cache", action="store_true",
+                       help=f"Ignore and do not update the per-module metadata cache ({CACHE_FILE_NAME} in the output directory)")
+    parser.add_argument("--package-metadata", action="store_true",
+                       help="Describe nodes from the package_metadata JSON shipped with packages instead of importing them, where available")
+    parser.add_argument("--stub-imports", nargs="?", const=",".join(DEFAULT_STUBBED_PACKAGES), default="", metavar="PKG,...",
+                       help="Replace heavy packages with stubs while importing modules (default list if no value is given)")
+    parser.add_argument("--subclass-scan", action="store_true",
+                       help="Import each source's modules from their files, then find classes through the "
+                            "BaseType/BaseNode subclass registry instead of sweeping module attributes")
+    parser.add_argument("--import-timeout", type=float, metavar="SECONDS",
+                       help="Discover in worker processes and skip (and quarantine) any module whose import takes longer")
+    parser.add_argument("--retry-quarantined", action="store_true",
+                       help=f"Import the modules listed in {QUARANTINE_FILE_NAME} anyway instead of skipping them")
+    parser.add_argument("--artifact-cache", nargs="?", const="", metavar="DIR",
+                       help="Restore the whole output from DIR (default ~/.cache/nodetool-codegen) if the environment "
+                            "fingerprint matches an earlier run, and store the output of runs that do not")
+    parser.add_argument("--object-report", metavar="PATH",
+                       help="Write every generated member whose C# type is or contains object, with the reason, to PATH as JSON")
+    parser.add_argument("--save-ir", metavar="PATH",
+                       help="Also write the discovered type/node descriptions to PATH as JSON")
+    parser.add_argument("--from-ir", metavar="PATH",
+                       help="Generate from a file written by --save-ir instead of discovering (nodetool is not imported)")
+    parser.add_argument("--from-server", metavar="URL",
+                       help="Take node descriptions from a running NodeTool server (e.g. http://localhost:7777); "
+                            "types still come from --from-ir or local discovery")
+    parser.add_argument("--changed", nargs="*", metavar="MODULE",
+                       help="Update the output of the last full run: rediscover only the given modules (names or .py paths), "
+                            "or every source modified since then if none are given, and re-render what depends on them")
+    parser.add_argument("--watch", action="store_true",
+                       help="Bring the output up to date, then keep running and regenerate what each source change affects")
+    parser.add_argument("--poll", action="store_true",
+                       help="With --watch, poll modification times instead of using inotify")
+    parser.add_argument("--profile", metavar="PATH",
+                       help="Write wall/CPU time per phase and import time and memory per module to PATH as JSON")
+    parser.add_argument("--cprofile", metavar="PATH",
+                       help="Write cProfile statistics of the run to PATH (for pstats or snakeviz)")
+    parser.add_argument("--profile-stacks", metavar="PATH",
+                       help="Sample the main thread's stack and write collapsed stacks to PATH (for flamegraph.pl or speedscope)")
     
     args = parser.parse_args()
-    
+    with profiling.profiled(args.profile, args.cprofile, args.profile_stacks):
+        run(parser, args)
+
+def run(parser: argparse.ArgumentParser, args: argparse.Namespace) -> None:
+    """Generate as requested by the parsed command line."""
     # Convert output_dir to absolute path and ensure it exists
     output_dir = os.path.abspath(args.output_dir)
     os.makedirs(output_dir, exist_ok=True)
+    for mode, enabled in (("--changed", args.changed is not None), ("--watch", args.watch)):
+        if not enabled:
+            continue
+        conflicting = [flag for flag, value in (
+            ("--from-ir", args.from_ir), ("--from-server", args.from_server), ("--package-metadata", args.package_metadata),
+            ("--types-only", args.types_only), ("--nodes-only", args.nodes_only), ("--jobs", args.jobs != 1),
+            ("--import-timeout", args.import_timeout is not None),
+            ("--changed", mode == "--watch" and args.changed is not None), ("--save-ir", mode == "--watch" and args.save_ir),
+        ) if value]
+        if conflicting:
+            parser.error(f"{mode} cannot be combined with {', '.join(conflicting)}")
+    if args.artifact_cache is not None:
+        conflicting = [flag for flag, value in (
+            ("--from-ir", args.from_ir), ("--from-server", args.from_server), ("--types-only", args.types_only),
+            ("--nodes-only", args.nodes_only), ("--changed", args.changed is not None), ("--watch", args.watch),
+        ) if value]
+        if conflicting:
+            parser.error(f"--artifact-cache cannot be combined with {', '.join(conflicting)}")
+    if args.import_timeout is not None and args.import_timeout <= 0:
+        parser.error("--import-timeout must be a positive number of seconds")
+    if args.subclass_scan and args.stub_imports:
+        parser.error("--subclass-scan cannot be combined with --stub-imports")
+    if args.from_ir:
+        try:
+            session = load_ir(args.from_ir)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[ERROR] Could not load IR from {args.from_ir}: {e}")
+            sys.exit(1)
+        if session.all_nodes is None and not args.types_only and not args.from_server:
+            print(f"[ERROR] {args.from_ir} has no node descriptions; use --types-only or save it from a full run")
+            sys.exit(1)
+    else:
+        # Imported here so that --from-ir runs never import nodetool.
+        with profiling.phase("import nodetool"):
+            from generation.discovery import DiscoveryOptions
+            from generation.session import DiscoverySession
+        options = DiscoveryOptions(
+            static=args.static,
+            package_metadata=args.package_metadata,
+            stub_packages=tuple(p.strip() for p in args.stub_imports.split(",") if p.strip()),
+            subclass_scan=args.subclass_scan,
+            import_timeout=args.import_timeout,
+            quarantine_path=os.path.join(output_dir, QUARANTINE_FILE_NAME),
+            retry_quarantined=args.retry_quarantined,
+            cache_path=None if args.no_cache else os.path.join(output_dir, CACHE_FILE_NAME),
+        )
+        if args.watch:
+            from generation.watch import watch
+            watch(output_dir, args.namespace, options, poll=args.poll)
+            return
+        if args.changed is not None:
+            from generation.incremental import regenerate_changed
+            ir = regenerate_changed(output_dir, args.namespace, args.changed or None, options)
+            if ir is None:
+                sys.exit(1)
+            if args.save_ir:
+                save_ir(ir, args.save_ir)
+                print(f"\nSaved IR: {os.path.abspath(args.save_ir)}")
+            return
+        session = DiscoverySession(args.jobs, options, include_nodes=not (args.types_only or args.from_server))
+        if args.artifact_cache is not None:
+            from generation.artifacts import ArtifactCache, default_cache_dir, environment, fingerprint
+            with profiling.phase("fingerprint"):
+                artifact_environment = environment(session.index, options, args.namespace)
+                artifact_key = fingerprint(artifact_environment)
+            artifacts = ArtifactCache(args.artifact_cache or default_cache_dir())
+            with profiling.phase("write"):
+                restored = artifacts.restore(artifact_key, output_dir)
+            if restored:
+                if args.save_ir:
+                    save_ir(load_graph(output_dir).ir, args.save_ir)
+                    print(f"\nSaved IR: {os.path.abspath(args.save_ir)}")
+                return
+    if args.from_server:
+        from generation.server import ServerError, ServerSession
+        session = ServerSession(args.from_server, session)
+        if not args.types_only:
+            try:
+                session.fetch()
+            except ServerError as e:
+                print(f"[ERROR] Could not fetch node metadata from {args.from_server}: {e}")
+                sys.exit(1)
     print(f"\nOutput directory: {output_dir}\n")
     
-    if args.types_only:
-        generate_all_types(output_dir, args.namespace)
-    elif args.nodes_only:
-        generate_all_nodes(output_dir, args.namespace)
-    else:
-        generate_all_types_and_nodes(output_dir, args.namespace)
+    render_options = dict(render_jobs=args.render_jobs, check_render=args.check_render, object_report=args.object_report)
+    try:
+        if args.types_only:
+            generate_all_types(output_dir, args.namespace, session=session, **render_options)
+        elif args.nodes_only:
+            generate_all_nodes(output_dir, args.namespace, session=session, **render_options)
+        else:
+            generate_all_types_and_nodes(output_dir, args.namespace, session=session, **render_options)
+    except RenderMismatch as e:
+        print(f"[ERROR] {e}")
+        sys.exit(1)
+    if args.artifact_cache is not None:
+        artifacts.store(artifact_key, output_dir, artifact_environment)
+
+    if args.save_ir:
+        save_ir(session.to_ir(), args.save_ir)
+        print(f"\nSaved IR: {os.path.abspath(args.save_ir)}")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
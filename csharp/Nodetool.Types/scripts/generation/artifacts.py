@@ -0,0 +1,272 @@
+"""
+Whole-output cache keyed by an environment fingerprint (`--artifact-cache`).
+
+A full run that sees exactly the same inputs as an earlier one produces the
+same files. The fingerprint covers those inputs:
+
+- every installed distribution (name and version), which includes the
+  registry's node packages and their dependencies,
+- the sources (`src/`) of nodetool-core, the registry's development installs
+  and the workspace checkouts: the git commit, plus a digest of uncommitted changes
+  if there are any, or a digest of the files outside git,
+- the generator itself (a digest of its sources), the Python version and the
+  line separator,
+- the settings that change the output (namespace, discovery options, the
+  quarantine).
+
+After a full run, the generated files and the dependency graph are stored in
+a content-addressed directory (`objects/` holds each distinct file once,
+`runs/` maps fingerprints to files). A later run with the same fingerprint
+restores them without discovering anything. Only files that differ are
+rewritten, and files the earlier output did not have are pruned, as in a
+regular run.
+"""
+import hashlib
+import importlib.metadata
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from .discovery import DiscoveryOptions, PackageIndex, _core_src
+from .graph import GRAPH_FILE_NAME
+from .output import MANIFEST_FILE_NAME, OutputTree, _replace_if_changed
+from .schema import SCHEMA_VERSION
+
+# Runs kept in the cache; older ones (and files only they used) are deleted.
+MAX_RUNS = 20
+
+def default_cache_dir() -> str:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "nodetool-codegen")
+
+def _digest_files(paths: Iterator[Tuple[str, str]]) -> str:
+    """Digest of `(name, path)` pairs: each name and its file's content."""
+    h = hashlib.sha256()
+    for name, path in paths:
+        h.update(name.encode("utf-8") + b"\0")
+        try:
+            with open(path, "rb") as f:
+                h.update(hashlib.sha256(f.read()).digest())
+        except OSError:
+            h.update(b"missing")
+    return h.hexdigest()
+
+def _tree_files(root: str) -> Iterator[Tuple[str, str]]:
+    """Source-like files under `root`, sorted, as `(relative path, path)`."""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d != "__pycache__" and not d.startswith("."))
+        for name in sorted(filenames):
+            if name.endswith((".py", ".json", ".toml")):
+                path = os.path.join(dirpath, name)
+                yield os.path.relpath(path, root).replace(os.sep, "/"), path
+
+def _git(path: str, *args: str) -> Optional[bytes]:
+    try:
+        result = subprocess.run(["git", "-C", path, *args], capture_output=True, timeout=60)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout if result.returncode == 0 else None
+
+def _git_state(path: str) -> Optional[str]:
+    """`git:<commit>` (plus a digest of uncommitted changes under `path`), or None outside git."""
+    head = _git(path, "rev-parse", "HEAD")
+    top = _git(path, "rev-parse", "--show-toplevel")
+    status = _git(path, "status", "--porcelain", "-z", "--untracked-files=all", "--", ".")
+    if head is None or top is None or status is None:
+        return None
+    state = f"git:{head.decode().strip()}"
+    if not status:
+        return state
+    diff = _git(path, "diff", "HEAD", "--binary", "--", ".")
+    if diff is None:
+        return None
+    top_dir = top.decode().strip()
+    untracked = [
+        (entry[3:], os.path.join(top_dir, entry[3:]))
+        for entry in status.decode("utf-8", "surrogateescape").split("\0")
+        if entry.startswith("?? ")
+    ]
+    h = hashlib.sha256(diff)
+    h.update(_digest_files(iter(sorted(untracked))).encode())
+    return f"{state}+{h.hexdigest()[:16]}"
+
+def source_state(path: str) -> str:
+    """Fingerprint of a source tree: its git state, or the digest of its files."""
+    return _git_state(path) or f"files:{_digest_files(_tree_files(path))[:16]}"
+
+def generator_digest() -> str:
+    """Digest of the generator's sources (this package and the CLI script)."""
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    files = [(name, os.path.join(package_dir, name)) for name in sorted(os.listdir(package_dir)) if name.endswith(".py")]
+    cli = os.path.join(os.path.dirname(package_dir), "generate-all-types.py")
+    files.append(("generate-all-types.py", cli))
+    return _digest_files(iter(files))
+
+def environment(index: PackageIndex, options: DiscoveryOptions, namespace: str) -> Dict[str, Any]:
+    """Everything a full run's output depends on (see module docstring)."""
+    distributions = sorted({
+        f"{dist.metadata['Name']}=={dist.version}"
+        for dist in importlib.metadata.distributions()
+        if dist.metadata["Name"]
+    })
+    sources: Dict[str, str] = {}
+    core_src = _core_src()
+    if core_src is not None:
+        sources["nodetool-core"] = source_state(os.path.join(core_src, "nodetool"))
+    # Only `src`: the rest of a checkout (nodetool-sdk holds the generated output) does not matter.
+    for package in index.registry:
+        package_src = os.path.join(package.source_folder, "src") if package.source_folder else None
+        if package_src and os.path.isdir(package_src):
+            sources[f"registry:{package.name}"] = source_state(package_src)
+    for package in index.workspace:
+        if package.src is not None:
+            sources[f"workspace:{package.dir_name}"] = source_state(package.src)
+    quarantine = None
+    if options.quarantine_path and not options.retry_quarantined and os.path.exists(options.quarantine_path):
+        quarantine = _digest_files(iter([("quarantine", options.quarantine_path)]))
+    return {
+        "generator": generator_digest(),
+        "schema_version": SCHEMA_VERSION,
+        "python": f"{sys.version_info[0]}.{sys.version_info[1]}",
+        "linesep": os.linesep,
+        "namespace": namespace,
+        "settings": {
+            "static": options.static,
+            "package_metadata": options.package_metadata,
+            "stub_packages": list(options.stub_packages),
+            "subclass_scan": options.subclass_scan,
+            "quarantine": quarantine,
+        },
+        "registry_error": index.registry_error,
+        "workspace_error": index.workspace_error,
+        "sources": sources,
+        "distributions": distributions,
+    }
+
+def fingerprint(environment: Dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(environment, sort_keys=True).encode("utf-8")).hexdigest()
+
+def _write_atomic(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+class ArtifactCache:
+    """Generated outputs by environment fingerprint, in a directory shared by runs."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.path, "objects", digest[:2], digest)
+
+    def _run_path(self, key: str) -> str:
+        return os.path.join(self.path, "runs", f"{key}.json")
+
+    def _run(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._run_path(key), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _read_object(self, digest: str) -> Optional[bytes]:
+        try:
+            with open(self._object_path(digest), "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        return data if hashlib.sha256(data).hexdigest() == digest else None
+
+    def restore(self, key: str, output_dir: str) -> bool:
+        """Make `output_dir` the stored output of `key`; False (nothing written) if there is none."""
+        run = self._run(key)
+        if run is None:
+            return False
+        files: Dict[str, bytes] = {}
+        for rel_path, digest in run["files"].items():
+            data = self._read_object(digest)
+            if data is None:
+                print(f"[WARNING] Artifact cache entry {key[:12]} is incomplete ({rel_path}); regenerating")
+                return False
+            files[rel_path] = data
+        graph = self._read_object(run["graph"]) if run.get("graph") else None
+
+        tree = OutputTree(output_dir)
+        for rel_path, data in sorted(files.items()):
+            tree.write_bytes(rel_path, data)
+        tree.prune()
+        graph_path = os.path.join(output_dir, GRAPH_FILE_NAME)
+        if graph is not None:
+            _replace_if_changed(graph_path, graph, tree.new_file_mode)
+        elif os.path.exists(graph_path):
+            os.remove(graph_path)
+        # Recently used runs are the last to be evicted.
+        os.utime(self._run_path(key))
+        print(f"[OK] Restored {len(files)} files from the artifact cache (fingerprint {key[:12]}): {tree.summary()}")
+        return True
+
+    def store(self, key: str, output_dir: str, environment: Dict[str, Any]) -> None:
+        """Store the output a full run just wrote to `output_dir` under `key`."""
+        try:
+            with open(os.path.join(output_dir, MANIFEST_FILE_NAME), encoding="utf-8") as f:
+                rel_paths = list(json.load(f)["files"])
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"[WARNING] Not storing the output in the artifact cache: no usable manifest ({e})")
+            return
+        files: Dict[str, str] = {}
+        for rel_path in rel_paths:
+            try:
+                files[rel_path] = self._put(os.path.join(output_dir, *rel_path.split("/")))
+            except OSError as e:
+                print(f"[WARNING] Not storing the output in the artifact cache: {e}")
+                return
+        graph_path = os.path.join(output_dir, GRAPH_FILE_NAME)
+        graph = self._put(graph_path) if os.path.exists(graph_path) else None
+        run = {"created_at": time.time(), "environment": environment, "files": files, "graph": graph}
+        _write_atomic(self._run_path(key), json.dumps(run, indent=1).encode("utf-8"))
+        self._evict()
+        print(f"  [OK] Stored {len(files)} files in the artifact cache (fingerprint {key[:12]}): {self.path}")
+
+    def _put(self, path: str) -> str:
+        with open(path, "rb") as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+        target = self._object_path(digest)
+        if not os.path.exists(target):
+            _write_atomic(target, data)
+        return digest
+
+    def _evict(self) -> None:
+        """Keep the `MAX_RUNS` most recently used runs and the objects they use."""
+        runs_dir = os.path.join(self.path, "runs")
+        runs = sorted(
+            (os.path.join(runs_dir, name) for name in os.listdir(runs_dir) if name.endswith(".json")),
+            key=os.path.getmtime,
+            reverse=True,
+        )
+        if len(runs) <= MAX_RUNS:
+            return
+        for path in runs[MAX_RUNS:]:
+            os.remove(path)
+        used = set()
+        for path in runs[:MAX_RUNS]:
+            run = self._run(os.path.basename(path)[:-5])
+            if run is not None:
+                used.update(run["files"].values())
+                used.add(run.get("graph"))
+        objects_dir = os.path.join(self.path, "objects")
+        for dirpath, _, filenames in os.walk(objects_dir):
+            for name in filenames:
+                if name not in used:
+                    os.remove(os.path.join(dirpath, name))
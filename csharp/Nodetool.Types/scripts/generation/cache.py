@@ -0,0 +1,110 @@
+"""
+Persistent per-module cache of discovered schema descriptions.
+
+Entries live in a single SQLite file (by default under the output directory)
+and are keyed by the module's file path plus a digest of:
+
+- the module source and every `nodetool.*` module it imports, transitively
+  (a BaseType's fields can come from a base class defined elsewhere),
+- the version of the package that owns the module,
+- the schema format version of this generator.
+
+A module whose digest is unchanged is served from the cache and never imported.
+"""
+import hashlib
+import os
+import pickle
+import sqlite3
+import sys
+from dataclasses import dataclass
+from typing import Any, List, Optional
+
+from .schema import SCHEMA_VERSION
+from .static_scan import StaticIndex
+
+CACHE_FILE_NAME = ".nodetool-codegen-cache.sqlite3"
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    bytes_read: int = 0
+    bytes_written: int = 0
+
+    def merge(self, other: "CacheStats") -> None:
+        self.hits += other.hits
+        self.misses += other.misses
+        self.bytes_read += other.bytes_read
+        self.bytes_written += other.bytes_written
+
+    def summary(self) -> str:
+        return (
+            f"{self.hits} hits, {self.misses} misses, "
+            f"{self.bytes_read / 1024:.1f} KiB read, {self.bytes_written / 1024:.1f} KiB written"
+        )
+
+class MetadataCache:
+    """SQLite-backed cache mapping (module path, content digest) to schema lists."""
+
+    def __init__(self, path: str, index: Optional[StaticIndex] = None):
+        self.path = path
+        self.index = index or StaticIndex()
+        self.stats = CacheStats()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            # Worker processes share the file; wait for each other's writes.
+            self._conn = sqlite3.connect(self.path, timeout=60)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS modules ("
+                " path TEXT NOT NULL, kind TEXT NOT NULL, digest TEXT NOT NULL, payload BLOB NOT NULL,"
+                " PRIMARY KEY (path, kind))"
+            )
+            self._conn.commit()
+        return self._conn
+
+    def digest(self, module_name: str, module_path: str, version: str) -> str:
+        h = hashlib.sha256()
+        h.update(f"{SCHEMA_VERSION}\0{sys.version_info[:2]}\0{version}\0".encode())
+        for dep in self.index.dependency_files(module_name, module_path):
+            h.update(os.path.abspath(dep).encode() + b"\0")
+            try:
+                with open(dep, "rb") as f:
+                    h.update(hashlib.sha256(f.read()).digest())
+            except OSError:
+                h.update(b"missing")
+        return h.hexdigest()
+
+    def get(self, module_path: str, kind: str, digest: str) -> Optional[List[Any]]:
+        row = self._connection().execute(
+            "SELECT digest, payload FROM modules WHERE path = ? AND kind = ?",
+            (os.path.abspath(module_path), kind),
+        ).fetchone()
+        if row is None or row[0] != digest:
+            self.stats.misses += 1
+            return None
+        try:
+            value = pickle.loads(row[1])
+        except Exception:
+            self.stats.misses += 1
+            return None
+        self.stats.hits += 1
+        self.stats.bytes_read += len(row[1])
+        return value
+
+    def put(self, module_path: str, kind: str, digest: str, value: List[Any]) -> None:
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        conn = self._connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO modules (path, kind, digest, payload) VALUES (?, ?, ?, ?)",
+            (os.path.abspath(module_path), kind, digest, payload),
+        )
+        conn.commit()
+        self.stats.bytes_written += len(payload)
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
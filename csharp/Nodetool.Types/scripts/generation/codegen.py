@@ -1,8 +1,10 @@
 """
 C# code generation functions.
 """
-from typing import List
-from .utils import python_type_to_csharp, default_value_to_csharp, get_package_name, csharp_identifier
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from .utils import typeref_to_csharp, default_to_csharp, get_package_name, csharp_identifier, known_tagged_unions
+from .schema import DefaultValue, FieldSchema, NodeSchema, TypeSchema
+from .unions import ROOT_NAMESPACE, TAG_FIELD, Family, Member, TaggedUnions
 
 _CSHARP_VALUE_TYPES = {
     "bool",
@@ -28,178 +30,601 @@ def _make_nullable_if_null_default(csharp_type: str, default_literal: str | None
         return csharp_type + "?"
     return csharp_type
 
-try:
-    from nodetool.metadata.types import BaseType
-    from nodetool.workflows.base_node import BaseNode
-except ImportError:
-    class BaseType: pass
-    class BaseNode:
-        model_fields = {}
-        def get_metadata(self):
-            raise NotImplementedError
-
-def generate_class_source(cls: type[BaseType], namespace: str) -> str:
-    """Generate C# class source code for a BaseType subclass."""
+class _Member(NamedTuple):
+    """A generated property: its wire name (the Python field name), C# identifier, type and default."""
+    name: str
+    identifier: str
+    csharp_type: str
+    default: str | None
+
+def _members(fields: List[FieldSchema], first: str | None = None, defaults: bool = True) -> List[_Member]:
+    """Members for fields sorted by name (the field named `first` first), in `[Key(n)]` order."""
+    members = []
+    for f in sorted(fields, key=lambda f: (f.name != first, f.name)):
+        default = default_to_csharp(f.default) if defaults else None
+        csharp_type = typeref_to_csharp(f.type)
+        if defaults:
+            csharp_type = _make_nullable_if_null_default(csharp_type, default)
+        members.append(_Member(f.name, csharp_identifier(f.name), csharp_type, default))
+    return members
+
+def _property_lines(members: List[_Member], indent: str = "    ") -> List[str]:
+    """Render `[Key(n)]` properties for `members`."""
+    lines = []
+    for index, m in enumerate(members):
+        lines.append(f"{indent}[Key({index})]")
+        if m.default is not None:
+            lines.append(f"{indent}public {m.csharp_type} {m.identifier} {{ get; set; }} = {m.default};")
+        else:
+            lines.append(f"{indent}public {m.csharp_type} {m.identifier} {{ get; set; }}")
+    return lines
+
+# Read and written without going through the resolver.
+_SCALAR_READS = {
+    "string": "reader.ReadString()",
+    "string?": "reader.ReadString()",
+    "int": "reader.ReadInt32()",
+    "double": "reader.ReadDouble()",
+    "bool": "reader.ReadBoolean()",
+}
+
+def _formatter_name(fields: List[FieldSchema], taken: Iterable[str] = ()) -> str:
+    """`Formatter`, or with underscores appended if a member of the class already has that name."""
+    taken = {csharp_identifier(f.name) for f in fields} | set(taken)
+    name = "Formatter"
+    while name in taken:
+        name += "_"
+    return name
+
+def _formatter_lines(class_name: str, formatter: str, members: List[_Member], indent: str = "    ") -> List[str]:
+    """
+    A nested `IMessagePackFormatter` for `class_name` that reads and writes it
+    as a map keyed by field name, as Python sends pydantic models.
+
+    Keys are written from, and matched against, UTF-8 literals (by length
+    first), so no key is decoded into a string and no dictionary is built.
+    Unknown keys are skipped; missing ones keep the property's default.
+    """
+    lines = [
+        "/// <summary>",
+        f"/// Reads and writes {class_name} as a map keyed by field name, as the server sends it.",
+        "/// </summary>",
+        f"public sealed class {formatter} : IMessagePackFormatter<{class_name}>",
+        "{",
+        f"    public void Serialize(ref MessagePackWriter writer, {class_name} value, MessagePackSerializerOptions options)",
+        "    {",
+        "        if (value == null)",
+        "        {",
+        "            writer.WriteNil();",
+        "            return;",
+        "        }",
+        f"        writer.WriteMapHeader({len(members)});",
+    ]
+    for m in members:
+        lines.append(f"        writer.WriteString({_utf8_literal(m.name)});")
+        if m.csharp_type in _SCALAR_READS:
+            lines.append(f"        writer.Write(value.{m.identifier});")
+        else:
+            lines.append(f"        options.Resolver.GetFormatterWithVerify<{m.csharp_type}>().Serialize(ref writer, value.{m.identifier}, options);")
+    lines.extend([
+        "    }",
+        "",
+        f"    public {class_name} Deserialize(ref MessagePackReader reader, MessagePackSerializerOptions options)",
+        "    {",
+        "        if (reader.TryReadNil())",
+        "        {",
+        "            return null;",
+        "        }",
+        "        options.Security.DepthStep(ref reader);",
+        f"        var value = new {class_name}();",
+        "        for (int count = reader.ReadMapHeader(); count > 0; count--)",
+        "        {",
+        "            ReadOnlySpan<byte> key = global::MessagePack.Internal.CodeGenHelpers.ReadStringSpan(ref reader);",
+    ])
+    by_length: Dict[int, List[_Member]] = {}
+    for m in members:
+        by_length.setdefault(len(m.name.encode("utf-8")), []).append(m)
+    if by_length:
+        lines.extend([
+            "            switch (key.Length)",
+            "            {",
+        ])
+        for length in sorted(by_length):
+            lines.append(f"                case {length}:")
+            for m in by_length[length]:
+                read = _SCALAR_READS.get(m.csharp_type) or (
+                    f"options.Resolver.GetFormatterWithVerify<{m.csharp_type}>().Deserialize(ref reader, options)"
+                )
+                lines.extend([
+                    f"                    if (key.SequenceEqual({_utf8_literal(m.name)}))",
+                    "                    {",
+                    f"                        value.{m.identifier} = {read};",
+                    "                        continue;",
+                    "                    }",
+                ])
+            lines.append("                    break;")
+        lines.append("            }")
+    lines.extend([
+        "            reader.Skip();",
+        "        }",
+        "        reader.Depth--;",
+        "        return value;",
+        "    }",
+        "}",
+    ])
+    return [f"{indent}{line}" if line else "" for line in lines]
+
+def _utf8_literal(text: str) -> str:
+    return default_to_csharp(DefaultValue("str", text)) + "u8"
+
+def render_type_source(schema: TypeSchema, namespace: str) -> str:
+    """
+    Generate C# class source code for a described BaseType subclass.
+
+    A tagged class derives from its union base and keys its tag first, so the
+    base's formatter finds it without reading the other members (see unions.py).
+    """
+    base = known_tagged_unions().bases.get(schema.key)
+    members = _members(schema.fields, first=TAG_FIELD if base else None)
+    formatter = _formatter_name(schema.fields)
     lines = [
         "using MessagePack;",
+        "using MessagePack.Formatters;",
+        "using System;",
         "using System.Collections.Generic;", 
         "",
         f"namespace {namespace};",
         "",
         "[MessagePackObject]",
-        f"public class {cls.__name__}",
+        f"[MessagePackFormatter(typeof({schema.name}.{formatter}))]",
+        f"public class {schema.name}" + (f" : {base}" if base else ""),
         "{"
     ]
-    
-    index = 0
-    # Use model_fields for pydantic v2
-    fields = getattr(cls, 'model_fields', {})
-    for name, field in sorted(fields.items()):
-        prop_name = csharp_identifier(name)
-        default = default_value_to_csharp(field.default)
-        csharp_type = _make_nullable_if_null_default(python_type_to_csharp(field.annotation), default)
-        lines.append(f"    [Key({index})]")
-        if default is not None:
-            lines.append(f"    public {csharp_type} {prop_name} {{ get; set; }} = {default};")
-        else:
-            lines.append(f"    public {csharp_type} {prop_name} {{ get; set; }}")
-        index += 1
-    
+    lines.extend(_property_lines(members))
+    lines.append("")
+    lines.extend(_formatter_lines(schema.name, formatter, members))
     lines.append("}")
     return "\n".join(lines) + "\n"
 
-def generate_node_class_source(node_cls: type[BaseNode], package_name: str) -> str:
-    """Generate C# class source code for a BaseNode subclass."""
-    try:
-        metadata = node_cls.get_metadata()
-        
-        # Convert to proper namespace format
-        pkg_name = get_package_name(package_name)
-        namespace = f"Nodetool.Nodes.{pkg_name}"
-        
-        lines = [
-            "using MessagePack;",
-            "using System.Collections.Generic;",
-            "using Nodetool.Types;",  # Import types namespace
-            "",
-            f"namespace {namespace};",  # e.g., Nodetool.Nodes.Huggingface or Nodetool.Nodes.Lib.Audio
-            "",
-            "[MessagePackObject]",
-            f"public class {node_cls.__name__}",
-            "{"
-        ]
-        
-        # Add properties from node metadata
-        index = 0
-        
-        # Add input properties
-        for prop in sorted(metadata.properties, key=lambda p: p.name):
-            python_type = prop.type.get_python_type()
-            default = default_value_to_csharp(prop.default)
-            csharp_type = _make_nullable_if_null_default(python_type_to_csharp(python_type), default)
-            prop_name = csharp_identifier(prop.name)
-            lines.append(f"    [Key({index})]")
-            if default is not None:
-                lines.append(f"    public {csharp_type} {prop_name} {{ get; set; }} = {default};")
-            else:
-                lines.append(f"    public {csharp_type} {prop_name} {{ get; set; }}")
-            index += 1
-        
-        # Check if we need a return type class for multiple outputs
-        if len(metadata.outputs) > 1:
-            # Generate a return type class
-            return_class_name = f"{node_cls.__name__}Output"
-            lines.extend([
-                "",
-                "    [MessagePackObject]",
-                f"    public class {return_class_name}",
-                "    {"
-            ])
-            
-            output_index = 0
-            for output in sorted(metadata.outputs, key=lambda o: o.name):
-                python_type = output.type.get_python_type()
-                output_type = python_type_to_csharp(python_type)
-                output_name = csharp_identifier(output.name)
-                lines.append(f"        [Key({output_index})]")
-                lines.append(f"        public {output_type} {output_name} {{ get; set; }}")
-                output_index += 1
-            
-            lines.append("    }")
-            
-            # Add a method to get the return type
-            lines.extend([
-                "",
-                f"    public {return_class_name} Process()",
-                "    {",
-                f"        return new {return_class_name}();",
-                "    }"
-            ])
-        else:
-            # Single output or no output
-            if metadata.outputs:
-                python_type = metadata.outputs[0].type.get_python_type()
-                output_type = python_type_to_csharp(python_type)
-                lines.extend([
-                    "",
-                    f"    public {output_type} Process()",
-                    "    {",
-                    f"        return default({output_type});",
-                    "    }"
-                ])
-            else:
-                lines.extend([
-                    "",
-                    "    public void Process()",
-                    "    {",
-                    "    }"
-                ])
-        
-        lines.append("}")
-        return "\n".join(lines) + "\n"
-        
-    except Exception as e:
-        # Fall back to generating from class fields if metadata fails
-        print(f"Warning: Could not get metadata for {node_cls.__name__}: {e}")
-        return generate_fallback_node_class(node_cls, package_name)
+def _node_namespace(package_name: str) -> str:
+    # e.g., Nodetool.Nodes.Huggingface or Nodetool.Nodes.Lib.Audio
+    return f"Nodetool.Nodes.{get_package_name(package_name)}"
 
-def generate_fallback_node_class(node_cls: type[BaseNode], package_name: str) -> str:
-    """Generate C# class from BaseNode fields as fallback when metadata fails."""
+def _fallback_node_namespace(package_name: str) -> str:
     # Clean up package name to avoid namespace issues
     # Strip any 'nodetool.' prefix and '.types.nodes' parts from the module path
     if package_name.startswith("nodetool."):
         package_name = package_name.replace("nodetool.", "", 1)
     package_name = package_name.replace(".types.nodes.", "")
+    # Convert to proper namespace format (e.g., 'huggingface' -> 'Nodetool.Nodes.Huggingface')
+    return _node_namespace(package_name)
+
+def render_node_source(schema: NodeSchema, package_name: str) -> str:
+    """Generate C# class source code for a described BaseNode subclass."""
+    if schema.outputs is None:
+        return _render_fallback_node_source(schema, package_name)
+
+    # Convert to proper namespace format
+    namespace = _node_namespace(package_name)
+    return_class_name = f"{schema.name}Output"
+    members = _members(schema.properties)
+    formatter = _formatter_name(schema.properties, (return_class_name, "Process"))
     
-    # Convert to proper namespace format (e.g., 'huggingface' -> 'Huggingface')
-    pkg_name = get_package_name(package_name)
-    namespace = f"Nodetool.Nodes.{pkg_name}"  # e.g., Nodetool.Nodes.Huggingface
+    lines = [
+        "using MessagePack;",
+        "using MessagePack.Formatters;",
+        "using System;",
+        "using System.Collections.Generic;",
+        "using Nodetool.Types;",  # Import types namespace
+        "",
+        f"namespace {namespace};",  # e.g., Nodetool.Nodes.Huggingface or Nodetool.Nodes.Lib.Audio
+        "",
+        "[MessagePackObject]",
+        f"[MessagePackFormatter(typeof({schema.name}.{formatter}))]",
+        f"public class {schema.name}",
+        "{"
+    ]
+    
+    # Add input properties
+    lines.extend(_property_lines(members))
     
+    # Check if we need a return type class for multiple outputs
+    if len(schema.outputs) > 1:
+        # Generate a return type class
+        outputs = _members(schema.outputs, defaults=False)
+        output_formatter = _formatter_name(schema.outputs)
+        lines.extend([
+            "",
+            "    [MessagePackObject]",
+            f"    [MessagePackFormatter(typeof({return_class_name}.{output_formatter}))]",
+            f"    public class {return_class_name}",
+            "    {"
+        ])
+        lines.extend(_property_lines(outputs, indent="        "))
+        lines.append("")
+        lines.extend(_formatter_lines(return_class_name, output_formatter, outputs, indent="        "))
+        lines.append("    }")
+        
+        # Add a method to get the return type
+        lines.extend([
+            "",
+            f"    public {return_class_name} Process()",
+            "    {",
+            f"        return new {return_class_name}();",
+            "    }"
+        ])
+    elif schema.outputs:
+        # Single output
+        output_type = typeref_to_csharp(schema.outputs[0].type)
+        lines.extend([
+            "",
+            f"    public {output_type} Process()",
+            "    {",
+            f"        return default({output_type});",
+            "    }"
+        ])
+    else:
+        lines.extend([
+            "",
+            "    public void Process()",
+            "    {",
+            "    }"
+        ])
+    
+    lines.append("")
+    lines.extend(_formatter_lines(schema.name, formatter, members))
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+_AUTO_GENERATED = """//------------------------------------------------------------------------------
+// <auto-generated>
+//     This code was generated by the NodeTool SDK Type Generator.
+// </auto-generated>
+//------------------------------------------------------------------------------
+"""
+
+_UNION_HEADER = _AUTO_GENERATED + """
+using MessagePack;
+using MessagePack.Formatters;
+using System;
+"""
+
+def _union_formatter_lines(family: Family) -> List[str]:
+    """`<Base>Formatter`: writes each class with its own formatter, reads the one its tag names."""
+    base = family.name
+    shared = ""
+    if family.ambiguous:
+        shared = f" Tags shared by unrelated classes ({', '.join(sorted(family.ambiguous))}) are not decoded."
+    lines = [
+        "/// <summary>",
+        f"/// Reads the \"{TAG_FIELD}\" tag first and decodes the {base} class it names.{shared}",
+        "/// </summary>",
+        f"public sealed class {base}Formatter : IMessagePackFormatter<{base}>",
+        "{",
+        f"    public void Serialize(ref MessagePackWriter writer, {base} value, MessagePackSerializerOptions options)",
+        "    {",
+        "        switch (value)",
+        "        {",
+        "            case null:",
+        "                writer.WriteNil();",
+        "                return;",
+    ]
+    for member in family.members:
+        lines.extend([
+            f"            case {member.csharp} v:",
+            f"                options.Resolver.GetFormatterWithVerify<{member.csharp}>().Serialize(ref writer, v, options);",
+            "                return;",
+        ])
+    lines.extend([
+        "        }",
+        f"        throw new MessagePackSerializationException($\"{{value.GetType()}} is not a generated {base} class\");",
+        "    }",
+        "",
+        f"    public {base} Deserialize(ref MessagePackReader reader, MessagePackSerializerOptions options)",
+        "    {",
+        "        if (reader.TryReadNil())",
+        "        {",
+        "            return null;",
+        "        }",
+        "        switch (Nodetool.Types.TypeTag.Peek(ref reader))",
+        "        {",
+    ])
+    for tag, member in family.dispatch.items():
+        lines.extend([
+            f"            case {default_to_csharp(DefaultValue('str', tag))}:",
+            f"                return options.Resolver.GetFormatterWithVerify<{member.csharp}>().Deserialize(ref reader, options);",
+        ])
+    lines.extend([
+        "            case null:",
+        f"                throw new MessagePackSerializationException(\"{base} value is not a map with a \\\"{TAG_FIELD}\\\" tag\");",
+        "            case var tag:",
+        f"                throw new MessagePackSerializationException($\"Unknown {base} type tag: {{tag}}\");",
+        "        }",
+        "    }",
+        "}",
+    ])
+    return lines
+
+def render_union_source(family: Family, root: Family) -> str:
+    """Generate the abstract base of a tagged-union family and its formatter (see unions.py)."""
+    lines = [
+        _UNION_HEADER,
+        f"namespace {family.namespace};",
+        "",
+        "/// <summary>",
+        f"/// Base of {family.origin} and the classes derived from it, told apart by their \"{TAG_FIELD}\" tag.",
+        "/// </summary>",
+        f"[MessagePackFormatter(typeof({family.name}Formatter))]",
+        f"public abstract class {family.name} : {root.csharp}",
+        "{",
+        "}",
+        "",
+    ]
+    lines.extend(_union_formatter_lines(family))
+    return "\n".join(lines) + "\n"
+
+def render_union_root_source(unions: TaggedUnions) -> str:
+    """
+    Generate the base of every tagged class with its formatter, the tag reader
+    the formatters share and `TaggedUnionResolver` (see unions.py).
+    """
+    root = unions.root
+    resolved = [root] + unions.families
+    lines = [
+        _UNION_HEADER,
+        f"namespace {root.namespace};",
+        "",
+        "/// <summary>",
+        f"/// Base of every generated class with a \"{TAG_FIELD}\" tag.",
+        "/// </summary>",
+        f"[MessagePackFormatter(typeof({root.name}Formatter))]",
+        f"public abstract class {root.name}",
+        "{",
+        "}",
+        "",
+    ]
+    lines.extend(_union_formatter_lines(root))
+    lines.extend([
+        "",
+        "/// <summary>",
+        f"/// Finds the \"{TAG_FIELD}\" tag of a generated class without moving the reader. Maps from",
+        "/// the server may have it under any key; generated formatters write it first. Only maps",
+        "/// carry a tag: any other value (an array, say) has none and does not decode.",
+        "/// </summary>",
+        "internal static class TypeTag",
+        "{",
+        f"    private static ReadOnlySpan<byte> Key => {_utf8_literal(TAG_FIELD)};",
+        "",
+        "    public static string Peek(ref MessagePackReader reader)",
+        "    {",
+        "        var peek = reader.CreatePeekReader();",
+        "        if (peek.NextMessagePackType != MessagePackType.Map)",
+        "        {",
+        "            return null;",
+        "        }",
+        "        for (int count = peek.ReadMapHeader(); count > 0; count--)",
+        "        {",
+        "            if (global::MessagePack.Internal.CodeGenHelpers.ReadStringSpan(ref peek).SequenceEqual(Key))",
+        "            {",
+        "                return peek.NextMessagePackType == MessagePackType.String ? peek.ReadString() : null;",
+        "            }",
+        "            peek.Skip();",
+        "        }",
+        "        return null;",
+        "    }",
+        "}",
+        "",
+        "/// <summary>",
+        "/// Formatters of the tagged-union bases, for resolvers that do not read [MessagePackFormatter].",
+        "/// </summary>",
+        "public sealed class TaggedUnionResolver : IFormatterResolver",
+        "{",
+        "    public static readonly TaggedUnionResolver Instance = new TaggedUnionResolver();",
+        "",
+        "    private TaggedUnionResolver()",
+        "    {",
+        "    }",
+        "",
+        "    public IMessagePackFormatter<T> GetFormatter<T>()",
+        "    {",
+        "        return FormatterCache<T>.Formatter;",
+        "    }",
+        "",
+        "    private static class FormatterCache<T>",
+        "    {",
+        "        public static readonly IMessagePackFormatter<T> Formatter = (IMessagePackFormatter<T>)CreateFormatter(typeof(T));",
+        "    }",
+        "",
+        "    private static object CreateFormatter(Type type)",
+        "    {",
+    ])
+    for family in resolved:
+        lines.extend([
+            f"        if (type == typeof({family.csharp}))",
+            "        {",
+            f"            return new {family.csharp}Formatter();",
+            "        }",
+        ])
+    lines.extend([
+        "        return null;",
+        "    }",
+        "}",
+    ])
+    return "\n".join(lines) + "\n"
+
+def manifest_entries(root: Family) -> Dict[str, Member]:
+    """
+    The class `TypeManifest` lists for each tag, sorted by tag: the one the root
+    base decodes it to, or for a tag shared by unrelated classes the first of
+    them by C# name (the class a registry scanning the assembly used to keep).
+    """
+    entries = dict(root.dispatch)
+    entries.update((tag, members[0]) for tag, members in root.ambiguous.items())
+    return dict(sorted(entries.items()))
+
+def render_type_manifest_source(root: Optional[Family]) -> str:
+    """
+    Generate `TypeManifest`: the class of every tag (see `manifest_entries`),
+    with its `Type`, C# name and a factory, so a registry needs no reflection to find them.
+    Without tagged classes (`root` is None) `ByTag` is empty, so hosts can always reference it.
+    """
+    entry = "(Type Type, string CSharpName, Func<object> Create)"
+    listed = manifest_entries(root) if root is not None else {}
+    entries = "\n".join(
+        f"            [{default_to_csharp(DefaultValue('str', tag))}] = "
+        f"(typeof({m.csharp}), \"{m.csharp}\", static () => new {m.csharp}()),"
+        for tag, m in listed.items()
+    )
+    shared = ""
+    if root is not None and root.ambiguous:
+        shared = (
+            f"\n/// Tags shared by unrelated classes ({', '.join(sorted(root.ambiguous))}), which BaseTypeFormatter"
+            "\n/// does not decode, name the first of those classes by C# name."
+        )
+    return _AUTO_GENERATED + f"""
+using System;
+using System.Collections.Frozen;
+using System.Collections.Generic;
+
+namespace {ROOT_NAMESPACE};
+
+/// <summary>
+/// The generated class each "{TAG_FIELD}" tag names (as BaseTypeFormatter decodes it): its Type, C# name and a factory.{shared}
+/// The values are tuples, so hosts can hand them to a registry that does not reference this assembly.
+/// </summary>
+public static class TypeManifest
+{{
+    public static readonly FrozenDictionary<string, {entry}> ByTag =
+        new Dictionary<string, {entry}>({len(listed)}, StringComparer.Ordinal)
+        {{
+{entries}
+        }}.ToFrozenDictionary(StringComparer.Ordinal);
+}}
+"""
+
+def _render_fallback_node_source(schema: NodeSchema, package_name: str) -> str:
+    """Generate C# class from BaseNode fields as fallback when metadata fails."""
+    namespace = _fallback_node_namespace(package_name)
+    members = _members(schema.properties)
+    formatter = _formatter_name(schema.properties)
     lines = [
         "using MessagePack;",
+        "using MessagePack.Formatters;",
+        "using System;",
         "using System.Collections.Generic;", 
         "using Nodetool.Types;",
         "",
         f"namespace {namespace};",
         "",
         "[MessagePackObject]",
-        f"public class {node_cls.__name__}",
+        f"[MessagePackFormatter(typeof({schema.name}.{formatter}))]",
+        f"public class {schema.name}",
         "{"
     ]
-    
-    index = 0
-    for name, field in sorted(node_cls.model_fields.items()):
-        if name.startswith("_"):  # Skip private fields
-            continue
-        prop_name = csharp_identifier(name)
-        default = default_value_to_csharp(field.default)
-        csharp_type = _make_nullable_if_null_default(python_type_to_csharp(field.annotation), default)
-        lines.append(f"    [Key({index})]")
-        if default is not None:
-            lines.append(f"    public {csharp_type} {prop_name} {{ get; set; }} = {default};")
-        else:
-            lines.append(f"    public {csharp_type} {prop_name} {{ get; set; }}")
-        index += 1
-    
+    lines.extend(_property_lines(members))
+    lines.append("")
+    lines.extend(_formatter_lines(schema.name, formatter, members))
     lines.append("}")
-    return "\n".join(lines) + "\n" 
\ No newline at end of file
+    return "\n".join(lines) + "\n"
+
+def type_formatters(schema: TypeSchema, namespace: str) -> List[Tuple[str, str]]:
+    """`(class, formatter)` C# names of the class `render_type_source` generates."""
+    name = f"{namespace}.{schema.name}"
+    return [(name, f"{name}.{_formatter_name(schema.fields)}")]
+
+def node_formatters(schema: NodeSchema, package_name: str) -> List[Tuple[str, str]]:
+    """`(class, formatter)` C# names of the classes `render_node_source` generates."""
+    if schema.outputs is None:
+        name = f"{_fallback_node_namespace(package_name)}.{schema.name}"
+        return [(name, f"{name}.{_formatter_name(schema.properties)}")]
+    name = f"{_node_namespace(package_name)}.{schema.name}"
+    return_class_name = f"{schema.name}Output"
+    formatters = [(name, f"{name}.{_formatter_name(schema.properties, (return_class_name, 'Process'))}")]
+    if len(schema.outputs) > 1:
+        output = f"{name}.{return_class_name}"
+        formatters.append((output, f"{output}.{_formatter_name(schema.outputs)}"))
+    return formatters
+
+def type_member_types(schema: TypeSchema) -> List[str]:
+    """C# types of the members of the class `render_type_source` generates."""
+    return [m.csharp_type for m in _members(schema.fields)]
+
+def node_member_types(schema: NodeSchema) -> List[str]:
+    """C# types of the members of the classes `render_node_source` generates."""
+    types = [m.csharp_type for m in _members(schema.properties)]
+    if schema.outputs is not None and len(schema.outputs) > 1:
+        types.extend(m.csharp_type for m in _members(schema.outputs, defaults=False))
+    return types
+
+# Generic collections members are generated as, and the formatters that read and write them.
+_COLLECTION_FORMATTERS = {
+    "List": "ListFormatter",
+    "Dictionary": "DictionaryFormatter",
+    "HashSet": "HashSetFormatter",
+}
+
+def _split_generic(csharp_type: str) -> Tuple[str, List[str]]:
+    """`Dictionary<string, List<int>>` -> `("Dictionary", ["string", "List<int>"])`."""
+    start = csharp_type.find("<")
+    if start < 0 or not csharp_type.endswith(">"):
+        return csharp_type, []
+    args, depth, begin = [], 0, start + 1
+    for i in range(begin, len(csharp_type) - 1):
+        c = csharp_type[i]
+        if c == "<":
+            depth += 1
+        elif c == ">":
+            depth -= 1
+        elif c == "," and depth == 0:
+            args.append(csharp_type[begin:i].strip())
+            begin = i + 1
+    args.append(csharp_type[begin:-1].strip())
+    return csharp_type[:start], args
+
+def _runtime_type(csharp_type: str) -> str:
+    """`csharp_type` without nullable reference annotations, which `typeof` does not take."""
+    name, args = _split_generic(csharp_type)
+    if args:
+        return f"{name}<{', '.join(_runtime_type(a) for a in args)}>"
+    if name.endswith("?") and name[:-1] not in _CSHARP_VALUE_TYPES:
+        return name[:-1]
+    return name
+
+def member_formatters(csharp_types: Iterable[str]) -> Dict[str, str]:
+    """
+    C# type -> formatter expression for the collections and `object` among
+    `csharp_types` and their type arguments. BuiltinResolver has the formatters
+    of primitives; these are the rest a member resolves through `options.Resolver`
+    besides generated classes, so no resolver needs to build them by reflection.
+    """
+    formatters: Dict[str, str] = {}
+    pending = [_runtime_type(t) for t in csharp_types]
+    while pending:
+        csharp_type = pending.pop()
+        if csharp_type in formatters:
+            continue
+        name, args = _split_generic(csharp_type)
+        if name in _COLLECTION_FORMATTERS and args:
+            formatters[csharp_type] = f"new {_COLLECTION_FORMATTERS[name]}<{', '.join(args)}>()"
+            pending.extend(args)
+        elif csharp_type == "object":
+            formatters[csharp_type] = "PrimitiveObjectFormatter.Instance"
+    return formatters
+
+# Live-class entry points. The `render_*` functions above only need schema
+# descriptions, so `describe` (and with it nodetool) is imported on demand.
+
+def generate_class_source(cls: type, namespace: str) -> str:
+    """Generate C# class source code for a BaseType subclass."""
+    from .describe import describe_type
+    return render_type_source(describe_type(cls), namespace)
+
+def generate_node_class_source(node_cls: type, package_name: str) -> str:
+    """Generate C# class source code for a BaseNode subclass."""
+    from .describe import describe_node
+    return render_node_source(describe_node(node_cls), package_name)
+
+def generate_fallback_node_class(node_cls: type, package_name: str) -> str:
+    """Generate C# class from BaseNode fields as fallback when metadata fails."""
+    from .describe import describe_node_fields
+    return _render_fallback_node_source(describe_node_fields(node_cls), package_name)
@@ -0,0 +1,93 @@
+"""
+State of one generation, for using the generator as a library.
+
+The command line runs one generation per process and writes it to an output
+directory. A `GeneratorContext` carries what a generation needs instead of
+module globals: where the descriptions come from (a `DiscoverySession`, a
+`GeneratorIR` or a `ServerSession`), the C# name map rendering resolves type
+references with, the namespace, the output sink and where progress messages
+go. `orchestrator.generate_sources` renders into a `MemoryOutput` and returns
+the files, so a long-running process can generate many times, from several
+threads at once, without touching the filesystem:
+
+    ir = load_ir("nodetool-ir.json")  # or DiscoverySession(...).to_ir()
+    files = generate_sources(ir)      # {"Types/Core/ImageRef.cs": "...", ...}
+
+Rendering from descriptions is re-entrant. Discovery is not: it imports
+modules into the process, so generations whose source still has to discover
+take turns (`DISCOVERY_LOCK`). Discover once and generate from the IR to run
+them concurrently. Progress messages of discovery go to the `log` of the
+context it runs in (see `progress`).
+"""
+import threading
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, Union
+
+from .ir import GeneratorIR
+from .object_members import PackageMembers
+from .output import MemoryOutput, OutputTree
+from .unions import plan as plan_tagged_unions
+from .utils import CSharpTypeMap, using_csharp_type_map
+
+if TYPE_CHECKING:
+    from .server import ServerSession
+    from .session import DiscoverySession
+
+# What the orchestrator renders from (see session.DiscoverySession for the interface).
+SchemaSource = Union["DiscoverySession", "ServerSession", GeneratorIR]
+
+# Held while a source that may still import modules is generated from.
+DISCOVERY_LOCK = threading.RLock()
+
+def quiet(message: str) -> None:
+    """A `log` that drops progress messages."""
+
+# Where `progress` sends messages: the `log` of the active context, else print.
+_LOG: ContextVar[Callable[[str], None]] = ContextVar("generator_log", default=print)
+
+def progress(message: str = "") -> None:
+    """Report a progress message of discovery to the active context's `log`."""
+    _LOG.get()(message)
+
+@contextmanager
+def logging_to(log: Callable[[str], None]) -> Iterator[None]:
+    """Send `progress` messages to `log` in this thread (context) within the block."""
+    token = _LOG.set(log)
+    try:
+        yield
+    finally:
+        _LOG.reset(token)
+
+@dataclass
+class GeneratorContext:
+    """
+    One generation: its description source, C# name map, namespace and output.
+
+    `type_map` is filled from the source once types are discovered (see
+    `load_type_names`), together with the bases of tagged unions, and is in
+    effect for `typeref_to_csharp` on this thread while the context is
+    `active`. `object_members` is filled after rendering (see
+    object_members.py). `type_map.stats` counts the memo hits of this
+    generation, and `log` receives the progress messages of its discovery.
+    """
+    source: SchemaSource
+    namespace: str = "Nodetool.Types"
+    output: Union[OutputTree, MemoryOutput] = field(default_factory=MemoryOutput)
+    render_jobs: int = 1
+    log: Callable[[str], None] = print
+    type_map: CSharpTypeMap = field(default_factory=CSharpTypeMap)
+    object_members: Dict[str, PackageMembers] = field(default_factory=dict)
+
+    def load_type_names(self) -> None:
+        """Take the C# name map from the source (discovers its types) and plan the tagged unions."""
+        names = self.source.csharp_type_names()
+        self.type_map.set(names, plan_tagged_unions(self.source.types(), names))
+
+    @contextmanager
+    def active(self) -> Iterator["GeneratorContext"]:
+        """Render with this context's name map and log; serialized if the source can still discover."""
+        lock = nullcontext() if isinstance(self.source, GeneratorIR) else DISCOVERY_LOCK
+        with lock, using_csharp_type_map(self.type_map), logging_to(self.log):
+            yield self
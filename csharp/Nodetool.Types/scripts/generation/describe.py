@@ -0,0 +1,210 @@
+"""
+Reduction of live BaseType/BaseNode classes to schema descriptions.
+
+This is the only place that inspects pydantic fields and `get_metadata()`;
+everything downstream works on the records in `schema.py`.
+"""
+import enum
+import types
+from typing import Annotated, Any, Dict, Iterable, Literal, Tuple, Union, get_args, get_origin
+
+try:
+    from nodetool.metadata.types import BaseType
+except ImportError:
+    class BaseType: pass
+
+from .context import progress
+from .schema import DefaultValue, FieldSchema, NodeSchema, TypeRef, TypeSchema, optional_ref, type_key
+from .utils import type_mapping_stats
+
+_PRIMITIVE_NAMES = {
+    str: "str",
+    int: "int",
+    float: "float",
+    bool: "bool",
+    bytes: "bytes",
+    type(None): "none",
+    object: "object",
+}
+
+_JSON_SCALARS = (str, int, float, bool, type(None))
+
+def _scalar_values(values: Iterable[Any]) -> Tuple[Any, ...]:
+    return tuple(v if isinstance(v, _JSON_SCALARS) else str(v) for v in values)
+
+def _describe_collection(tp: Any, origin: Any) -> TypeRef:
+    return TypeRef(origin.__name__, args=tuple(describe_annotation(a) for a in get_args(tp)))
+
+def _describe_union(tp: Any, origin: Any) -> TypeRef:
+    return TypeRef("union", args=tuple(describe_annotation(a) for a in get_args(tp)))
+
+def _describe_literal(tp: Any, origin: Any) -> TypeRef:
+    return TypeRef("literal", values=_scalar_values(get_args(tp)))
+
+def _describe_annotated(tp: Any, origin: Any) -> TypeRef:
+    # Annotated[T, ...] carries validation metadata only; the type is T.
+    return describe_annotation(get_args(tp)[0])
+
+_ORIGIN_DESCRIBERS = {
+    list: _describe_collection,
+    dict: _describe_collection,
+    set: _describe_collection,
+    tuple: _describe_collection,
+    Union: _describe_union,
+    types.UnionType: _describe_union,  # X | Y
+    Literal: _describe_literal,
+    Annotated: _describe_annotated,
+}
+
+def _describe_plain(tp: Any) -> TypeRef:
+    # typing.Any is a class since Python 3.11
+    if tp is Any:
+        return TypeRef("any")
+    if isinstance(tp, type):
+        if tp in _PRIMITIVE_NAMES:
+            return TypeRef("primitive", _PRIMITIVE_NAMES[tp])
+        try:
+            if issubclass(tp, BaseType):
+                return TypeRef("base_type", tp.__name__, tp.__module__)
+        except TypeError:
+            pass
+        if issubclass(tp, enum.Enum):
+            return TypeRef("enum", tp.__name__, tp.__module__, values=_scalar_values(m.value for m in tp))
+        return TypeRef("class", tp.__name__, getattr(tp, "__module__", ""))
+    if tp is Ellipsis:
+        return TypeRef("ellipsis")
+    return TypeRef("unknown", str(tp))
+
+def _mentions_plain_class(ref: TypeRef) -> bool:
+    return ref.kind == "class" or any(_mentions_plain_class(a) for a in ref.args)
+
+# id(annotation) -> (annotation, TypeRef). Holding the annotation keeps its id from
+# being reused. typing caches subscripted generics, so repeated annotations are
+# usually the same object.
+_ANNOTATION_CACHE: Dict[int, Tuple[Any, TypeRef]] = {}
+
+def forget_annotations() -> None:
+    """Empty the annotation memo, which keeps every annotation it has seen alive."""
+    _ANNOTATION_CACHE.clear()
+
+def describe_annotation(tp: Any) -> TypeRef:
+    """Reduce a Python type annotation to a TypeRef (memoized per annotation object)."""
+    entry = _ANNOTATION_CACHE.get(id(tp))
+    stats = type_mapping_stats()["annotations"]
+    if entry is not None and entry[0] is tp:
+        stats.hits += 1
+        return entry[1]
+    stats.misses += 1
+
+    origin = get_origin(tp)
+    if origin is None:
+        ref = _describe_plain(tp)
+    else:
+        describer = _ORIGIN_DESCRIBERS.get(origin)
+        ref = describer(tp, origin) if describer is not None else TypeRef("unknown", str(origin))
+    # Node classes get their __module__ replaced during discovery, so references
+    # to plain classes are described afresh each time.
+    if not _mentions_plain_class(ref):
+        _ANNOTATION_CACHE[id(tp)] = (tp, ref)
+    return ref
+
+# TypeMetadata kinds with their element types in `type_args`.
+_METADATA_CONTAINERS = {"list", "dict", "tuple"}
+
+def describe_type_metadata(meta: Any) -> TypeRef:
+    """
+    Reduce a nodetool `TypeMetadata` to a TypeRef.
+
+    `get_python_type()` only resolves the type's name: containers come back
+    without their element types, unions as bare `typing.Union`, optional
+    types without None, and enums fail. The structure is taken from the
+    metadata instead; only leaf names go through `get_python_type()`.
+    """
+    if not hasattr(meta, "type_args"):
+        return describe_annotation(meta.get_python_type())
+    name = meta.type
+    args = tuple(describe_type_metadata(a) for a in meta.type_args or ())
+    if name in _METADATA_CONTAINERS and args:
+        ref = TypeRef(name, args=args)
+    elif name == "union":
+        ref = TypeRef("union", args=args)
+    elif name == "enum":
+        module, _, enum_name = (meta.type_name or "").rpartition(".")
+        ref = TypeRef("enum", enum_name, module, values=_scalar_values(meta.values or ()))
+    else:
+        ref = describe_annotation(meta.get_python_type())
+    return optional_ref(ref) if meta.optional else ref
+
+def describe_default(value: Any) -> DefaultValue:
+    """Reduce a field default to a DefaultValue."""
+    if value is None:
+        return DefaultValue("none")
+    if isinstance(value, str):
+        return DefaultValue("str", str.__str__(value))
+    if isinstance(value, bool):
+        return DefaultValue("bool", bool(value))
+    if isinstance(value, int):
+        return DefaultValue("number", int(value))
+    if isinstance(value, float):
+        return DefaultValue("number", float(value))
+    if isinstance(value, list):
+        return DefaultValue("list")
+    if isinstance(value, dict):
+        return DefaultValue("dict")
+    if isinstance(value, BaseType):
+        return DefaultValue("base_type", type=describe_annotation(type(value)))
+    return DefaultValue("unset")
+
+def _base_type_key(cls: type) -> str:
+    """`type_key` of the closest BaseType subclass `cls` derives from, or "" for BaseType itself."""
+    for base in cls.__mro__[1:]:
+        if base is BaseType:
+            break
+        if isinstance(base, type) and issubclass(base, BaseType):
+            return type_key(base)
+    return ""
+
+def describe_type(cls: type[BaseType]) -> TypeSchema:
+    """Describe a BaseType subclass from its pydantic fields."""
+    fields = getattr(cls, 'model_fields', {})
+    return TypeSchema(
+        name=cls.__name__,
+        module=cls.__module__,
+        fields=[
+            FieldSchema(name, describe_annotation(f.annotation), describe_default(f.default))
+            for name, f in fields.items()
+        ],
+        base=_base_type_key(cls),
+    )
+
+def describe_node_fields(node_cls: type) -> NodeSchema:
+    """Describe a BaseNode subclass from its pydantic fields only."""
+    return NodeSchema(
+        name=node_cls.__name__,
+        module=node_cls.__module__,
+        properties=[
+            FieldSchema(name, describe_annotation(f.annotation), describe_default(f.default))
+            for name, f in node_cls.model_fields.items()
+            if not name.startswith("_")  # Skip private fields
+        ],
+    )
+
+def describe_node(node_cls: type) -> NodeSchema:
+    """Describe a BaseNode subclass from its metadata, falling back to its fields."""
+    try:
+        metadata = node_cls.get_metadata()
+        return NodeSchema(
+            name=node_cls.__name__,
+            module=node_cls.__module__,
+            properties=[
+                FieldSchema(p.name, describe_type_metadata(p.type), describe_default(p.default))
+                for p in metadata.properties
+            ],
+            outputs=[
+                FieldSchema(o.name, describe_type_metadata(o.type))
+                for o in metadata.outputs
+            ],
+        )
+    except Exception as e:
+        progress(f"Warning: Could not get metadata for {node_cls.__name__}: {e}")
+        return describe_node_fields(node_cls)
@@ -3,10 +3,20 @@ Discovery functions for finding BaseType and BaseNode subclasses.
 """
 import os
 import sys
+import io
+import functools
 import importlib
+import importlib.metadata
+import importlib.util
 import inspect
 import pkgutil
-from typing import Dict, List
+import multiprocessing
+import multiprocessing.connection
+import time
+import weakref
+from contextlib import contextmanager, redirect_stdout
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
 try:
     from nodetool.metadata.types import BaseType
@@ -18,279 +28,1134 @@ except ImportError:
     class BaseNode: pass
     def discover_node_packages(): return []
 
+from . import profiling
+from .context import logging_to, progress
 from .utils import get_package_name
+from .schema import NodeSchema, TypeSchema
+from .describe import describe_node, describe_type, forget_annotations
+from .static_scan import StaticIndex, qualified_name
+from .cache import CacheStats, MetadataCache
+from .stubs import HeavyImportStubs
+from .subclasses import SourceFinder, load_file, subclasses_by_module
+from .quarantine import Quarantine, QuarantinedModule
+from .package_metadata import (
+    MetadataUnavailable,
+    TypeNameResolver,
+    describe_package_nodes,
+    read_package_metadata,
+)
 
-def _discover_types_in_package_src(package_src: str) -> List[type[BaseType]]:
+@dataclass
+class DiscoveryOptions:
+    """
+    Run-wide discovery settings, shared by serial discovery and worker processes.
+
+    static: parse sources with `ast` first and import only the modules that
+        define BaseType/BaseNode subclasses (see `static_scan.StaticIndex`).
+    cache_path: SQLite file of the persistent per-module cache (see `cache.py`);
+        None disables the cache.
+    package_metadata: describe nodes from the package metadata JSON shipped
+        with a package instead of importing it, where available (see
+        `package_metadata.py`).
+    stub_packages: top-level packages to replace with stubs while modules are
+        imported (see `stubs.py`); empty disables stubbing.
+    subclass_scan: import a source's modules from their files, then find the
+        classes by walking the BaseType/BaseNode subclass registry instead of
+        sweeping each module's attributes (see `subclasses.py`). Cannot be
+        combined with `stub_packages`.
+    import_timeout: seconds one module may take to import; if set, discovery
+        runs in worker interpreters (as with `--jobs`) and a module over the
+        budget is quarantined and skipped (see `quarantine.py`).
+    quarantine_path: JSON file of quarantined modules, which are skipped;
+        None disables the quarantine.
+    retry_quarantined: import quarantined modules anyway.
+    """
+    static: bool = False
+    cache_path: Optional[str] = None
+    package_metadata: bool = False
+    stub_packages: Tuple[str, ...] = ()
+    subclass_scan: bool = False
+    import_timeout: Optional[float] = None
+    quarantine_path: Optional[str] = None
+    retry_quarantined: bool = False
+    _scanner: Optional["ModuleScanner"] = field(default=None, init=False, repr=False, compare=False)
+
+    def scanner(self) -> "ModuleScanner":
+        """The scanner for this process, created on first use and shared across passes."""
+        if self._scanner is None:
+            self._scanner = ModuleScanner(self)
+        return self._scanner
+
+    def __getstate__(self):
+        # Scanners hold parsed sources and a database connection; workers build their own.
+        state = dict(self.__dict__)
+        state["_scanner"] = None
+        return state
+
+class ModuleScanner:
+    """
+    Turns one source module into schema descriptions.
+
+    Applies the optional static pre-filter and the persistent cache before
+    falling back to importing the module (with heavy dependencies stubbed, if
+    enabled) and inspecting its classes.
+    """
+
+    def __init__(self, options: DiscoveryOptions):
+        self.index = StaticIndex() if options.static else None
+        self.cache = MetadataCache(options.cache_path, self.index) if options.cache_path else None
+        self.stubs = HeavyImportStubs(options.stub_packages) if options.stub_packages else None
+        self.finder: Optional[SourceFinder] = None
+        if options.subclass_scan:
+            if self.stubs is not None:
+                raise ValueError("subclass scanning cannot be combined with stubbed imports")
+            self.finder = SourceFinder()
+            self.finder.install()
+        self.quarantine = Quarantine(options.quarantine_path) if options.quarantine_path else None
+        self.retry_quarantined = options.retry_quarantined
+        # Modules to skip in this run besides the quarantined ones, and the ones skipped.
+        self.skip: Set[str] = set()
+        self.skipped: Dict[str, None] = {}
+        # Called with a module's name and path before it is imported and with (None, None) after.
+        self.on_import: Optional[Callable[[Optional[str], Optional[str]], None]] = None
+        # Weak, so that released node modules (see `release_modules`) can be freed.
+        self._node_sources: "weakref.WeakKeyDictionary[type, str]" = weakref.WeakKeyDictionary()
+
+    @contextmanager
+    def import_root(self, root: str) -> Iterator[None]:
+        """
+        Make the modules under `root` importable while discovering them: on
+        `sys.path` for the duration, or (subclass scan) through the finder,
+        which keeps the root for the rest of the run.
+        """
+        if self.finder is not None:
+            self.finder.add_root(root)
+            for index in (self.index, self.cache.index if self.cache is not None else None):
+                if index is not None:
+                    index.add_root(root)
+            yield
+            return
+        sys.path.insert(0, root)
+        try:
+            yield
+        finally:
+            if root in sys.path:
+                sys.path.remove(root)
+
+    def _skips(self, module_name: str, module_path: str) -> bool:
+        """Whether to leave out a module: skipped for this run or quarantined."""
+        if module_name in self.skip or (
+            self.quarantine is not None
+            and not self.retry_quarantined
+            and self.quarantine.entry(module_name, module_path) is not None
+        ):
+            self.skipped[module_name] = None
+            return True
+        return False
+
+    def _load(self, module_name: str, describe, module_path: Optional[str] = None):
+        """Import `module_name` and return `describe(module)` (measured when profiling)."""
+        on_import = self.on_import
+        if on_import is not None:
+            on_import(module_name, module_path)
+        try:
+            profiler = profiling.active()
+            if profiler is not None:
+                return profiler.load(module_name, lambda describe: self._import(module_name, describe, module_path), describe)
+            return self._import(module_name, describe, module_path)
+        finally:
+            if on_import is not None:
+                on_import(None, None)
+
+    def _import(self, module_name: str, describe, module_path: Optional[str] = None):
+        if self.finder is not None and module_path is not None:
+            return describe(load_file(module_name, module_path))
+        if self.stubs is None:
+            return describe(importlib.import_module(module_name))
+        return self.stubs.load(module_name, describe)
+
+    def _cache_key(self, module_name: str, module_path: str, kind: str, version: str) -> Optional[Tuple[str, str, str]]:
+        if self.cache is None:
+            return None
+        if self.stubs is not None:
+            # Stubs can change defaults that reference the stubbed packages.
+            kind += ":stubbed"
+        if self.finder is not None and kind.startswith("nodes"):
+            # The attribute sweep also finds node classes a module only imports.
+            kind += ":subclasses"
+        return module_path, kind, self.cache.digest(module_name, module_path, version)
+
+    def _cached(self, module_name: str, module_path: str, kind: str, version: str, compute):
+        key = self._cache_key(module_name, module_path, kind, version)
+        if key is None:
+            return compute()
+        value = self.cache.get(*key)
+        if value is None:
+            value = compute()
+            if value is not None:
+                self.cache.put(*key, value)
+        return value
+
+    def type_schemas(self, module_name: str, module_path: str, version: str = "") -> List[TypeSchema]:
+        """Describe the BaseType subclasses defined in one module ([] if it cannot be imported)."""
+        if self._skips(module_name, module_path):
+            return []
+        if self.index is not None and not self.index.defines_subclass(module_name, module_path, [qualified_name(BaseType)]):
+            return []
+
+        def describe_module(module):
+            return [describe_type(cls) for cls in _types_defined_in(module)]
+
+        def compute():
+            try:
+                return self._load(module_name, describe_module, module_path)
+            except Exception:
+                return None
+
+        return self._cached(module_name, module_path, "types", version, compute) or []
+
+    def node_schemas(
+        self,
+        module_name: str,
+        module_path: str,
+        version: str = "",
+        indent: str = "    ",
+        package_name: Optional[str] = None,
+    ) -> List[NodeSchema]:
+        """
+        Describe the visible BaseNode subclasses defined in one module.
+
+        When `package_name` is given, each node's `__module__` is overwritten with
+        it (used for workspace packages).
+        """
+        if self._skips(module_name, module_path):
+            return []
+        if self.index is not None and not self.index.defines_subclass(module_name, module_path, [qualified_name(BaseNode)]):
+            return []
+
+        def describe_module(module):
+            return self._describe_nodes(
+                [obj for _, obj in inspect.getmembers(module, inspect.isclass)], indent, package_name,
+            )
+
+        def compute():
+            try:
+                return self._load(module_name, describe_module, module_path)
+            except Exception as e:
+                progress(f"{indent}[ERROR] Could not import {module_name}: {e}")
+                return None
+
+        schemas = self._cached(module_name, module_path, _nodes_kind(package_name), version, compute) or []
+        if schemas:
+            progress(f"{indent}[OK] {module_name}: {len(schemas)} BaseNode subclasses")
+        return schemas
+
+    def _describe_nodes(self, classes: List[type], indent: str, package_name: Optional[str]) -> List[NodeSchema]:
+        """Describe the visible BaseNode subclasses among `classes`."""
+        nodes = []
+        for obj in classes:
+            try:
+                if (inspect.isclass(obj) and
+                    issubclass(obj, BaseNode) and obj is not BaseNode and
+                    hasattr(obj, 'is_visible') and obj.is_visible()):
+                    # Remember the defining module before it is overwritten below.
+                    self._node_sources.setdefault(obj, obj.__module__)
+                    if package_name is not None:
+                        # Set the package name directly from the discovery process
+                        obj.__module__ = package_name
+                    nodes.append(obj)
+            except Exception as e:
+                if package_name is not None:
+                    progress(f"{indent}[ERROR] Could not process class: {e}")
+                continue
+        schemas = [describe_node(node_cls) for node_cls in nodes]
+        for node_cls, schema in zip(nodes, schemas):
+            schema.source = self._node_sources[node_cls]
+        return schemas
+
+    def scan_types(self, modules: Iterable[Tuple[str, str]], version: str = "") -> List[TypeSchema]:
+        """`type_schemas` of every `(module name, path)` in `modules`."""
+        if self.finder is None:
+            return [t for module_name, module_path in modules for t in self.type_schemas(module_name, module_path, version)]
+        found = self._scan_subclasses(
+            BaseType,
+            modules,
+            "types",
+            version,
+            lambda classes: [describe_type(cls) for cls in classes],
+            lambda module_name, e: None,
+        )
+        return [t for schemas in found.values() for t in schemas]
+
+    def scan_nodes(
+        self,
+        modules: Iterable[Tuple[str, str]],
+        version: str = "",
+        indent: str = "    ",
+        package_name: Optional[str] = None,
+    ) -> List[NodeSchema]:
+        """`node_schemas` of every `(module name, path)` in `modules`."""
+        if self.finder is None:
+            return [
+                n for module_name, module_path in modules
+                for n in self.node_schemas(module_name, module_path, version, indent, package_name)
+            ]
+
+        def failed(module_name: str, e: Exception) -> None:
+            progress(f"{indent}[ERROR] Could not import {module_name}: {e}")
+
+        found = self._scan_subclasses(
+            BaseNode,
+            modules,
+            _nodes_kind(package_name),
+            version,
+            lambda classes: self._describe_nodes(classes, indent, package_name),
+            failed,
+        )
+        nodes: List[NodeSchema] = []
+        for module_name, schemas in found.items():
+            if schemas:
+                progress(f"{indent}[OK] {module_name}: {len(schemas)} BaseNode subclasses")
+            nodes.extend(schemas)
+        return nodes
+
+    def _scan_subclasses(self, base: type, modules, kind: str, version: str, describe, failed) -> Dict[str, list]:
+        """
+        Schemas of each module in `modules`, in order: from the cache where
+        possible; the rest are all imported and then described from one walk
+        over the subclasses of `base`.
+        """
+        found: Dict[str, list] = {}
+        keys: Dict[str, Optional[Tuple[str, str, str]]] = {}
+        for module_name, module_path in modules:
+            if self._skips(module_name, module_path) or (
+                self.index is not None
+                and not self.index.defines_subclass(module_name, module_path, [qualified_name(base)])
+            ):
+                found[module_name] = []
+                continue
+            key = self._cache_key(module_name, module_path, kind, version)
+            cached = self.cache.get(*key) if key is not None else None
+            if cached is not None:
+                found[module_name] = cached
+                continue
+            try:
+                self._load(module_name, lambda module: module, module_path)
+            except Exception as e:
+                failed(module_name, e)
+                found[module_name] = []
+                continue
+            found[module_name] = None
+            keys[module_name] = key
+
+        if keys:
+            by_module = subclasses_by_module(base, keys, lambda cls: self._node_sources.get(cls, cls.__module__))
+            for module_name, key in keys.items():
+                try:
+                    schemas = describe(by_module.get(module_name, []))
+                except Exception as e:
+                    failed(module_name, e)
+                    found[module_name] = []
+                    continue
+                found[module_name] = schemas
+                if key is not None:
+                    self.cache.put(*key, schemas)
+        return found
+
+    def report(self) -> None:
+        if self.skipped:
+            progress(f"Skipped {len(self.skipped)} quarantined modules: {', '.join(self.skipped)}")
+        if self.index is not None:
+            progress(f"Static scan: parsed {self.index.parsed} modules, skipped importing {self.index.skipped}")
+        if self.stubs is not None:
+            self.stubs.report()
+
+def _nodes_kind(package_name: Optional[str]) -> str:
+    return f"nodes:{package_name}" if package_name else "nodes"
+
+# Directory holding the `nodetool-*` checkouts; by default the one containing nodetool-sdk.
+WORKSPACE_ROOT_ENV = "NODETOOL_WORKSPACE_ROOT"
+
+def _workspace_root() -> str:
+    if os.environ.get(WORKSPACE_ROOT_ENV):
+        return os.path.abspath(os.environ[WORKSPACE_ROOT_ENV])
+    return os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "..", ".."))
+
+@dataclass
+class WorkspacePackage:
+    """A `nodetool-*` checkout next to the SDK in the workspace."""
+    dir_name: str  # e.g. 'nodetool-huggingface'
+    path: str
+    name: str  # e.g. 'Huggingface'
+    version: str = ""
+
+    @property
+    def src(self) -> Optional[str]:
+        src = os.path.join(self.path, "src")
+        return src if os.path.exists(src) else None
+
+    @property
+    def nodes_path(self) -> Optional[str]:
+        src = self.src
+        nodes_path = os.path.join(src, "nodetool", "nodes") if src else None
+        return nodes_path if nodes_path and os.path.exists(nodes_path) else None
+
+@dataclass
+class PackageIndex:
+    """
+    The packages known to a run: the registry's installed packages and the
+    workspace checkouts. Built once per run and shared by every discovery pass.
+
+    Errors are kept rather than raised so that each pass reports them where it
+    always has.
+    """
+    registry: List = field(default_factory=list)
+    workspace: List[WorkspacePackage] = field(default_factory=list)
+    workspace_root: str = ""
+    registry_error: Optional[str] = None
+    workspace_error: Optional[str] = None
+
+    @classmethod
+    def build(cls) -> "PackageIndex":
+        with profiling.phase("package index"):
+            index = cls(workspace_root=_workspace_root())
+            try:
+                index.registry = list(discover_node_packages())
+            except Exception as e:
+                index.registry_error = str(e)
+            try:
+                for item in os.listdir(index.workspace_root):
+                    path = os.path.join(index.workspace_root, item)
+                    if item.startswith("nodetool-") and os.path.isdir(path):
+                        index.workspace.append(WorkspacePackage(
+                            item, path, get_package_name(item), _package_version(project_dir=path),
+                        ))
+            except Exception as e:
+                index.workspace_error = str(e)
+        return index
+
+    def package_names(self) -> List[str]:
+        """Pretty names of every known package, Core included, sorted."""
+        names = {"Core"}
+        names.update(get_package_name(p.name) for p in self.registry)
+        names.update(p.name for p in self.workspace)
+        return sorted(names)
+
+    def owns_nodes(self, nodes_path: str) -> bool:
+        """Whether `nodes_path` is the nodes directory of a workspace package (e.g. one installed editable)."""
+        nodes_path = os.path.realpath(nodes_path)
+        return any(
+            p.nodes_path is not None and os.path.realpath(p.nodes_path) == nodes_path
+            for p in self.workspace
+        )
+
+def _package_version(dist_name: Optional[str] = None, project_dir: Optional[str] = None) -> str:
+    """Best-effort version of an installed distribution or a source checkout's pyproject.toml."""
+    if project_dir:
+        try:
+            with open(os.path.join(project_dir, "pyproject.toml"), encoding="utf-8") as f:
+                for line in f:
+                    key, sep, value = line.partition("=")
+                    if sep and key.strip() == "version":
+                        return value.strip().strip('"\'')
+        except OSError:
+            pass
+    if dist_name:
+        try:
+            return importlib.metadata.version(dist_name)
+        except Exception:
+            pass
+    return ""
+
+def _iter_modules(package_dir: str, import_root: str):
+    """Yield (dotted module name, file path) for the `.py` files under `package_dir`."""
+    for root, _, files in os.walk(package_dir):
+        for file in files:
+            if not (file.endswith(".py") and not file.startswith("__")):
+                continue
+            module_path = os.path.join(root, file)
+            module_name = os.path.relpath(module_path, import_root)
+            yield module_name.replace(os.sep, ".")[:-3], module_path  # strip .py
+
+def _types_defined_in(module) -> List[type[BaseType]]:
+    """Return the BaseType subclasses defined (not just imported) in `module`."""
+    types: List[type[BaseType]] = []
+    for _, obj in inspect.getmembers(module, inspect.isclass):
+        try:
+            if (
+                inspect.isclass(obj)
+                and issubclass(obj, BaseType)
+                and obj is not BaseType
+                and obj.__module__ == module.__name__
+            ):
+                types.append(obj)
+        except Exception:
+            continue
+    return types
+
+def _discover_types_in_package_src(package_src: str, scanner: ModuleScanner, version: str = "") -> List[TypeSchema]:
     """
     Discover BaseType subclasses defined in a given package's src tree.
 
     We avoid scanning the entire `nodetool` namespace package (which can span many repos)
     by walking Python files under `package_src/nodetool` and importing them directly.
     """
-    types: List[type[BaseType]] = []
+    types: List[TypeSchema] = []
     nodetool_dir = os.path.join(package_src, "nodetool")
     if not os.path.exists(nodetool_dir):
         return types
 
-    sys.path.insert(0, package_src)
-    try:
-        for root, _, files in os.walk(nodetool_dir):
-            for file in files:
-                if not (file.endswith(".py") and not file.startswith("__")):
-                    continue
-                module_path = os.path.join(root, file)
-                module_name = os.path.relpath(module_path, package_src)
-                module_name = module_name.replace(os.sep, ".")[:-3]  # strip .py
-                try:
-                    module = importlib.import_module(module_name)
-                except Exception:
-                    continue
-
-                for _, obj in inspect.getmembers(module, inspect.isclass):
-                    try:
-                        if (
-                            inspect.isclass(obj)
-                            and issubclass(obj, BaseType)
-                            and obj is not BaseType
-                            and obj.__module__ == module.__name__
-                        ):
-                            types.append(obj)
-                    except Exception:
-                        continue
-    finally:
-        if package_src in sys.path:
-            sys.path.remove(package_src)
+    with scanner.import_root(package_src):
+        types.extend(scanner.scan_types(_iter_modules(nodetool_dir, package_src), version))
 
     # Deduplicate by (module, class) to be safe
-    unique = {(t.__module__, t.__name__): t for t in types}
+    unique = {(t.module, t.name): t for t in types}
     return [unique[k] for k in sorted(unique.keys(), key=lambda x: (x[0], x[1]))]
 
-def discover_all_base_types() -> Dict[str, List[type[BaseType]]]:
-    """Discover all BaseType subclasses from nodetool-core and all packages."""
-    all_types = {}
-    
-    # 1. Discover types from nodetool-core (only)
-    print(">>> Discovering types...")
-    core_types: List[type[BaseType]] = []
+def _discover_types_in_installed_package(package_name: str, scanner: ModuleScanner, version: str = "") -> List[TypeSchema]:
+    """Discover BaseType subclasses by walking an installed `nodetool.<package>` module."""
+    package_types: List[TypeSchema] = []
+    try:
+        package_module_name = f"nodetool.{package_name.replace('-', '_')}"
+        if scanner.index is not None:
+            # Locate the package on disk without executing it.
+            spec = importlib.util.find_spec(package_module_name)
+            if spec is None or not spec.submodule_search_locations:
+                return package_types
+            for package_dir in spec.submodule_search_locations:
+                import_root = os.path.dirname(os.path.dirname(package_dir))
+                package_types.extend(scanner.scan_types(_iter_modules(package_dir, import_root), version))
+            return package_types
+
+        package_module = importlib.import_module(package_module_name)
+        package_dir = os.path.abspath(os.path.dirname(package_module.__file__))
+        modules = []
+        for _, module_name, _ in pkgutil.walk_packages(package_module.__path__, package_module.__name__ + "."):
+            spec = importlib.util.find_spec(module_name)
+            mod_file = spec.origin if spec is not None else None
+            if not mod_file or not os.path.isfile(mod_file):
+                continue
+            # Filter to modules that live under this package's module path
+            if not os.path.abspath(mod_file).startswith(package_dir):
+                continue
+            modules.append((module_name, mod_file))
+        package_types.extend(scanner.scan_types(modules, version))
+    except Exception:
+        pass
+    return package_types
+
+def _core_src() -> Optional[str]:
+    """Return the src directory of nodetool-core, or None if it is not importable."""
     try:
         # Use the location of nodetool.metadata.types as the anchor for core.
         import nodetool.metadata.types as core_types_module
-        core_nodetool_dir = os.path.dirname(os.path.dirname(core_types_module.__file__))  # .../nodetool
-        core_src = os.path.dirname(core_nodetool_dir)  # .../src
-        core_types = _discover_types_in_package_src(core_src)
     except ImportError:
-        print("[WARNING] nodetool-core not found. Skipping core type discovery.")
+        return None
+    core_nodetool_dir = os.path.dirname(os.path.dirname(core_types_module.__file__))  # .../nodetool
+    return os.path.dirname(core_nodetool_dir)  # .../src
+
+def discover_all_base_types(
+    options: Optional[DiscoveryOptions] = None,
+    index: Optional[PackageIndex] = None,
+) -> Dict[str, List[TypeSchema]]:
+    """Discover and describe all BaseType subclasses from nodetool-core and all packages."""
+    options = options or DiscoveryOptions()
+    index = index or PackageIndex.build()
+    scanner = options.scanner()
+    all_types = {}
+    
+    # 1. Discover types from nodetool-core (only)
+    progress(">>> Discovering types...")
+    core_types: List[TypeSchema] = []
+    core_src = _core_src()
+    if core_src is not None:
+        core_types = _discover_types_in_package_src(core_src, scanner, _package_version("nodetool-core"))
+    else:
+        progress("[WARNING] nodetool-core not found. Skipping core type discovery.")
 
     # Remove duplicates and sort
-    unique_core = {c.__name__: c for c in core_types}
+    unique_core = {c.name: c for c in core_types}
     all_types["Core"] = [unique_core[n] for n in sorted(unique_core.keys())]
-    print(f"Found {len(all_types['Core'])} types from Core")
+    progress(f"Found {len(all_types['Core'])} types from Core")
     
     # 2. Discover types from installed packages (registry)
     try:
-        packages = discover_node_packages()
-        for package in packages:
-            package_types: List[type[BaseType]] = []
+        if index.registry_error is not None:
+            raise RuntimeError(index.registry_error)
+        for package in index.registry:
+            package_types: List[TypeSchema] = []
             package_name = get_package_name(package.name)
             
             if package.source_folder and os.path.exists(package.source_folder):
                 # Package has source folder (development install)
                 package_src = os.path.join(package.source_folder, "src")
                 if os.path.exists(package_src):
-                    package_types = _discover_types_in_package_src(package_src)
+                    version = _package_version(package.name, package.source_folder)
+                    package_types = _discover_types_in_package_src(package_src, scanner, version)
             else:
                 # Package is installed in environment
-                try:
-                    package_module_name = f"nodetool.{package.name.replace('-', '_')}"
-                    package_module = importlib.import_module(package_module_name)
-                    for _, module_name, _ in pkgutil.walk_packages(package_module.__path__, package_module.__name__ + "."):
-                        try:
-                            module = importlib.import_module(module_name)
-                        except Exception:
-                            continue
-                        mod_file = getattr(module, "__file__", None)
-                        if not mod_file:
-                            continue
-                        # Filter to modules that live under this package's module path
-                        if not os.path.abspath(mod_file).startswith(os.path.abspath(os.path.dirname(package_module.__file__))):
-                            continue
-                        for _, obj in inspect.getmembers(module, inspect.isclass):
-                            try:
-                                if (
-                                    inspect.isclass(obj)
-                                    and issubclass(obj, BaseType)
-                                    and obj is not BaseType
-                                    and obj.__module__ == module.__name__
-                                ):
-                                    package_types.append(obj)
-                            except Exception:
-                                continue
-                except Exception:
-                    pass
+                version = _package_version(package.name)
+                package_types = _discover_types_in_installed_package(package.name, scanner, version)
             
             # Remove duplicates and sort
-            unique_package = {c.__name__: c for c in package_types}
+            unique_package = {c.name: c for c in package_types}
             if unique_package:
                 all_types[package_name] = [unique_package[n] for n in sorted(unique_package.keys())]
-                print(f"Found {len(all_types[package_name])} types from {package_name}")
+                progress(f"Found {len(all_types[package_name])} types from {package_name}")
                         
     except Exception as e:
-        print(f"[ERROR] Error discovering packages: {e}")
+        progress(f"[ERROR] Error discovering packages: {e}")
     
     # 3. Discover types from local workspace repos (best-effort, even if not installed)
     try:
-        workspace_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "..", ".."))
-        for item in os.listdir(workspace_root):
-            if not (item.startswith("nodetool-") and os.path.isdir(os.path.join(workspace_root, item))):
-                continue
-            pkg_src = os.path.join(workspace_root, item, "src")
-            if not os.path.exists(pkg_src):
+        if index.workspace_error is not None:
+            raise RuntimeError(index.workspace_error)
+        for workspace_package in index.workspace:
+            pkg_src = workspace_package.src
+            if pkg_src is None:
                 continue
-            pkg_name = get_package_name(item)
+            pkg_name = workspace_package.name
             # Don't re-scan if registry already found it
             if pkg_name in all_types:
                 continue
-            pkg_types = _discover_types_in_package_src(pkg_src)
+            pkg_types = _discover_types_in_package_src(pkg_src, scanner, workspace_package.version)
             if pkg_types:
-                unique_pkg = {c.__name__: c for c in pkg_types}
+                unique_pkg = {c.name: c for c in pkg_types}
                 all_types[pkg_name] = [unique_pkg[n] for n in sorted(unique_pkg.keys())]
-                print(f"Found {len(all_types[pkg_name])} types from {pkg_name} (workspace)")
+                progress(f"Found {len(all_types[pkg_name])} types from {pkg_name} (workspace)")
     except Exception as e:
-        print(f"[WARNING] Workspace type discovery skipped: {e}")
+        progress(f"[WARNING] Workspace type discovery skipped: {e}")
 
+    scanner.report()
     return all_types
 
-def discover_all_base_nodes() -> Dict[str, List[type[BaseNode]]]:
-    """Discover all BaseNode subclasses from nodetool-core and all packages."""
-    all_nodes = {}
+def _discover_nodes_in_dir(
+    nodes_path: str,
+    import_root: str,
+    scanner: ModuleScanner,
+    version: str = "",
+    indent: str = "    ",
+    package_name: Optional[str] = None,
+) -> List[NodeSchema]:
+    """
+    Import every module under `nodes_path` and describe visible BaseNode subclasses.
+
+    `import_root` must already be importable (see `ModuleScanner.import_root`).
+    """
+    return scanner.scan_nodes(_iter_modules(nodes_path, import_root), version, indent, package_name)
+
+def _discover_nodes_in_root(
+    nodes_path: str,
+    import_root: str,
+    scanner: ModuleScanner,
+    version: str = "",
+    indent: str = "    ",
+    package_name: Optional[str] = None,
+    resolver: Optional[TypeNameResolver] = None,
+) -> List[NodeSchema]:
+    """
+    Describe the nodes under `nodes_path`, from package metadata when `resolver`
+    is given and usable metadata exists, otherwise by importing the modules.
+    """
+    if resolver is not None:
+        try:
+            packages = read_package_metadata(nodes_path, import_root)
+        except MetadataUnavailable as e:
+            progress(f"{indent}[WARNING] Not using package metadata for {nodes_path}: {e}")
+            packages = []
+        if packages:
+            return describe_package_nodes(packages, nodes_path, resolver, indent, package_name)
+    return _discover_nodes_in_dir(nodes_path, import_root, scanner, version, indent, package_name)
+
+def _nodetool_paths() -> List[str]:
+    import nodetool
+
+    # Handle namespace package - nodetool has multiple paths
+    return nodetool.__path__._path if hasattr(nodetool.__path__, '_path') else [nodetool.__path__]
+
+def release_modules(module_names: Iterable[str], keep: Set[str] = frozenset()) -> int:
+    """
+    Drop imported modules (except `keep`) so that they can be freed; returns how many.
+
+    Also removes each module from its parent package's attributes, which would
+    otherwise keep it alive, and empties the annotation memo, which would keep
+    their annotations alive. Whatever imports one of them later imports it again.
+    """
+    released = 0
+    for name in module_names:
+        if name in keep or sys.modules.pop(name, None) is None:
+            continue
+        released += 1
+        parent_name, _, child = name.rpartition(".")
+        parent = sys.modules.get(parent_name)
+        if parent is not None and inspect.ismodule(getattr(parent, child, None)):
+            delattr(parent, child)
+    if released:
+        forget_annotations()
+    return released
+
+def _modules_in(nodes_path: str, import_root: str) -> List[str]:
+    return [module_name for module_name, _ in _iter_modules(nodes_path, import_root)]
+
+def discover_all_base_nodes(
+    options: Optional[DiscoveryOptions] = None,
+    index: Optional[PackageIndex] = None,
+    all_types: Optional[Dict[str, List[TypeSchema]]] = None,
+) -> Dict[str, List[NodeSchema]]:
+    """
+    Discover and describe all BaseNode subclasses from nodetool-core and all packages.
+
+    `all_types` is needed to resolve type names when `options.package_metadata` is set.
+    """
+    return dict(iter_base_nodes(options, index, all_types))
+
+def iter_base_nodes(
+    options: Optional[DiscoveryOptions] = None,
+    index: Optional[PackageIndex] = None,
+    all_types: Optional[Dict[str, List[TypeSchema]]] = None,
+    release: bool = False,
+) -> Iterator[Tuple[str, List[NodeSchema]]]:
+    """
+    Discover the nodes of one source at a time, yielding `(source_name, nodes)`:
+    Core (nodetool-core and the installed packages) first, then each workspace package.
+    The nodes directory of a workspace package installed editable is listed under
+    that package only, never under Core as well.
+
+    With `release`, the node modules of a source are dropped from `sys.modules`
+    (see `release_modules`) once the caller asks for the next source, so only
+    one source's node classes need to be alive at a time. Modules defining
+    types in `all_types` are kept, and so are Core node directories inside a
+    workspace package, which that package imports again.
+    """
+    options = options or DiscoveryOptions()
+    index = index or PackageIndex.build()
+    resolver = TypeNameResolver(all_types) if options.package_metadata and all_types is not None else None
+    scanner = options.scanner()
+    core_version = _package_version("nodetool-core")
+    keep = {t.module for types in (all_types or {}).values() for t in types}
+    workspace_paths = [os.path.abspath(p.path) + os.sep for p in index.workspace]
     
     # 1. Discover nodes from nodetool-core
-    print(">>> Discovering nodes from nodetool-core...")
+    progress(">>> Discovering nodes from nodetool-core...")
     core_nodes = []
+    core_modules: List[str] = []
     try:
-        import nodetool
-        
-        # Handle namespace package - nodetool has multiple paths
-        nodetool_paths = nodetool.__path__._path if hasattr(nodetool.__path__, '_path') else [nodetool.__path__]
-        print(f"  Looking in nodetool paths: {nodetool_paths}")
+        nodetool_paths = _nodetool_paths()
+        progress(f"  Looking in nodetool paths: {nodetool_paths}")
         
         for base_path in nodetool_paths:
             nodes_path = os.path.join(base_path, "nodes")
             if os.path.exists(nodes_path):
-                print(f"  Found nodes directory: {nodes_path}")
-                
-                # Add base path to Python path
-                sys.path.insert(0, os.path.dirname(base_path))
+                if index.owns_nodes(nodes_path):
+                    progress(f"  Skipping nodes directory of a workspace package: {nodes_path}")
+                    continue
+                progress(f"  Found nodes directory: {nodes_path}")
                 
                 # Walk through all Python files in the nodes directory and its subdirectories
-                for root, _, files in os.walk(nodes_path):
-                    for file in files:
-                        if file.endswith(".py") and not file.startswith("__"):
-                            module_path = os.path.join(root, file)
-                            # Get relative path from base directory
-                            module_name = os.path.relpath(module_path, os.path.dirname(base_path))
-                            module_name = module_name.replace(os.sep, ".")[:-3]  # Remove .py extension
-                            
-                            try:
-                                module = importlib.import_module(module_name)
-                                class_count = 0
-                                for _, obj in inspect.getmembers(module, inspect.isclass):
-                                    try:
-                                        if (inspect.isclass(obj) and
-                                            issubclass(obj, BaseNode) and obj is not BaseNode and
-                                            hasattr(obj, 'is_visible') and obj.is_visible()):
-                                            core_nodes.append(obj)
-                                            class_count += 1
-                                    except Exception:
-                                        continue
-                                if class_count > 0:
-                                    print(f"    [OK] {module_name}: {class_count} BaseNode subclasses")
-                            except Exception as e:
-                                print(f"    [ERROR] Could not import {module_name}: {e}")
-                                continue
-                
-                # Remove base path from Python path
-                if os.path.dirname(base_path) in sys.path:
-                    sys.path.remove(os.path.dirname(base_path))
+                with scanner.import_root(os.path.dirname(base_path)):
+                    core_nodes.extend(_discover_nodes_in_root(
+                        nodes_path, os.path.dirname(base_path), scanner, core_version, resolver=resolver,
+                    ))
+                if release and not any(os.path.abspath(nodes_path).startswith(p) for p in workspace_paths):
+                    core_modules.extend(_modules_in(nodes_path, os.path.dirname(base_path)))
     except ImportError:
-        print("[WARNING] nodetool-core not found. Skipping core node discovery.")
+        progress("[WARNING] nodetool-core not found. Skipping core node discovery.")
 
     # Remove duplicates and sort
-    unique_core = {c.__name__: c for c in core_nodes}
-    all_nodes["Core"] = [unique_core[n] for n in sorted(unique_core.keys())]
-    print(f"Found {len(all_nodes['Core'])} unique nodes from nodetool-core")
+    unique_core = {c.name: c for c in core_nodes}
+    core_nodes = [unique_core[n] for n in sorted(unique_core.keys())]
+    progress(f"Found {len(core_nodes)} unique nodes from nodetool-core")
+    yield "Core", core_nodes
+    release_modules(core_modules, keep)
     
     # 2. Discover nodes from development packages in workspace
-    print(">>> Discovering nodes from development packages...")
+    progress(">>> Discovering nodes from development packages...")
     try:
         # Look for development packages in the workspace
-        workspace_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "..", ".."))
-        print(f"  Looking for development packages in workspace: {workspace_root}")
+        progress(f"  Looking for development packages in workspace: {index.workspace_root}")
+        if index.workspace_error is not None:
+            raise RuntimeError(index.workspace_error)
         
-        for item in os.listdir(workspace_root):
-            if item.startswith("nodetool-") and os.path.isdir(os.path.join(workspace_root, item)):
-                package_path = os.path.join(workspace_root, item)
-                package_src = os.path.join(package_path, "src")
-                nodes_path = os.path.join(package_src, "nodetool", "nodes")
+        for workspace_package in index.workspace:
+            item = workspace_package.dir_name
+            package_path = workspace_package.path
+            nodes_path = workspace_package.nodes_path
+            
+            if nodes_path is not None:
+                package_src = workspace_package.src
+                package_name = workspace_package.name
+                progress(f"\n  Processing development package: {item} (as {package_name})")
+                progress(f"    Package path: {package_path}")
+                progress(f"    Nodes path: {nodes_path}")
                 
-                if os.path.exists(nodes_path):
-                    # Convert package name to proper format (e.g., 'nodetool-huggingface' -> 'Huggingface')
-                    package_name = get_package_name(item)
-                    print(f"\n  Processing development package: {item} (as {package_name})")
-                    print(f"    Package path: {package_path}")
-                    print(f"    Nodes path: {nodes_path}")
-                    
-                    package_nodes = []
-                    
-                    # Add the package's src directory to Python path
-                    sys.path.insert(0, package_src)
-                    print(f"    Added {package_src} to Python path")
+                # Make the package's src directory importable
+                with scanner.import_root(package_src):
+                    if scanner.finder is None:
+                        progress(f"    Added {package_src} to Python path")
                     
                     # Walk through all Python files in the nodes directory and its subdirectories
-                    for root, _, files in os.walk(nodes_path):
-                        for file in files:
-                            if file.endswith(".py") and not file.startswith("__"):
-                                module_path = os.path.join(root, file)
-                                # Get relative path from src directory
-                                # Get the module name relative to the package source
-                                module_name = os.path.relpath(module_path, package_src)
-                                module_name = module_name.replace(os.sep, ".")[:-3]  # Remove .py extension
-                                
-                                try:
-                                    module = importlib.import_module(module_name)
-                                    class_count = 0
-                                    for _, obj in inspect.getmembers(module, inspect.isclass):
-                                        try:
-                                            if (inspect.isclass(obj) and
-                                                issubclass(obj, BaseNode) and obj is not BaseNode and
-                                                hasattr(obj, 'is_visible') and obj.is_visible()):
-                                                
-                                                # Set the package name directly from the discovery process
-                                                obj.__module__ = package_name
-                                                package_nodes.append(obj)
-                                                class_count += 1
-                                        except Exception as e:
-                                            print(f"      [ERROR] Could not process class: {e}")
-                                            continue
-                                    
-                                    if class_count > 0:
-                                        print(f"      [OK] {module_name}: {class_count} BaseNode subclasses")
-                                except Exception as e:
-                                    print(f"      [ERROR] Could not import {module_name}: {e}")
-                                    continue
-                    
-                    # Remove package from Python path
-                    if package_src in sys.path:
-                        sys.path.remove(package_src)
-                    
-                    # Remove duplicates and sort
-                    unique_package = {c.__name__: c for c in package_nodes}
-                    all_nodes[package_name] = [unique_package[n] for n in sorted(unique_package.keys())]
-                    print(f"    Found {len(all_nodes[package_name])} unique nodes from {item}")
-                else:
-                    print(f"    No nodes directory found in {item}")
-            
+                    package_nodes = _discover_nodes_in_root(
+                        nodes_path, package_src, scanner, workspace_package.version, "      ", package_name, resolver,
+                    )
+                
+                # Remove duplicates and sort
+                unique_package = {c.name: c for c in package_nodes}
+                package_nodes = [unique_package[n] for n in sorted(unique_package.keys())]
+                progress(f"    Found {len(package_nodes)} unique nodes from {item}")
+                yield package_name, package_nodes
+                if release:
+                    release_modules(_modules_in(nodes_path, package_src), keep)
+            else:
+                progress(f"    No nodes directory found in {item}")
+        
     except Exception as e:
-        print(f"  [ERROR] Error discovering packages: {e}")
+        progress(f"  [ERROR] Error discovering packages: {e}")
     
-    return all_nodes 
\ No newline at end of file
+    scanner.report()
+
+# ---------------------------------------------------------------------------
+# Parallel discovery (--jobs)
+# ---------------------------------------------------------------------------
+
+@dataclass
+class DiscoveryTask:
+    """
+    Everything a worker needs to discover one package in a fresh interpreter.
+
+    Types come from `type_src` (a src tree) or `type_module` (an installed
+    package name); nodes come from `node_roots`, a list of
+    (nodes directory, import root) pairs.
+    """
+    name: str
+    type_src: Optional[str] = None
+    type_module: Optional[str] = None
+    node_roots: List[Tuple[str, str]] = field(default_factory=list)
+    rename_nodes: bool = False
+    version: str = ""
+    skip: List[str] = field(default_factory=list)  # modules not to import
+
+@dataclass
+class PackageDiscovery:
+    """Picklable result of discovering one package in a worker."""
+    name: str
+    types: List[TypeSchema] = field(default_factory=list)
+    nodes: List[NodeSchema] = field(default_factory=list)
+    log: str = ""
+    error: Optional[str] = None
+    cache_stats: Optional[CacheStats] = None
+    # Modules left out because their import exceeded the budget (filled in by the parent).
+    timed_out: List[QuarantinedModule] = field(default_factory=list)
+
+@dataclass
+class ModuleProgress:
+    """Sent by a worker before it imports a module, and with `module=None` once done."""
+    module: Optional[str]
+    path: Optional[str]
+
+def _discover_package(task: DiscoveryTask, options: DiscoveryOptions, include_nodes: bool) -> PackageDiscovery:
+    """Discover and describe the types and nodes of one package (runs in a worker)."""
+    result = PackageDiscovery(task.name)
+    scanner = options.scanner()
+    buffer = io.StringIO()
+    with redirect_stdout(buffer):
+        if task.type_src or task.type_module:
+            if task.type_src:
+                types = _discover_types_in_package_src(task.type_src, scanner, task.version)
+            else:
+                types = _discover_types_in_installed_package(task.type_module, scanner, task.version)
+            unique = {t.name: t for t in types}
+            result.types = [unique[n] for n in sorted(unique.keys())]
+
+        if include_nodes and task.node_roots:
+            nodes: List[NodeSchema] = []
+            for nodes_path, import_root in task.node_roots:
+                with scanner.import_root(import_root):
+                    nodes.extend(_discover_nodes_in_dir(
+                        nodes_path,
+                        import_root,
+                        scanner,
+                        task.version,
+                        package_name=task.name if task.rename_nodes else None,
+                    ))
+            unique = {n.name: n for n in nodes}
+            result.nodes = [unique[n] for n in sorted(unique.keys())]
+        scanner.report()
+    result.log = buffer.getvalue()
+    if scanner.cache is not None:
+        result.cache_stats = scanner.cache.stats
+    return result
+
+def _discovery_worker(task: DiscoveryTask, options: DiscoveryOptions, include_nodes: bool, conn) -> None:
+    try:
+        scanner = options.scanner()
+        scanner.skip.update(task.skip)
+        if options.import_timeout is not None:
+            scanner.on_import = lambda module, path: conn.send(ModuleProgress(module, path))
+        result = _discover_package(task, options, include_nodes)
+    except BaseException as e:
+        result = PackageDiscovery(task.name, error=f"{type(e).__name__}: {e}")
+    try:
+        conn.send(result)
+    except Exception as e:
+        conn.send(PackageDiscovery(task.name, log=result.log, error=f"Could not send result: {e}"))
+    finally:
+        conn.close()
+
+@dataclass
+class _Worker:
+    task: DiscoveryTask
+    proc: multiprocessing.process.BaseProcess
+    module: Optional[str] = None  # being imported
+    path: Optional[str] = None
+    started: float = 0.0
+
+def _run_isolated(
+    tasks: List[DiscoveryTask],
+    jobs: int,
+    options: DiscoveryOptions,
+    include_nodes: bool,
+) -> Dict[str, PackageDiscovery]:
+    """
+    Run each task in its own spawned interpreter, at most `jobs` at a time.
+
+    A worker that dies (segfault, os._exit, ...) only loses its own package,
+    which is reported as an error result.
+
+    With `options.import_timeout`, a worker that spends longer than that on
+    one module is killed and its task is run again without the module, which
+    is quarantined (if `options.quarantine_path` is set).
+    """
+    ctx = multiprocessing.get_context("spawn")
+    timeout = options.import_timeout
+    quarantine = options.scanner().quarantine if timeout is not None else None
+    pending = list(tasks)
+    running: Dict[multiprocessing.connection.Connection, _Worker] = {}
+    results: Dict[str, PackageDiscovery] = {}
+    timed_out: Dict[str, List[QuarantinedModule]] = {}
+    imported: Set[str] = set()
+    while pending or running:
+        while pending and len(running) < jobs:
+            task = pending.pop(0)
+            parent_conn, child_conn = ctx.Pipe(duplex=False)
+            proc = ctx.Process(
+                target=_discovery_worker,
+                args=(task, options, include_nodes, child_conn),
+                daemon=True,
+            )
+            proc.start()
+            child_conn.close()
+            running[parent_conn] = _Worker(task, proc)
+
+        wait = None
+        if timeout is not None:
+            deadlines = [w.started + timeout for w in running.values() if w.module is not None]
+            wait = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+        for conn in multiprocessing.connection.wait(list(running), wait):
+            worker = running[conn]
+            try:
+                result = conn.recv()
+            except EOFError:
+                result = None
+            if isinstance(result, ModuleProgress):
+                if result.module is None and worker.module is not None:
+                    imported.add(worker.module)
+                worker.module, worker.path, worker.started = result.module, result.path, time.monotonic()
+                continue
+            del running[conn]
+            conn.close()
+            worker.proc.join()
+            task = worker.task
+            if result is None:
+                result = PackageDiscovery(task.name, error=f"worker exited with code {worker.proc.exitcode}")
+            result.timed_out = timed_out.get(task.name, [])
+            results[task.name] = result
+
+        if timeout is None:
+            continue
+        now = time.monotonic()
+        for conn, worker in list(running.items()):
+            if worker.module is None or now - worker.started < timeout:
+                continue
+            worker.proc.kill()
+            worker.proc.join()
+            conn.close()
+            del running[conn]
+            task = worker.task
+            progress(f"  [ERROR] {task.name}: importing {worker.module} took longer than {timeout:g}s; "
+                  f"discovering {task.name} again without it")
+            if quarantine is not None:
+                entry = quarantine.add(worker.module, worker.path or "", task.name, timeout)
+                # Saved right away, so that an interrupted run still remembers it.
+                quarantine.save()
+            else:
+                entry = QuarantinedModule(worker.module, worker.path or "", task.name, timeout, "", time.time())
+            timed_out.setdefault(task.name, []).append(entry)
+            task.skip.append(worker.module)
+            pending.insert(0, task)
+
+    if quarantine is not None:
+        for entry in quarantine.release(imported):
+            progress(f"  [OK] {entry.module} imported within {timeout:g}s; no longer quarantined")
+        quarantine.save()
+    return results
+
+def plan_discovery_tasks(index: Optional[PackageIndex] = None) -> Tuple[List[DiscoveryTask], List[str], List[str]]:
+    """
+    Build the per-package worker tasks without importing any package code.
+
+    Returns the tasks plus the package order used for types and for nodes, which
+    mirrors the serial `discover_all_base_types` / `discover_all_base_nodes` order.
+    Core leaves out the nodes directories of workspace packages, as it does in
+    `iter_base_nodes`.
+    """
+    index = index or PackageIndex.build()
+    tasks: Dict[str, DiscoveryTask] = {}
+    type_order: List[str] = []
+    node_order: List[str] = []
+
+    def task_for(name: str) -> DiscoveryTask:
+        if name not in tasks:
+            tasks[name] = DiscoveryTask(name)
+        return tasks[name]
+
+    # 1. Core
+    core = task_for("Core")
+    type_order.append("Core")
+    node_order.append("Core")
+    core.type_src = _core_src()
+    core.version = _package_version("nodetool-core")
+    if core.type_src is None:
+        progress("[WARNING] nodetool-core not found. Skipping core type discovery.")
+    try:
+        for base_path in _nodetool_paths():
+            nodes_path = os.path.join(base_path, "nodes")
+            if os.path.exists(nodes_path) and not index.owns_nodes(nodes_path):
+                core.node_roots.append((nodes_path, os.path.dirname(base_path)))
+    except ImportError:
+        progress("[WARNING] nodetool-core not found. Skipping core node discovery.")
+
+    # 2. Installed packages (registry)
+    try:
+        if index.registry_error is not None:
+            raise RuntimeError(index.registry_error)
+        for package in index.registry:
+            name = get_package_name(package.name)
+            task = task_for(name)
+            if package.source_folder and os.path.exists(package.source_folder):
+                package_src = os.path.join(package.source_folder, "src")
+                if os.path.exists(package_src):
+                    task.type_src = package_src
+                task.version = _package_version(package.name, package.source_folder)
+            else:
+                task.type_module = package.name
+                task.version = _package_version(package.name)
+            if name not in type_order:
+                type_order.append(name)
+    except Exception as e:
+        progress(f"[ERROR] Error discovering packages: {e}")
+
+    # 3. Local workspace repos
+    try:
+        if index.workspace_error is not None:
+            raise RuntimeError(index.workspace_error)
+        for workspace_package in index.workspace:
+            package_src = workspace_package.src
+            if package_src is None:
+                continue
+            name = workspace_package.name
+            task = task_for(name)
+            if not task.version:
+                task.version = workspace_package.version
+            if name not in type_order:
+                task.type_src = package_src
+                type_order.append(name)
+            nodes_path = workspace_package.nodes_path
+            if nodes_path is not None and name not in node_order:
+                task.node_roots.append((nodes_path, package_src))
+                task.rename_nodes = True
+                node_order.append(name)
+    except Exception as e:
+        progress(f"[WARNING] Workspace discovery skipped: {e}")
+
+    return list(tasks.values()), type_order, node_order
+
+def discover_all_parallel(
+    jobs: int,
+    options: Optional[DiscoveryOptions] = None,
+    include_nodes: bool = True,
+    index: Optional[PackageIndex] = None,
+) -> Tuple[Dict[str, List[TypeSchema]], Dict[str, List[NodeSchema]]]:
+    """
+    Discover types and nodes with one isolated worker interpreter per package.
+
+    `jobs` is the number of concurrent workers (0 means one per CPU core).
+    Results are merged in the same package order as serial discovery, so the
+    output does not depend on which worker finishes first.
+    """
+    jobs = jobs if jobs > 0 else (os.cpu_count() or 1)
+    options = options or DiscoveryOptions()
+    progress(f">>> Discovering packages in parallel ({jobs} workers)...")
+    tasks, type_order, node_order = plan_discovery_tasks(index)
+
+    # Node roots with usable package metadata are described here once all types are
+    # known (type names resolve across packages); workers only import the rest.
+    metadata_roots: Dict[str, List[Tuple[str, list]]] = {}
+    if include_nodes and options.package_metadata:
+        for task in tasks:
+            remaining = []
+            for nodes_path, import_root in task.node_roots:
+                try:
+                    packages = read_package_metadata(nodes_path, import_root)
+                except MetadataUnavailable as e:
+                    progress(f"  [WARNING] Not using package metadata for {nodes_path}: {e}")
+                    packages = []
+                if packages:
+                    metadata_roots.setdefault(task.name, []).append((nodes_path, packages))
+                else:
+                    remaining.append((nodes_path, import_root))
+            task.node_roots = remaining
+
+    results = _run_isolated(tasks, jobs, options, include_nodes)
+
+    if metadata_roots:
+        resolver = TypeNameResolver({name: r.types for name, r in results.items()})
+        for task in tasks:
+            if task.name not in metadata_roots:
+                continue
+            result = results[task.name]
+            buffer = io.StringIO()
+            with logging_to(functools.partial(print, file=buffer)):
+                nodes = list(result.nodes)
+                for nodes_path, packages in metadata_roots[task.name]:
+                    nodes.extend(describe_package_nodes(
+                        packages, nodes_path, resolver,
+                        package_name=task.name if task.rename_nodes else None,
+                    ))
+            unique = {n.name: n for n in nodes}
+            result.nodes = [unique[n] for n in sorted(unique.keys())]
+            result.log += buffer.getvalue()
+
+    all_types: Dict[str, List[TypeSchema]] = {}
+    all_nodes: Dict[str, List[NodeSchema]] = {}
+    for task in tasks:
+        result = results[task.name]
+        if result.log:
+            progress(f"  --- {task.name} ---")
+            progress(result.log.removesuffix("\n"))
+        if result.error:
+            progress(f"  [ERROR] Discovery of {task.name} failed: {result.error}")
+        for entry in result.timed_out:
+            progress(f"  [WARNING] Skipped {entry.module} ({entry.path}): import exceeded {entry.seconds:g}s")
+        if result.cache_stats is not None:
+            options.scanner().cache.stats.merge(result.cache_stats)
+
+    for name in type_order:
+        types = results[name].types
+        if types or name == "Core":
+            all_types[name] = types
+            progress(f"Found {len(types)} types from {name}")
+    for name in node_order if include_nodes else []:
+        nodes = results[name].nodes
+        all_nodes[name] = nodes
+        progress(f"Found {len(nodes)} unique nodes from {name}")
+    return all_types, all_nodes
@@ -0,0 +1,82 @@
+"""
+Which generated files depend on which types, saved next to the generated output.
+
+A full run stores its descriptions (the IR) together with a reverse-dependency
+map: for every class a type or node references, the output files whose
+rendering mentions it. `incremental.py` uses the stored IR as the baseline for
+`--changed` runs and the map to find the files a changed type affects.
+"""
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set
+
+from .ir import GeneratorIR, compact_json
+from .output import node_output_path, type_output_path
+from .schema import SCHEMA_VERSION, FieldSchema, TypeRef
+
+GRAPH_FILE_NAME = ".nodetool-codegen-graph.json"
+
+def _typeref_keys(ref: Optional[TypeRef], keys: Set[str]) -> None:
+    if ref is None:
+        return
+    if ref.module and ref.name:
+        keys.add(ref.key)
+    for arg in ref.args:
+        _typeref_keys(arg, keys)
+
+def referenced_keys(fields: Iterable[FieldSchema]) -> Set[str]:
+    """`module.Name` of every class the fields' types and defaults mention."""
+    keys: Set[str] = set()
+    for f in fields:
+        _typeref_keys(f.type, keys)
+        _typeref_keys(f.default.type, keys)
+    return keys
+
+def build_dependents(ir: GeneratorIR) -> Dict[str, List[str]]:
+    """Map each referenced class key to the output files that reference it."""
+    dependents: Dict[str, Set[str]] = {}
+    for source_name, classes in ir.all_types.items():
+        for schema in classes:
+            path = type_output_path(source_name, schema)
+            for key in referenced_keys(schema.fields) - {schema.key}:
+                dependents.setdefault(key, set()).add(path)
+    for source_name, nodes in (ir.all_nodes or {}).items():
+        for schema in nodes:
+            path = node_output_path(source_name, schema)
+            for key in referenced_keys(schema.properties + (schema.outputs or [])):
+                dependents.setdefault(key, set()).add(path)
+    return {key: sorted(paths) for key, paths in sorted(dependents.items())}
+
+@dataclass
+class DependencyGraph:
+    """The IR of the last full or incremental run and its reverse dependencies."""
+    ir: GeneratorIR
+    dependents: Dict[str, List[str]] = field(default_factory=dict)
+    # time.time() when that run started discovering; sources modified later are stale
+    discovered_at: float = 0.0
+
+    @classmethod
+    def build(cls, ir: GeneratorIR, discovered_at: float) -> "DependencyGraph":
+        return cls(ir, build_dependents(ir), discovered_at)
+
+def save_graph(output_dir: str, graph: DependencyGraph) -> None:
+    # Not meant to be read by people: compact output lets json use its C encoder,
+    # which is many times faster than indenting in pure Python. The IR is written
+    # package by package, so the whole document is never held in memory.
+    with open(os.path.join(output_dir, GRAPH_FILE_NAME), "w", encoding="utf-8") as f:
+        f.write(f'{{"schema_version":{compact_json(SCHEMA_VERSION)},"discovered_at":{compact_json(graph.discovered_at)},')
+        f.write(f'"dependents":{compact_json(graph.dependents)},"ir":')
+        graph.ir.write_compact_json(f)
+        f.write("}\n")
+
+def load_graph(output_dir: str) -> DependencyGraph:
+    """Raises OSError if there is no graph, ValueError if it cannot be used."""
+    with open(os.path.join(output_dir, GRAPH_FILE_NAME), encoding="utf-8") as f:
+        data = json.load(f)
+    if data.get("schema_version") != SCHEMA_VERSION:
+        raise ValueError(f"graph schema version {data.get('schema_version')} is not supported (expected {SCHEMA_VERSION})")
+    ir = GeneratorIR.from_json(data["ir"])
+    if ir.all_nodes is None:
+        raise ValueError("graph has no node descriptions")
+    return DependencyGraph(ir, data.get("dependents", {}), data.get("discovered_at", 0.0))
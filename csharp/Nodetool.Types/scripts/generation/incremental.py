@@ -0,0 +1,378 @@
+"""
+Regenerating only what changed since the last run (`--changed`).
+
+A full run saves its descriptions and a reverse-dependency map next to the
+output (see `graph.py`). An incremental run then:
+
+1. Finds the changed modules: the ones given on the command line, or every
+   source module modified after the last run (plus deleted ones), widened to
+   the modules that import a changed file (statically, see `StaticIndex`).
+2. Imports and describes only those modules, and replaces their types and
+   nodes in the stored descriptions.
+3. Renders the files of changed types and nodes and the files that reference
+   a changed type. If the tagged unions changed (see unions.py), every file is
+   rendered again.
+
+New packages and changes to the generator itself still need a full run.
+"""
+import os
+import sys
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from . import profiling
+from .discovery import BaseNode, BaseType, DiscoveryOptions, DiscoveryTask, PackageIndex, _iter_modules, plan_discovery_tasks
+from .graph import DependencyGraph, load_graph, save_graph
+from .ir import GeneratorIR
+from .orchestrator import formatter_table, generate_summary_file, write_tagged_unions
+from .output import TYPE_MANIFEST_FILE, OutputTree, node_output_path, type_output_path, union_output_path
+from .render import RenderJob, render_and_write
+from .schema import NodeSchema, TypeSchema
+from .static_scan import StaticIndex
+from .unions import TaggedUnions, plan as plan_tagged_unions
+from .utils import set_known_csharp_type_names
+
+# Modules defining the classes discovery recognizes types and nodes by. They are
+# never imported again: that would create BaseType/BaseNode classes discovery
+# does not know, and it would find no types or nodes at all.
+_BASE_MODULES = {BaseType.__module__, BaseNode.__module__}
+# The base modules were imported (with discovery) before this.
+_IMPORTED_AT = time.time()
+
+@dataclass
+class SourceRoot:
+    """A directory discovery walks: the types or one nodes directory of a package."""
+    task: DiscoveryTask
+    kind: str  # "types" or "nodes"
+    path: str
+    import_root: str
+
+    def module_path(self, module_name: str) -> Optional[str]:
+        """Where `module_name` lives if it belongs to this root (whether or not it exists)."""
+        path = os.path.join(self.import_root, *module_name.split(".")) + ".py"
+        return path if path.startswith(self.path + os.sep) else None
+
+    def module_name(self, path: str) -> Optional[str]:
+        path = os.path.abspath(path)
+        if not path.startswith(self.path + os.sep) or not path.endswith(".py"):
+            return None
+        return os.path.relpath(path, self.import_root)[:-3].replace(os.sep, ".")
+
+def source_roots(tasks: List[DiscoveryTask]) -> List[SourceRoot]:
+    """Type roots first, then node roots, each in discovery order (as in a full run)."""
+    roots = []
+    for task in tasks:
+        if task.type_src and os.path.isdir(os.path.join(task.type_src, "nodetool")):
+            roots.append(SourceRoot(task, "types", os.path.join(task.type_src, "nodetool"), task.type_src))
+    for task in tasks:
+        for nodes_path, import_root in task.node_roots:
+            roots.append(SourceRoot(task, "nodes", nodes_path, import_root))
+    return roots
+
+def _known_modules(root: SourceRoot, ir: GeneratorIR) -> Set[str]:
+    """Modules of this root that defined types or nodes in the stored run."""
+    if root.kind == "types":
+        modules = {t.module for t in ir.all_types.get(root.task.name, [])}
+    else:
+        modules = {n.source for n in (ir.all_nodes or {}).get(root.task.name, []) if n.source}
+    return {m for m in modules if root.module_path(m) is not None}
+
+def _modified_files(roots: List[SourceRoot], since: float) -> Set[str]:
+    """Every `.py` file under the roots (including `__init__.py`) modified after `since`."""
+    files = set()
+    for root in roots:
+        for dirpath, _, filenames in os.walk(root.path):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                if name.endswith(".py") and os.path.getmtime(path) > since:
+                    files.add(path)
+    return files
+
+def _changed_module_names(roots: List[SourceRoot], files: Set[str]) -> Set[str]:
+    """Module (or, for `__init__.py`, package) names of changed files under the roots."""
+    names = set()
+    for path in files:
+        for root in roots:
+            name = root.module_name(path)
+            if name is not None:
+                names.add(name[:-len(".__init__")] if name.endswith(".__init__") else name)
+    return names
+
+def find_changed_modules(
+    roots: List[SourceRoot],
+    graph: DependencyGraph,
+    requested: Optional[List[str]],
+    index: StaticIndex,
+    files: Optional[Set[str]] = None,
+) -> Dict[int, Set[str]]:
+    """
+    Changed module names per root (by index into `roots`).
+
+    `requested` are module names or `.py` paths; None means every module in
+    `files`, or if that is None too, every module modified since the stored
+    run. `index` must not hold parses of changed files from earlier calls.
+    """
+    current = [dict(_iter_modules(root.path, root.import_root)) if os.path.isdir(root.path) else {} for root in roots]
+    existing = set().union(*current)
+    # A namespace-package module name maps to a path under several roots; it
+    # belongs to the one that has it, or to all of them once it is deleted.
+    known = [
+        {m for m in _known_modules(root, graph.ir) if m in modules or m not in existing}
+        for root, modules in zip(roots, current)
+    ]
+    changed: Dict[int, Set[str]] = {i: set() for i in range(len(roots))}
+    changed_files: Set[str] = set()
+
+    if requested is None:
+        changed_files = files if files is not None else _modified_files(roots, graph.discovered_at)
+        for i, modules in enumerate(current):
+            changed[i].update(m for m, path in modules.items() if path in changed_files)
+            # Deleted modules lose their types and nodes.
+            changed[i].update(known[i] - set(modules))
+    else:
+        for item in requested:
+            found = False
+            for i, root in enumerate(roots):
+                module_name = root.module_name(item) if item.endswith(".py") else item
+                path = root.module_path(module_name) if module_name else None
+                if path is None or (module_name not in current[i] and module_name not in known[i]):
+                    continue
+                changed[i].add(module_name)
+                changed_files.add(path)
+                found = True
+            if not found:
+                print(f"[WARNING] {item} is not a module of any discovered source tree; skipped")
+
+    # Modules that import a changed file describe their classes differently too.
+    index.forget(_changed_module_names(roots, changed_files))
+    for i, root in enumerate(roots):
+        for module_name in sorted(known[i] - changed[i]):
+            path = current[i].get(module_name)
+            if path is not None and changed_files.intersection(index.dependency_files(module_name, path)):
+                changed[i].add(module_name)
+    return changed
+
+def _rediscover(
+    roots: List[SourceRoot],
+    changed: Dict[int, Set[str]],
+    options: DiscoveryOptions,
+) -> Tuple[Dict[Tuple[str, str], List], Dict[Tuple[str, str], Set[str]]]:
+    """
+    Describe the changed modules that still exist.
+
+    Returns the new schemas and the replaced module names, both keyed by
+    (package, "types" | "nodes").
+    """
+    scanner = options.scanner()
+    # A long-running process (--watch) has the old versions imported and parsed.
+    stale = {m for modules in changed.values() for m in modules}
+    for module_name in sorted(stale & _BASE_MODULES):
+        path = getattr(sys.modules.get(module_name), "__file__", None)
+        if path and os.path.getmtime(path) > _IMPORTED_AT:
+            print(f"[WARNING] {module_name} changed after it was imported; restart to pick up its changes")
+    for module_name in stale - _BASE_MODULES:
+        sys.modules.pop(module_name, None)
+    for index in (scanner.index, scanner.cache.index if scanner.cache is not None else None):
+        if index is not None:
+            index.forget(stale)
+    schemas: Dict[Tuple[str, str], List] = {}
+    replaced: Dict[Tuple[str, str], Set[str]] = {}
+    for i, root in enumerate(roots):
+        if not changed[i]:
+            continue
+        key = (root.task.name, root.kind)
+        replaced.setdefault(key, set()).update(changed[i])
+        found = schemas.setdefault(key, [])
+        modules = []
+        for module_name in sorted(changed[i]):
+            path = root.module_path(module_name)
+            if path is not None and os.path.isfile(path):
+                modules.append((module_name, path))
+        with scanner.import_root(root.import_root):
+            if root.kind == "types":
+                found.extend(scanner.scan_types(modules, root.task.version))
+            else:
+                package_name = root.task.name if root.task.rename_nodes else None
+                found.extend(scanner.scan_nodes(modules, root.task.version, package_name=package_name))
+    scanner.report()
+    return schemas, replaced
+
+def _merge(old, new, replaced: Set[str], module_of: Callable) -> List:
+    """Drop the old schemas of replaced modules, add the new ones, dedupe by name and sort."""
+    unique = {s.name: s for s in old if module_of(s) not in replaced}
+    unique.update((s.name, s) for s in new)
+    return [unique[n] for n in sorted(unique)]
+
+def merge_ir(
+    ir: GeneratorIR,
+    schemas: Dict[Tuple[str, str], List],
+    replaced: Dict[Tuple[str, str], Set[str]],
+    type_order: List[str],
+    node_order: List[str],
+) -> GeneratorIR:
+    """The stored descriptions with the rediscovered modules swapped in, in full-run package order."""
+    all_types: Dict[str, List[TypeSchema]] = {}
+    for name in type_order + [n for n in ir.all_types if n not in type_order]:
+        types = ir.all_types.get(name, [])
+        if (name, "types") in replaced:
+            types = _merge(types, schemas[(name, "types")], replaced[(name, "types")], lambda t: t.module)
+        if types or name == "Core":
+            all_types[name] = types
+
+    old_nodes = ir.all_nodes or {}
+    all_nodes: Dict[str, List[NodeSchema]] = {}
+    for name in node_order + [n for n in old_nodes if n not in node_order]:
+        nodes = old_nodes.get(name, [])
+        if (name, "nodes") in replaced:
+            nodes = _merge(nodes, schemas[(name, "nodes")], replaced[(name, "nodes")], lambda n: n.source)
+        if nodes or name in old_nodes or name == "Core":
+            all_nodes[name] = nodes
+    return GeneratorIR(all_types, all_nodes, list(ir.packages))
+
+def _outputs(ir: GeneratorIR) -> Dict[str, Tuple[str, object]]:
+    """Output path -> (package, schema) of every type and node file."""
+    outputs: Dict[str, Tuple[str, object]] = {}
+    for source_name, classes in ir.all_types.items():
+        for schema in classes:
+            outputs[type_output_path(source_name, schema)] = (source_name, schema)
+    for source_name, nodes in (ir.all_nodes or {}).items():
+        for schema in nodes:
+            outputs[node_output_path(source_name, schema)] = (source_name, schema)
+    return outputs
+
+def _type_entries(ir: GeneratorIR) -> Dict[str, Tuple[str, TypeSchema]]:
+    return {t.key: (source_name, t) for source_name, classes in ir.all_types.items() for t in classes}
+
+def _tagged_unions(ir: GeneratorIR) -> TaggedUnions:
+    return plan_tagged_unions(ir.all_types, ir.csharp_type_names())
+
+def _union_paths(unions: TaggedUnions) -> Set[str]:
+    if unions.root is None:
+        return {TYPE_MANIFEST_FILE}
+    return {TYPE_MANIFEST_FILE} | {union_output_path(f) for f in [unions.root] + unions.families}
+
+def affected_outputs(old: DependencyGraph, new: DependencyGraph) -> Set[str]:
+    """
+    Files to render again: changed types and nodes, and every file referencing a
+    changed type; all of them if the tagged unions changed.
+    """
+    old_outputs, new_outputs = _outputs(old.ir), _outputs(new.ir)
+    if _tagged_unions(old.ir) != _tagged_unions(new.ir):
+        return set(new_outputs)
+    affected = {p for p, entry in new_outputs.items() if old_outputs.get(p) != entry}
+
+    old_types, new_types = _type_entries(old.ir), _type_entries(new.ir)
+    for key in set(old_types) | set(new_types):
+        if old_types.get(key) != new_types.get(key):
+            affected.update(old.dependents.get(key, ()))
+            affected.update(new.dependents.get(key, ()))
+    return affected & set(new_outputs)
+
+class IncrementalGenerator:
+    """
+    Applies source changes to the output of the last full run.
+
+    Keeps the package plan, the parsed import graph and the stored
+    descriptions between `update` calls, so a long-running process
+    (`--watch`) only pays for what changed.
+    """
+
+    def __init__(self, output_dir: str, namespace: str = "Nodetool.Types", options: Optional[DiscoveryOptions] = None):
+        self.output_dir = output_dir
+        self.namespace = namespace
+        self.options = options or DiscoveryOptions()
+        tasks, self.type_order, self.node_order = plan_discovery_tasks(PackageIndex.build())
+        self.roots = source_roots(tasks)
+        self.index = StaticIndex(sorted({root.import_root for root in self.roots}))
+        self.graph: Optional[DependencyGraph] = None
+
+    def load(self, report: bool = True) -> bool:
+        """Load the stored run; False (after printing why, if `report`) if there is none."""
+        try:
+            self.graph = load_graph(self.output_dir)
+        except (OSError, ValueError, KeyError) as e:
+            if report:
+                print(f"[ERROR] No usable dependency graph in {self.output_dir} ({e}); run a full generation first")
+            return False
+        return True
+
+    def update(self, modules: Optional[List[str]] = None, files: Optional[Set[str]] = None) -> Optional[GeneratorIR]:
+        """
+        Rediscover changed modules and re-render what they affect.
+
+        `modules` are module names or `.py` paths; `files` are changed source
+        files; with neither, changes are detected from modification times.
+        Returns the updated descriptions, or None if there is no stored run.
+        """
+        if self.graph is None and not self.load():
+            return None
+        old = self.graph
+        started = time.time()
+
+        print(">>> Finding changed modules...")
+        with profiling.phase("find changes"):
+            changed = find_changed_modules(self.roots, old, modules, self.index, files)
+        changed_names = sorted({m for names in changed.values() for m in names})
+        for module_name in changed_names:
+            print(f"  {module_name}")
+        print(f"  Changed modules: {len(changed_names)}")
+
+        with profiling.phase("rediscovery"):
+            schemas, replaced = _rediscover(self.roots, changed, self.options)
+            ir = merge_ir(old.ir, schemas, replaced, self.type_order, self.node_order)
+        # An explicit module list says nothing about other modified files; keep checking them.
+        new = DependencyGraph.build(ir, old.discovered_at if modules is not None else started)
+
+        unions = _tagged_unions(ir)
+        set_known_csharp_type_names(ir.csharp_type_names(), unions)
+        tree = OutputTree(self.output_dir, incremental=True)
+
+        print("\n>>> Rendering affected files...")
+        old_outputs, new_outputs = _outputs(old.ir), _outputs(ir)
+        for rel_path in sorted(set(old_outputs) - set(new_outputs)):
+            tree.remove(rel_path)
+        jobs = []
+        for rel_path in sorted(affected_outputs(old, new)):
+            source_name, schema = new_outputs[rel_path]
+            jobs.append(RenderJob("type" if isinstance(schema, TypeSchema) else "node", source_name, schema))
+        result = render_and_write(jobs, tree)
+        for rel_path in sorted(_union_paths(_tagged_unions(old.ir)) - set(write_tagged_unions(tree, unions))):
+            tree.remove(rel_path)
+
+        with profiling.phase("summary"):
+            formatters = formatter_table(tree, ir.all_types, ir.all_nodes)
+            generate_summary_file(tree, ir.packages, tagged_unions=unions.root is not None, formatters=formatters)
+        with profiling.phase("write"):
+            tree.save_manifest()
+        with profiling.phase("save graph"):
+            save_graph(self.output_dir, new)
+        self.graph = new
+
+        print(f"\n=== Incremental Generation Summary ===")
+        print(f"  Rediscovered modules: {len(changed_names)}")
+        print(f"  Files: {tree.summary()}")
+        print(f"  Errors: {sum(result.errors.values())}")
+        return ir
+
+def regenerate_changed(
+    output_dir: str,
+    namespace: str = "Nodetool.Types",
+    modules: Optional[List[str]] = None,
+    options: Optional[DiscoveryOptions] = None,
+) -> Optional[GeneratorIR]:
+    """
+    Update the output of the last full run for changed source modules.
+
+    `modules` are module names or `.py` paths; None detects changes from file
+    modification times. Returns the updated descriptions, or None if there is
+    no usable stored run.
+    """
+    print("=== NodeTool SDK Incremental Generator ===")
+    print(f"Output: {output_dir}")
+    print(f"Namespace: {namespace}")
+    print()
+    generator = IncrementalGenerator(output_dir, namespace, options)
+    if not generator.load():
+        return None
+    return generator.update(modules)
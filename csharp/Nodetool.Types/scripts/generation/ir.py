@@ -0,0 +1,215 @@
+"""
+JSON form of the schema descriptions for a whole generator run.
+
+A run's discovery result can be saved with `--save-ir` and rendered again
+with `--from-ir`, in a process that never imports nodetool.
+"""
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple
+
+from .schema import (
+    SCHEMA_VERSION,
+    DefaultValue,
+    FieldSchema,
+    NodeSchema,
+    TypeRef,
+    TypeSchema,
+)
+from .utils import get_package_name
+
+def csharp_type_name_map(all_types: Dict[str, List[TypeSchema]]) -> Dict[str, str]:
+    """Map of `module.Name` to the fully-qualified C# name of every described type."""
+    mapping: Dict[str, str] = {}
+    for source_name, classes in all_types.items():
+        ns = f"Nodetool.Types.{get_package_name(source_name)}"
+        for cls in classes:
+            mapping[cls.key] = f"{ns}.{cls.name}"
+    return mapping
+
+def _typeref_to_json(ref: TypeRef) -> Dict[str, Any]:
+    data: Dict[str, Any] = {"kind": ref.kind}
+    if ref.name:
+        data["name"] = ref.name
+    if ref.module:
+        data["module"] = ref.module
+    if ref.args:
+        data["args"] = [_typeref_to_json(a) for a in ref.args]
+    if ref.values:
+        data["values"] = list(ref.values)
+    return data
+
+# Equal TypeRefs are loaded as one shared object, which is what typeref_to_csharp memoizes on.
+_INTERNED_TYPEREFS: Dict[TypeRef, TypeRef] = {}
+
+def _typeref_from_json(data: Dict[str, Any]) -> TypeRef:
+    ref = TypeRef(
+        data["kind"],
+        data.get("name", ""),
+        data.get("module", ""),
+        tuple(_typeref_from_json(a) for a in data.get("args", ())),
+        tuple(data.get("values", ())),
+    )
+    return _INTERNED_TYPEREFS.setdefault(ref, ref)
+
+def _field_to_json(f: FieldSchema) -> Dict[str, Any]:
+    data: Dict[str, Any] = {"name": f.name, "type": _typeref_to_json(f.type)}
+    if f.default.kind != "unset":
+        default: Dict[str, Any] = {"kind": f.default.kind}
+        if f.default.value is not None:
+            default["value"] = f.default.value
+        if f.default.type is not None:
+            default["type"] = _typeref_to_json(f.default.type)
+        data["default"] = default
+    return data
+
+def _field_from_json(data: Dict[str, Any]) -> FieldSchema:
+    default = data.get("default")
+    if default is None:
+        return FieldSchema(data["name"], _typeref_from_json(data["type"]))
+    default_type = default.get("type")
+    return FieldSchema(
+        data["name"],
+        _typeref_from_json(data["type"]),
+        DefaultValue(
+            default["kind"],
+            default.get("value"),
+            _typeref_from_json(default_type) if default_type is not None else None,
+        ),
+    )
+
+def _type_to_json(schema: TypeSchema) -> Dict[str, Any]:
+    return {
+        "name": schema.name,
+        "module": schema.module,
+        "fields": [_field_to_json(f) for f in schema.fields],
+        "base": schema.base,
+    }
+
+def _type_from_json(data: Dict[str, Any]) -> TypeSchema:
+    return TypeSchema(
+        data["name"],
+        data["module"],
+        [_field_from_json(f) for f in data["fields"]],
+        data.get("base", ""),
+    )
+
+def _node_to_json(schema: NodeSchema) -> Dict[str, Any]:
+    return {
+        "name": schema.name,
+        "module": schema.module,
+        "properties": [_field_to_json(f) for f in schema.properties],
+        "outputs": None if schema.outputs is None else [_field_to_json(f) for f in schema.outputs],
+        "source": schema.source,
+    }
+
+def _node_from_json(data: Dict[str, Any]) -> NodeSchema:
+    outputs = data.get("outputs")
+    return NodeSchema(
+        data["name"],
+        data["module"],
+        [_field_from_json(f) for f in data["properties"]],
+        None if outputs is None else [_field_from_json(f) for f in outputs],
+        data.get("source", ""),
+    )
+
+def compact_json(value: Any) -> str:
+    """`value` as JSON without whitespace (which `json` encodes in C, unlike indented output)."""
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+@dataclass
+class GeneratorIR:
+    """
+    Everything codegen needs from discovery: type and node descriptions grouped
+    by package, and the package names for `NodeToolTypes.cs`.
+
+    Exposes the same read interface as `session.DiscoverySession`, so the
+    orchestrator can render from either. `nodes` is None when the run that
+    produced the IR did not discover nodes.
+    """
+    all_types: Dict[str, List[TypeSchema]] = field(default_factory=dict)
+    all_nodes: Optional[Dict[str, List[NodeSchema]]] = None
+    packages: List[str] = field(default_factory=list)
+
+    def types(self) -> Dict[str, List[TypeSchema]]:
+        return self.all_types
+
+    def nodes(self) -> Dict[str, List[NodeSchema]]:
+        if self.all_nodes is None:
+            raise ValueError("IR does not contain node descriptions (it was saved from a types-only run)")
+        return self.all_nodes
+
+    def iter_nodes(self) -> Iterator[Tuple[str, List[NodeSchema]]]:
+        return iter(self.nodes().items())
+
+    def csharp_type_names(self) -> Dict[str, str]:
+        return csharp_type_name_map(self.all_types)
+
+    def package_names(self) -> List[str]:
+        return self.packages
+
+    def package_errors(self) -> List[str]:
+        return []
+
+    def cache_summary(self) -> Optional[str]:
+        return None
+
+    def to_ir(self) -> "GeneratorIR":
+        return self
+
+    def write_compact_json(self, f: TextIO) -> None:
+        """
+        Write `to_json()` to `f` as compact JSON, one package at a time.
+
+        The output is `compact_json(self.to_json())`, without the whole
+        document (or its dict form) ever being in memory.
+        """
+        def write_packages(packages: Dict[str, list], to_json) -> None:
+            f.write("{")
+            for i, (pkg, schemas) in enumerate(packages.items()):
+                f.write(f"{',' if i else ''}{compact_json(pkg)}:{compact_json([to_json(s) for s in schemas])}")
+            f.write("}")
+
+        f.write(f'{{"schema_version":{compact_json(SCHEMA_VERSION)},"packages":{compact_json(self.packages)},"types":')
+        write_packages(self.all_types, _type_to_json)
+        f.write(',"nodes":')
+        if self.all_nodes is None:
+            f.write("null")
+        else:
+            write_packages(self.all_nodes, _node_to_json)
+        f.write("}")
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "schema_version": SCHEMA_VERSION,
+            "packages": self.packages,
+            "types": {pkg: [_type_to_json(t) for t in types] for pkg, types in self.all_types.items()},
+            "nodes": None if self.all_nodes is None else {
+                pkg: [_node_to_json(n) for n in nodes] for pkg, nodes in self.all_nodes.items()
+            },
+        }
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "GeneratorIR":
+        version = data.get("schema_version")
+        if version != SCHEMA_VERSION:
+            raise ValueError(f"IR schema version {version} is not supported (expected {SCHEMA_VERSION})")
+        nodes = data.get("nodes")
+        return cls(
+            {pkg: [_type_from_json(t) for t in types] for pkg, types in data["types"].items()},
+            None if nodes is None else {pkg: [_node_from_json(n) for n in ns] for pkg, ns in nodes.items()},
+            list(data.get("packages", [])),
+        )
+
+def save_ir(ir: GeneratorIR, path: str) -> None:
+    """Write the IR as JSON (package order is preserved; it determines output order)."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(ir.to_json(), f, indent=1, ensure_ascii=False)
+        f.write("\n")
+
+def load_ir(path: str) -> GeneratorIR:
+    with open(path, encoding="utf-8") as f:
+        return GeneratorIR.from_json(json.load(f))
@@ -0,0 +1,86 @@
+"""
+Generated members whose C# type is, or contains, `object`.
+
+MessagePack reads `object` through its dynamic formatter and boxes every
+value, so each such member is a field the C# side cannot deserialize into a
+concrete type. After rendering, the orchestrator reports them per package,
+grouped by the reason their annotation has no precise C# type
+(`utils.object_reason`); `--object-report PATH` writes the complete list.
+"""
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .schema import FieldSchema, NodeSchema, TypeSchema
+from .utils import get_package_name, object_reason, typeref_to_csharp
+
+# Members named per reason in the printed report (the file has all of them).
+EXAMPLES_PER_REASON = 3
+
+@dataclass
+class ObjectMember:
+    member: str  # "Message.content"; node outputs as "RichNode.outputs.text"
+    csharp_type: str
+    reason: str
+
+@dataclass
+class PackageMembers:
+    total: int = 0
+    boxed: List[ObjectMember] = field(default_factory=list)
+
+def _members(owner: str, fields: Iterable[FieldSchema]) -> Iterable[Tuple[str, FieldSchema]]:
+    for f in fields:
+        yield f"{owner}.{f.name}", f
+
+def collect(
+    all_types: Dict[str, List[TypeSchema]],
+    all_nodes: Optional[Dict[str, List[NodeSchema]]],
+) -> Dict[str, PackageMembers]:
+    """Members of every type and node (properties and outputs), by C# package name."""
+    packages: Dict[str, PackageMembers] = {}
+
+    def add(source_name: str, members: Iterable[Tuple[str, FieldSchema]]) -> None:
+        package = packages.setdefault(get_package_name(source_name), PackageMembers())
+        for member, f in members:
+            package.total += 1
+            reason = object_reason(f.type)
+            if reason is not None:
+                package.boxed.append(ObjectMember(member, typeref_to_csharp(f.type), reason))
+
+    for source_name, classes in all_types.items():
+        for schema in classes:
+            add(source_name, _members(schema.name, schema.fields))
+    for source_name, nodes in (all_nodes or {}).items():
+        for schema in nodes:
+            add(source_name, _members(schema.name, schema.properties))
+            add(source_name, _members(f"{schema.name}.outputs", schema.outputs or []))
+    return packages
+
+def report(packages: Dict[str, PackageMembers], log: Callable[[str], None] = print) -> None:
+    boxed = sum(len(p.boxed) for p in packages.values())
+    total = sum(p.total for p in packages.values())
+    log(f"\n>>> Members generated as object: {boxed} of {total}")
+    for name, package in sorted(packages.items()):
+        if not package.boxed:
+            continue
+        log(f"  {name}: {len(package.boxed)} of {package.total}")
+        by_reason: Dict[str, List[str]] = {}
+        for m in package.boxed:
+            by_reason.setdefault(m.reason, []).append(m.member)
+        for reason, members in sorted(by_reason.items(), key=lambda r: (-len(r[1]), r[0])):
+            examples = ", ".join(members[:EXAMPLES_PER_REASON])
+            more = f" (+{len(members) - EXAMPLES_PER_REASON} more)" if len(members) > EXAMPLES_PER_REASON else ""
+            log(f"    {reason} ({len(members)}): {examples}{more}")
+
+def save(packages: Dict[str, PackageMembers], path: str) -> None:
+    """Write every member generated as object, by package, to `path` as JSON."""
+    data = {
+        name: {"members": package.total, "object": [asdict(m) for m in package.boxed]}
+        for name, package in sorted(packages.items())
+    }
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=1)
+        f.write("\n")
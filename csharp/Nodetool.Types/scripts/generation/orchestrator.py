@@ -1,447 +1,504 @@
 """
 Orchestration of the C# type and node generation process.
 """
+import itertools
 import os
-import shutil
-from typing import List, Dict
-
-try:
-    from nodetool.metadata.types import BaseType
-    from nodetool.workflows.base_node import BaseNode
-    from nodetool.packages.registry import discover_node_packages
-except ImportError:
-    class BaseType: pass
-    class BaseNode: pass
-    def discover_node_packages(): return []
-
-from .utils import get_package_name, set_known_csharp_type_names
-from .codegen import generate_class_source, generate_node_class_source
-from .discovery import discover_all_base_types, discover_all_base_nodes
-
-def _build_csharp_type_name_map(all_types: Dict[str, List[type[BaseType]]]) -> Dict[type[BaseType], str]:
-    mapping: Dict[type[BaseType], str] = {}
-    for source_name, classes in all_types.items():
-        pkg_name = get_package_name(source_name)
-        ns = f"Nodetool.Types.{pkg_name}"
-        for cls in classes:
-            mapping[cls] = f"{ns}.{cls.__name__}"
-    return mapping
+import time
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, Optional
 
-def generate_types_for_source(source_name: str, classes: List[type[BaseType]], output_dir: str) -> tuple[int, int]:
-    """Generate C# classes for a specific source (core or package)."""
-    generated = 0
-    errors = 0
-    
-    # Get clean names
-    pkg_name = get_package_name(source_name)  # e.g., 'nodetool-huggingface' -> 'Huggingface'
-    
-    # Create source-specific namespace and directory using pretty name
-    namespace = f"Nodetool.Types.{pkg_name}"  # e.g., Nodetool.Types.Huggingface
+from . import object_members, profiling
+from .codegen import member_formatters, render_type_manifest_source, render_union_root_source, render_union_source
+from .context import GeneratorContext, SchemaSource, quiet
+from .graph import DependencyGraph, save_graph
+from .output import ALL_ROOTS, NODES_ROOT, SUMMARY_FILE, TYPE_MANIFEST_FILE, TYPES_ROOT, MemoryOutput, OutputTree, union_output_path
+from .render import RenderJob, RenderResult, job_formatters, job_member_types, node_jobs, render_and_write, type_jobs
+from .schema import NodeSchema, TypeSchema
+from .unions import TaggedUnions
 
-    # Support nested namespaces like "Lib.Audio" ➜ folder "Lib/Audio"
-    dir_parts = pkg_name.split('.')  # ["Lib", "Audio"] or ["Huggingface"]
-    source_dir = os.path.join(output_dir, "Types", *dir_parts)  # e.g., Types/Lib/Audio or Types/Huggingface
-    
-    os.makedirs(source_dir, exist_ok=True)
-    
-    # Generate individual type files
-    for cls in classes:
-        try:
-            src = generate_class_source(cls, namespace)
-            output_file = os.path.join(source_dir, f"{cls.__name__}.cs")
-            
-            with open(output_file, "w", encoding="utf-8") as f:
-                f.write(src)
-            
-            generated += 1
-            
-        except Exception as e:
-            print(f"[ERROR] Error generating {cls.__name__} from {pkg_name}: {e}")
-            errors += 1
-    
-    # Generate summary file at package level (registration only; no placeholder code)
-    if generated > 0:
-        summary_path = os.path.join(output_dir, "Types", *dir_parts) + ".cs"
-        os.makedirs(os.path.dirname(summary_path), exist_ok=True)
-        with open(summary_path, "w", encoding="utf-8") as f:
-            registrations = chr(10).join(
-                f"        NodeToolTypes.KnownTypes.Add(typeof({cls.__name__}));"
-                for cls in sorted(classes, key=lambda c: c.__name__)
-            )
-            f.write(f"""//------------------------------------------------------------------------------
-// <auto-generated>
-//     This code was generated by the NodeTool SDK Type Generator.
-// </auto-generated>
-//------------------------------------------------------------------------------
+if TYPE_CHECKING:
+    from .discovery import DiscoveryOptions
+    from .session import DiscoverySession
 
-using System;
+# Rendering only needs descriptions. Discovery (and with it nodetool) is imported
+# only when no session or IR is passed in.
 
-namespace Nodetool.Types;
+def _default_session(jobs: int, options: "DiscoveryOptions | None", include_nodes: bool) -> "DiscoverySession":
+    from .session import DiscoverySession
+    return DiscoverySession(jobs, options, include_nodes=include_nodes)
 
-/// <summary>
-/// Types from {pkg_name} package (registration helpers).
-/// </summary>
-public static class {pkg_name}
-{{
-    internal static void RegisterTypes()
-    {{
-{registrations}
-    }}
-}}
-""")
-    
-    return generated, errors
+def _print_cache_stats(context: GeneratorContext) -> None:
+    summary = context.source.cache_summary()
+    if summary:
+        context.log(f"  Cache: {summary}")
+    summary = context.type_map.summary()
+    if summary:
+        context.log(f"  Type mapping memo: {summary}")
+    if profiling.active() is not None:
+        profiling.active().record_type_mapping(context.type_map.stats)
 
-def generate_nodes_for_source(source_name: str, nodes: List[type[BaseNode]], output_dir: str) -> tuple[int, int]:
-    """Generate C# classes for nodes from a specific source."""
-    generated = 0
-    errors = 0
-    
-    # Get clean names
-    pkg_name = get_package_name(source_name)  # e.g., 'nodetool-huggingface' -> 'Huggingface'
-    
-    # Create namespace-specific directory using pretty name
-    dir_parts = pkg_name.split('.')  # Support nested namespaces
-    source_dir = os.path.join(output_dir, "Nodes", *dir_parts)  # e.g., Nodes/Lib/Audio
-    
-    os.makedirs(source_dir, exist_ok=True)
-    
-    # Generate individual node files
-    for node_cls in nodes:
-        try:
-            src = generate_node_class_source(node_cls, source_name)
-            filename = f"{node_cls.__name__}.cs"
-            filepath = os.path.join(source_dir, filename)
-            
-            with open(filepath, "w", encoding="utf-8") as f:
-                f.write(src)
-            
-            generated += 1
-            
-        except Exception as e:
-            print(f"[ERROR] Error generating {node_cls.__name__}: {e}")
-            errors += 1
-    
-    # Generate summary file at package level (registration only; no placeholder code)
-    if generated > 0:
-        summary_path = os.path.join(output_dir, "Nodes", *dir_parts) + ".cs"
-        os.makedirs(os.path.dirname(summary_path), exist_ok=True)
-        with open(summary_path, "w", encoding="utf-8") as f:
-            registrations = chr(10).join(
-                f"        NodeToolTypes.KnownTypes.Add(typeof({node_cls.__name__}));"
-                for node_cls in sorted(nodes, key=lambda n: n.__name__)
-            )
-            f.write(f"""//------------------------------------------------------------------------------
-// <auto-generated>
-//     This code was generated by the NodeTool SDK Type Generator.
-// </auto-generated>
-//------------------------------------------------------------------------------
+def write_tagged_unions(tree: OutputTree | MemoryOutput, unions: TaggedUnions) -> List[str]:
+    """
+    Write `TypeManifest` (empty without tagged classes) and the tagged-union
+    bases with their formatters (see unions.py); returns their paths.
+    """
+    files = {TYPE_MANIFEST_FILE: render_type_manifest_source(unions.root)}
+    if unions.root is not None:
+        files[union_output_path(unions.root)] = render_union_root_source(unions)
+        for family in unions.families:
+            files[union_output_path(family)] = render_union_source(family, unions.root)
+    with profiling.phase("write"):
+        tree.write_all(sorted(files.items()))
+    return sorted(files)
 
-using System;
+def _report_tagged_unions(context: GeneratorContext) -> None:
+    unions = context.type_map.unions
+    if unions.root is None:
+        return
+    context.log(f"\n>>> Tagged unions: {len(unions.root.members)} classes, {len(unions.families)} family bases")
+    for name in unions.skipped:
+        context.log(f"[WARNING] No family base {name}: a generated class has that name")
+    for tag, members in unions.root.ambiguous.items():
+        names = ", ".join(m.csharp for m in members)
+        context.log(
+            f"[WARNING] Type tag '{tag}' is shared by {names}; {unions.root.name} does not decode it, "
+            f"TypeManifest lists {members[0].csharp}"
+        )
 
-namespace Nodetool.Nodes;
+def generate_types_for_source(
+    source_name: str,
+    classes: List[TypeSchema],
+    tree: OutputTree,
+    render_jobs: int = 1,
+) -> tuple[int, int]:
+    """Generate C# classes for a specific source (core or package)."""
+    result = render_and_write(type_jobs(source_name, classes), tree, render_jobs)
+    return result.count("type"), result.errors.get("type", 0)
 
-/// <summary>
-/// Nodes from {pkg_name} package (registration helpers).
-/// </summary>
-public static class {pkg_name}
-{{
-    internal static void RegisterTypes()
-    {{
-{registrations}
-    }}
-}}
-""")
-    
-    return generated, errors
+def generate_nodes_for_source(
+    source_name: str,
+    nodes: List[NodeSchema],
+    tree: OutputTree,
+    render_jobs: int = 1,
+) -> tuple[int, int]:
+    """Generate C# classes for nodes from a specific source."""
+    result = render_and_write(node_jobs(source_name, nodes), tree, render_jobs)
+    return result.count("node"), result.errors.get("node", 0)
+
+def formatter_table(
+    tree: OutputTree | MemoryOutput,
+    all_types: Dict[str, List[TypeSchema]],
+    all_nodes: Optional[Dict[str, List[NodeSchema]]],
+) -> Dict[str, str]:
+    """
+    C# type -> formatter expression: the generated formatter of every class whose
+    file `tree` has, and the formatters of the collections their members use
+    (see `codegen.member_formatters`).
+    """
+    files = tree.current_files()
+    jobs = itertools.chain(
+        itertools.chain.from_iterable(type_jobs(s, classes) for s, classes in all_types.items()),
+        itertools.chain.from_iterable(node_jobs(s, nodes) for s, nodes in (all_nodes or {}).items()),
+    )
+    table: Dict[str, str] = {}
+    member_types = set()
+    for job in jobs:
+        if job.rel_path in files:
+            table.update((cls, f"new {formatter}()") for cls, formatter in job_formatters(job))
+            member_types.update(job_member_types(job))
+    table.update(member_formatters(member_types))
+    return table
 
-def generate_summary_file(output_dir: str, discovered_packages: List[str]) -> None:
-    """Generate the main NodeToolTypes.cs file."""
+def generate_summary_file(
+    tree: OutputTree | MemoryOutput,
+    discovered_packages: List[str],
+    log: Callable[[str], None] = print,
+    tagged_unions: bool = False,
+    formatters: Optional[Dict[str, str]] = None,
+) -> None:
+    """
+    Generate the main NodeToolTypes.cs file: `NodeToolResolver`, a table of the
+    `formatters` (see `formatter_table`), and `NodeToolTypes.Resolver` / `Options`,
+    which put it (after `TaggedUnionResolver` if `tagged_unions`) ahead of
+    `BuiltinResolver`. Nothing assigns `MessagePackSerializer.DefaultOptions`:
+    callers pass `NodeToolTypes.Options` explicitly.
+    """
     # Package names are already in pretty format (e.g., 'Huggingface')
     package_names = sorted(discovered_packages)
-    print("\n>>> Generating NodeToolTypes.cs")
-    print(f"  Discovered packages: {', '.join(package_names)}")
+    log("\n>>> Generating NodeToolTypes.cs")
+    log(f"  Discovered packages: {', '.join(package_names)}")
     
-    # Generate registration lines for each package
-    registration_lines = []
     for pkg in package_names:
-        # Check if Types and/or Nodes directories exist for this package
-        has_types = False
-        has_nodes = False
+        # Nested namespaces (e.g., Lib.Audio) live in nested folders Lib/Audio
+        parts = pkg.split('.')
+        # Check whether this run generated types and/or nodes for the package
+        has_types = tree.has_files("/".join([TYPES_ROOT, *parts]))
+        has_nodes = tree.has_files("/".join([NODES_ROOT, *parts]))
         
-        if '.' in pkg:
-            # For nested namespaces (e.g., Lib.Audio) create nested folders Lib/Audio
-            parts = pkg.split('.')
-            namespace = pkg  # Keep full namespace for registration
-
-            type_dir = os.path.join(output_dir, "Types", *parts)
-            node_dir = os.path.join(output_dir, "Nodes", *parts)
-            
-            # Ensure directories exist (they may not if only other kind generated)
-            os.makedirs(type_dir, exist_ok=True)
-            os.makedirs(node_dir, exist_ok=True)
-        else:
-            # Regular packages
-            folder_path = pkg
-            namespace = pkg
-            type_dir = os.path.join(output_dir, "Types", pkg)
-            node_dir = os.path.join(output_dir, "Nodes", pkg)
-        
-        # Check if directories exist and have files
-        has_types = os.path.exists(type_dir) and any(f.endswith('.cs') for f in os.listdir(type_dir)) if os.path.exists(type_dir) else False
-        has_nodes = os.path.exists(node_dir) and any(f.endswith('.cs') for f in os.listdir(node_dir)) if os.path.exists(node_dir) else False
-        
-        print(f"  Package {namespace}:")
-        print(f"    Types: {'[x]' if has_types else '[ ]'} ({type_dir})")
-        print(f"    Nodes: {'[x]' if has_nodes else '[ ]'} ({node_dir})")
-        
-        # Only register what exists
-        if has_types:
-            registration_lines.append(f"            Types.{namespace}.RegisterTypes();")
-        if has_nodes:
-            registration_lines.append(f"            Nodes.{namespace}.RegisterTypes();")
+        log(f"  Package {pkg}:")
+        log(f"    Types: {'[x]' if has_types else '[ ]'} ({os.path.join(tree.output_dir, TYPES_ROOT, *parts)})")
+        log(f"    Nodes: {'[x]' if has_nodes else '[ ]'} ({os.path.join(tree.output_dir, NODES_ROOT, *parts)})")
     
-    print(f"  Total packages registered: {len(package_names)}")
+    log(f"  Total packages: {len(package_names)}")
     
     # Generate example lines
     example_lines = []
     if "Core" in package_names:
-        example_lines.append("    var audio = new Core.AudioRef();")
+        example_lines.append("///    var audio = new Core.AudioRef();")
     if "Huggingface" in package_names:
-        example_lines.append("    var classifier = new Huggingface.AudioClassifier();")
+        example_lines.append("///    var classifier = new Huggingface.AudioClassifier();")
     if "Lib.Audio" in package_names:
-        example_lines.append("    var noise = new Lib.Audio.WhiteNoise();")
+        example_lines.append("///    var noise = new Lib.Audio.WhiteNoise();")
     if not example_lines:
-        example_lines.append("    // var myType = new PackageName.TypeName();")
-    
-    summary_path = os.path.join(output_dir, "NodeToolTypes.cs")
-    with open(summary_path, "w", encoding="utf-8") as f:
-        f.write(f"""//------------------------------------------------------------------------------
+        example_lines.append("///    // var myType = new PackageName.TypeName();")
+
+    # Generated classes and the collections of their members resolve through the table;
+    # BuiltinResolver covers primitives. Neither reflects nor emits IL.
+    resolvers = ["Nodetool.NodeToolResolver.Instance", "MessagePack.Resolvers.BuiltinResolver.Instance"]
+    if tagged_unions:
+        # Abstract union bases are decoded by their tag.
+        resolvers.insert(0, "Nodetool.Types.TaggedUnionResolver.Instance")
+    formatters = formatters or {}
+    table_lines = [f"        [typeof({t})] = {formatters[t]}," for t in sorted(formatters)]
+    
+    tree.write(SUMMARY_FILE, f"""//------------------------------------------------------------------------------
 // <auto-generated>
 //     This code was generated by the NodeTool SDK Type Generator.
 // </auto-generated>
 //------------------------------------------------------------------------------
 
 using MessagePack;
+using MessagePack.Formatters;
 using System;
 using System.Collections.Generic;
 
 namespace Nodetool;
 
 /// <summary>
-/// Configures MessagePack serialization for all NodeTool types.
+/// MessagePack serialization of all NodeTool types.
 /// 
 /// Usage:
-/// 1. Initialize MessagePack:
-///    NodeToolTypes.Initialize();
-///    
-/// 2. Use types directly:
+/// 1. Use types directly:
 ///    using Nodetool.Types;
 ///    using Nodetool.Nodes;
 ///    
 {chr(10).join(example_lines)}
 ///    
-/// 3. MessagePack Serialization:
-///    var data = MessagePackSerializer.Serialize(obj);
-///    var obj = MessagePackSerializer.Deserialize<T>(data);
+/// 2. MessagePack Serialization, passing the options explicitly:
+///    var data = MessagePackSerializer.Serialize(obj, NodeToolTypes.Options);
+///    var obj = MessagePackSerializer.Deserialize<T>(data, NodeToolTypes.Options);
 /// </summary>
 public static class NodeToolTypes
 {{
-    private static bool isInitialized = false;
-    private static readonly object initLock = new object();
-    internal static readonly List<Type> KnownTypes = new();
+    /// <summary>
+    /// Resolves the formatters of generated types, their members and primitives.
+    /// </summary>
+    public static IFormatterResolver Resolver {{ get; }} = MessagePack.Resolvers.CompositeResolver.Create(
+{(","+chr(10)).join("        " + r for r in resolvers)}
+    );
 
-    public static void Initialize()
-    {{
-        if (isInitialized) return;
-
-        lock (initLock)
-        {{
-            if (isInitialized) return;
+    /// <summary>
+    /// Serializer options using <see cref="Resolver"/>.
+    /// </summary>
+    public static MessagePackSerializerOptions Options {{ get; }} = MessagePackSerializerOptions.Standard.WithResolver(Resolver);
+}}
 
-            // Register types from all packages
-{chr(10).join(registration_lines)}
+/// <summary>
+/// The generated formatter of every generated class, and the formatters of the
+/// collections their members use, from a table in generated code.
+/// Resolving one needs no reflection or IL emit, so it also works under NativeAOT and trimming.
+/// </summary>
+public sealed class NodeToolResolver : IFormatterResolver
+{{
+    public static readonly NodeToolResolver Instance = new NodeToolResolver();
 
-            // Configure MessagePack
-            var resolver = MessagePack.Resolvers.CompositeResolver.Create(
-                MessagePack.Resolvers.StandardResolver.Instance,
-                MessagePack.Resolvers.DynamicObjectResolver.Instance
-            );
+    private static readonly Dictionary<Type, object> Formatters = new Dictionary<Type, object>({len(table_lines)})
+    {{
+{chr(10).join(table_lines)}
+    }};
 
-            var options = MessagePackSerializerOptions.Standard.WithResolver(resolver);
-            MessagePackSerializer.DefaultOptions = options;
+    private NodeToolResolver()
+    {{
+    }}
 
-            // Register all types with MessagePack
-            foreach (var type in KnownTypes)
-            {{
-                MessagePackSerializer.SerializerCache.Get(type, options);
-            }}
+    public IMessagePackFormatter<T> GetFormatter<T>()
+    {{
+        return FormatterCache<T>.Formatter;
+    }}
 
-            isInitialized = true;
-        }}
+    private static class FormatterCache<T>
+    {{
+        public static readonly IMessagePackFormatter<T> Formatter =
+            Formatters.TryGetValue(typeof(T), out var formatter) ? (IMessagePackFormatter<T>)formatter : null;
     }}
 }}
 """)
 
-def cleanup_directory(output_dir: str) -> None:
-    """Clean up the output directory before generating new files."""
-    print("\n>>> Cleaning up output directory...")
-    
-    if os.path.exists(output_dir):
-        # Remove main directories
-        for dir_name in ["Types", "Nodes"]:
-            dir_path = os.path.join(output_dir, dir_name)
-            if os.path.exists(dir_path):
-                try:
-                    shutil.rmtree(dir_path)
-                    print(f"  Removed directory: {dir_name}/")
-                except Exception as e:
-                    print(f"  [ERROR] Could not remove directory {dir_name}: {e}")
-        
-        # Remove main summary file
-        summary_file = os.path.join(output_dir, "NodeToolTypes.cs")
-        if os.path.exists(summary_file):
-            try:
-                os.remove(summary_file)
-                print("  Removed: NodeToolTypes.cs")
-            except Exception as e:
-                print(f"  [ERROR] Could not remove NodeToolTypes.cs: {e}")
+def _finish_tree(tree: OutputTree, roots) -> None:
+    """Prune what this run no longer generates and report how much was rewritten."""
+    print("\n>>> Removing stale generated files...")
+    with profiling.phase("write"):
+        tree.prune(roots)
+    print(f"  Files: {tree.summary()}")
+
+def _plan_types(context: GeneratorContext) -> List[RenderJob]:
+    """Type render jobs of every source; also loads the context's C# name map, which rendering uses."""
+    with profiling.phase("type discovery"):
+        all_types = context.source.types()
+        # Provide a fully-qualified name map so node generation can reference types across packages.
+        context.load_type_names()
+    jobs = []
+    for source_name, classes in all_types.items():
+        if classes:
+            context.log(f"\n>>> Generating types from {source_name}...")
+            jobs.extend(type_jobs(source_name, classes))
+    return jobs
+
+def _plan_nodes(context: GeneratorContext) -> Iterator[RenderJob]:
+    """
+    Node render jobs of every source; rendering needs the name map loaded by `_plan_types` first.
+
+    Lazy: each source's nodes are discovered when the renderer reaches them, so
+    a package is written (and its modules released) before the next is imported.
+    """
+    sources = context.source.iter_nodes()
+    while True:
+        with profiling.phase("node discovery"):
+            source_name, nodes = next(sources, (None, None))
+        if source_name is None:
+            return
+        if nodes:
+            context.log(f"\n>>> Generating nodes from {source_name}...")
+            # Source-specific directory (support nested namespace parts), see output.nodes_dir
+            yield from node_jobs(source_name, nodes)
+
+def _report_types(context: GeneratorContext, result: RenderResult) -> int:
+    errors = result.errors.get("type", 0)
+    context.log(f"\n=== Type Generation Summary ===")
+    context.log(f"  Generated: {result.count('type')}")
+    context.log(f"  Errors: {errors}")
+    context.log(f"  Output: {context.output.output_dir}")
+    return errors
+
+def _report_nodes(context: GeneratorContext, result: RenderResult) -> int:
+    errors = result.errors.get("node", 0)
+    context.log(f"\nNode Generation Summary:")
+    context.log(f"  Generated: {result.count('node')}")
+    context.log(f"  Errors: {errors}")
+    context.log(f"  Output: {context.output.output_dir}")
+    return errors
+
+def _report_object_members(context: GeneratorContext, include_nodes: bool) -> None:
+    nodes = dict(context.source.iter_nodes()) if include_nodes else None
+    context.object_members = object_members.collect(context.source.types(), nodes)
+    object_members.report(context.object_members, context.log)
+
+def _render(context: GeneratorContext, jobs: Iterable[RenderJob], check_render: bool) -> RenderResult:
+    return render_and_write(jobs, context.output, context.render_jobs, check_render, context.log)
+
+def _generate_types(context: GeneratorContext, check_render: bool) -> int:
+    """Type files of every source; returns the number of errors."""
+    result = _render(context, _plan_types(context), check_render)
+    write_tagged_unions(context.output, context.type_map.unions)
+    errors = _report_types(context, result)
+    _report_tagged_unions(context)
+    _report_object_members(context, include_nodes=False)
+    _print_cache_stats(context)
+    return errors
+
+def _generate_nodes(context: GeneratorContext, check_render: bool) -> int:
+    """Node files of every source; returns the number of errors."""
+    # Types are needed to generate correct type references in node properties.
+    context.load_type_names()
+    result = _render(context, _plan_nodes(context), check_render)
+    errors = _report_nodes(context, result)
+    _report_object_members(context, include_nodes=True)
+    _print_cache_stats(context)
+    return errors
+
+def _generate_types_and_nodes(context: GeneratorContext, check_render: bool) -> int:
+    """Everything a full run renders, `NodeToolTypes.cs` included; returns the number of errors."""
+    log = context.log
+    # Discover all packages first (installed + workspace)
+    log(">>> Discovering packages...")
+    for error in context.source.package_errors():
+        log(f"[WARNING] Error discovering packages: {error}")
+    discovered_packages = context.source.package_names()
+    log(f"Found packages: {', '.join(discovered_packages)}")
+    
+    # Types are all discovered first (node files need their C# names); then each
+    # package's nodes are discovered, rendered and written before the next one.
+    planned = _plan_types(context)
+    log(f"\n>>> Rendering {len(planned)} type files, then the node files of each package...")
+    result = _render(context, itertools.chain(planned, _plan_nodes(context)), check_render)
+    write_tagged_unions(context.output, context.type_map.unions)
+    type_errors = _report_types(context, result)
+    node_errors = _report_nodes(context, result)
+    _report_tagged_unions(context)
+    _report_object_members(context, include_nodes=True)
+    _print_cache_stats(context)
+    if type_errors == 0 and node_errors == 0:
+        log("\nType and node generation completed successfully!")
+    else:
+        log(f"\nType and node generation completed with {type_errors + node_errors} errors")
     
-    # Create output directory if it doesn't exist
-    os.makedirs(output_dir, exist_ok=True)
-    print("Cleanup completed.")
+    # Generate summary file
+    with profiling.phase("summary"):
+        formatters = formatter_table(context.output, context.source.types(), context.source.nodes())
+        generate_summary_file(context.output, discovered_packages, log, context.type_map.unions.root is not None, formatters)
+    return type_errors + node_errors
+
+def _save_object_report(context: GeneratorContext, path: str | None) -> None:
+    if path:
+        object_members.save(context.object_members, path)
+        print(f"  Object member report: {os.path.abspath(path)}")
+
+def generate_sources(
+    source: SchemaSource,
+    namespace: str = "Nodetool.Types",
+    include_types: bool = True,
+    include_nodes: bool = True,
+    render_jobs: int = 1,
+    check_render: bool = False,
+    log: Callable[[str], None] = quiet,
+) -> Dict[str, str]:
+    """
+    Render the files of a run from `source` in memory, as `{relative path: source}`.
+
+    With both `include_*` the files are those of `generate_all_types_and_nodes`
+    (`NodeToolTypes.cs` included); otherwise those of `generate_all_types` or
+    `generate_all_nodes`. Nothing is written to disk and progress goes to `log`
+    (dropped by default). Safe to call from several threads at once; see
+    `context.py` for sources that still have to discover.
+    """
+    if not (include_types or include_nodes):
+        raise ValueError("nothing to generate: include_types and include_nodes are both False")
+    context = GeneratorContext(source, namespace, MemoryOutput(), render_jobs, log)
+    with context.active():
+        if include_types and include_nodes:
+            _generate_types_and_nodes(context, check_render)
+        elif include_types:
+            _generate_types(context, check_render)
+        else:
+            _generate_nodes(context, check_render)
+    return dict(context.output.files)
 
-def generate_all_types(output_dir: str, namespace: str = "Nodetool.Types") -> None:
-    """Generate C# classes for all BaseType subclasses from all sources."""
+def generate_all_types(
+    output_dir: str,
+    namespace: str = "Nodetool.Types",
+    jobs: int = 1,
+    options: "DiscoveryOptions | None" = None,
+    session: SchemaSource | None = None,
+    tree: OutputTree | None = None,
+    render_jobs: int = 1,
+    check_render: bool = False,
+    object_report: str | None = None,
+) -> None:
+    """
+    Generate C# classes for all BaseType subclasses from all sources.
+
+    Without `tree`, stale files under `Types/` are pruned afterwards.
+    `render_jobs` and `check_render` are passed to `render.render_and_write`.
+    `object_report` is a path for the list of members generated as `object`.
+    """
     print("=== NodeTool SDK Complete Type Generator ===")
     print(f"Output: {output_dir}")
     print(f"Namespace: {namespace}")
     print()
     
-    # Discover all types
-    all_types = discover_all_base_types()
-
-    # Provide a fully-qualified name map so node generation can reference types across packages.
-    set_known_csharp_type_names(_build_csharp_type_name_map(all_types))
-    
     # Create output directory
     os.makedirs(output_dir, exist_ok=True)
+    owns_tree = tree is None
+    tree = tree or OutputTree(output_dir)
     
-    # Track statistics
-    total_generated = 0
-    total_errors = 0
-    
-    # Generate types for each source
-    for source_name, classes in all_types.items():
-        if classes:
-            print(f"\n>>> Generating types from {source_name}...")
-            generated, errors = generate_types_for_source(source_name, classes, output_dir)
-            total_generated += generated
-            total_errors += errors
-    
-    print(f"\n=== Type Generation Summary ===")
-    print(f"  Generated: {total_generated}")
-    print(f"  Errors: {total_errors}")
-    print(f"  Output: {output_dir}")
+    # Discover all types
+    session = session or _default_session(jobs, options, include_nodes=False)
+    context = GeneratorContext(session, namespace, tree, render_jobs)
+    with context.active():
+        total_errors = _generate_types(context, check_render)
+    _save_object_report(context, object_report)
+    if owns_tree:
+        _finish_tree(tree, (TYPES_ROOT,))
     
     if total_errors == 0:
         print("\nType generation completed successfully!")
     else:
         print(f"\nType generation completed with {total_errors} errors.")
 
-def generate_all_nodes(output_dir: str, namespace: str = "Nodetool.Types") -> None:
-    """Generate C# classes for all BaseNode subclasses from all sources."""
+def generate_all_nodes(
+    output_dir: str,
+    namespace: str = "Nodetool.Types",
+    jobs: int = 1,
+    options: "DiscoveryOptions | None" = None,
+    session: SchemaSource | None = None,
+    tree: OutputTree | None = None,
+    render_jobs: int = 1,
+    check_render: bool = False,
+    object_report: str | None = None,
+) -> None:
+    """
+    Generate C# classes for all BaseNode subclasses from all sources.
+
+    Without `tree`, stale files under `Nodes/` are pruned afterwards.
+    `render_jobs` and `check_render` are passed to `render.render_and_write`.
+    `object_report` is a path for the list of members generated as `object`.
+    """
     print("=== NodeTool SDK Complete Node Generator ===")
     print(f"Output: {output_dir}")
     print(f"Namespace: {namespace}")
     print()
     
-    # Discover nodes and types (types are needed to generate correct type references in node properties).
-    all_types = discover_all_base_types()
-    set_known_csharp_type_names(_build_csharp_type_name_map(all_types))
-
-    all_nodes = discover_all_base_nodes()
-    
     # Create output directory
     os.makedirs(output_dir, exist_ok=True)
+    owns_tree = tree is None
+    tree = tree or OutputTree(output_dir)
     
-    # Track statistics
-    total_generated = 0
-    total_errors = 0
-    
-    # Generate nodes for each source
-    for source_name, nodes in all_nodes.items():
-        if nodes:
-            print(f"\n>>> Generating nodes from {source_name}...")
-            
-            # Create source-specific directory (support nested namespace parts)
-            dir_parts = [part.capitalize() for part in source_name.split('.')]
-            source_dir = os.path.join(output_dir, "Nodes", *dir_parts)
-            os.makedirs(source_dir, exist_ok=True)
-            
-            # Generate each node class
-            for node_cls in nodes:
-                try:
-                    src = generate_node_class_source(node_cls, source_name)
-                    filename = f"{node_cls.__name__}.cs"
-                    filepath = os.path.join(source_dir, filename)
-                    
-                    # Create subdirectories if needed
-                    os.makedirs(os.path.dirname(filepath), exist_ok=True)
-                    
-                    with open(filepath, "w", encoding="utf-8") as f:
-                        f.write(src)
-                    
-                    total_generated += 1
-                    
-                except Exception as e:
-                    print(f"[ERROR] Error generating {node_cls.__name__}: {e}")
-                    total_errors += 1
-    
-    print(f"\nNode Generation Summary:")
-    print(f"  Generated: {total_generated}")
-    print(f"  Errors: {total_errors}")
-    print(f"  Output: {output_dir}")
+    # Discover nodes and types (types are needed to generate correct type references in node properties).
+    session = session or _default_session(jobs, options, include_nodes=True)
+    context = GeneratorContext(session, namespace, tree, render_jobs)
+    with context.active():
+        total_errors = _generate_nodes(context, check_render)
+    _save_object_report(context, object_report)
+    if owns_tree:
+        _finish_tree(tree, (NODES_ROOT,))
     
     if total_errors == 0:
         print("\nNode generation completed successfully!")
     else:
         print(f"\nNode generation completed with {total_errors} errors")
 
-def generate_all_types_and_nodes(output_dir: str, namespace: str = "Nodetool.Types") -> None:
-    """Generate C# classes for all discovered BaseType and BaseNode subclasses."""
+def generate_all_types_and_nodes(
+    output_dir: str,
+    namespace: str = "Nodetool.Types",
+    jobs: int = 1,
+    options: "DiscoveryOptions | None" = None,
+    session: SchemaSource | None = None,
+    render_jobs: int = 1,
+    check_render: bool = False,
+    object_report: str | None = None,
+) -> None:
+    """
+    Generate C# classes for all discovered BaseType and BaseNode subclasses.
+
+    Types and nodes are rendered and written in one pipelined batch (see `render.py`).
+    `object_report` is a path for the list of members generated as `object`.
+    """
     print("=== NodeTool SDK Type & Node Generator ===")
     print(f"Output directory: {output_dir}")
     
-    # Clean up output directory first
-    cleanup_directory(output_dir)
-    
-    # Discover all packages first (installed + workspace)
-    print(">>> Discovering packages...")
-    try:
-        # First get packages from discover_node_packages
-        packages = discover_node_packages()
-        discovered_packages = set(["Core"])  # Start with Core
-        
-        # Add packages from discover_node_packages and Nodes directory
-        for p in packages:
-            discovered_packages.add(get_package_name(p.name))
-            
-        # Also scan workspace repos so local (non-installed) packages are included.
-        workspace_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "..", ".."))
-        for item in os.listdir(workspace_root):
-            if item.startswith("nodetool-") and os.path.isdir(os.path.join(workspace_root, item)):
-                discovered_packages.add(get_package_name(item))
-        
-        discovered_packages = sorted(list(discovered_packages))
-        print(f"Found packages: {', '.join(discovered_packages)}")
-    except Exception as e:
-        print(f"[WARNING] Error discovering packages: {e}")
-        discovered_packages = ["Core"]
-    
-    # Generate types and nodes
-    generate_all_types(output_dir, namespace)
-    generate_all_nodes(output_dir, namespace)
-    
-    # Generate summary file
-    generate_summary_file(output_dir, discovered_packages) 
\ No newline at end of file
+    # Files are only rewritten when their content changes; stale ones are pruned at the end.
+    os.makedirs(output_dir, exist_ok=True)
+    tree = OutputTree(output_dir)
+    # Sources modified after this are picked up by the next `--changed` run.
+    started = time.time()
+    
+    # One session for the whole run: packages, types and nodes are discovered once.
+    session = session or _default_session(jobs, options, include_nodes=True)
+    context = GeneratorContext(session, namespace, tree, render_jobs)
+    with context.active():
+        _generate_types_and_nodes(context, check_render)
+    _save_object_report(context, object_report)
+    _finish_tree(tree, ALL_ROOTS)
+
+    # Baseline for incremental runs (see incremental.py)
+    with profiling.phase("save graph"):
+        save_graph(output_dir, DependencyGraph.build(session.to_ir(), started))
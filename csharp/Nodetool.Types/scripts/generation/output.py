@@ -0,0 +1,281 @@
+"""
+Writing generated files without touching the ones that did not change.
+
+Regenerating used to delete `Types/` and `Nodes/` and write every file again,
+which bumps every mtime and makes MSBuild recompile the whole project. Instead,
+each rendered file is compared with the bytes already on disk and only
+replaced (atomically) when it differs. Files that a run no longer produces are
+found through a manifest of the previous run's files and deleted.
+"""
+import json
+import os
+import tempfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .schema import NodeSchema, TypeSchema
+from .unions import ROOT_NAMESPACE, Family
+from .utils import get_package_name
+
+MANIFEST_FILE_NAME = ".nodetool-codegen-manifest.json"
+
+# Everything the generator owns inside the output directory.
+TYPES_ROOT = "Types"
+NODES_ROOT = "Nodes"
+SUMMARY_FILE = "NodeToolTypes.cs"
+# Written with the tagged unions (see codegen.render_type_manifest_source).
+TYPE_MANIFEST_FILE = f"{TYPES_ROOT}/TypeManifest.cs"
+ALL_ROOTS = (TYPES_ROOT, NODES_ROOT, SUMMARY_FILE)
+
+# Threads `write_all` compares and replaces files on; most of the time goes to system calls.
+# With a single core, handing files to a thread only adds overhead.
+WRITE_THREADS = min(4, os.cpu_count() or 1)
+
+def types_dir(pkg_name: str) -> str:
+    """Directory of a package's type files; nested namespaces (Lib.Audio) become nested folders."""
+    return "/".join([TYPES_ROOT, *pkg_name.split(".")])
+
+def nodes_dir(source_name: str) -> str:
+    """Directory of the node files of one discovery source (see `generate_all_nodes`)."""
+    return "/".join([NODES_ROOT, *(part.capitalize() for part in source_name.split("."))])
+
+def type_output_path(source_name: str, schema: TypeSchema) -> str:
+    return f"{types_dir(get_package_name(source_name))}/{schema.name}.cs"
+
+def node_output_path(source_name: str, schema: NodeSchema) -> str:
+    return f"{nodes_dir(source_name)}/{schema.name}.cs"
+
+def union_output_path(family: Family) -> str:
+    """`Types/BaseType.cs` for the root base; a family base next to the type it is named after."""
+    package_parts = family.namespace[len(ROOT_NAMESPACE):].split(".")[1:]
+    return "/".join([TYPES_ROOT, *package_parts, f"{family.name}.cs"])
+
+def _under(rel_path: str, roots: Iterable[str]) -> bool:
+    return any(rel_path == root or rel_path.startswith(root + "/") for root in roots)
+
+def _new_file_mode() -> int:
+    """
+    Permissions `open(path, "w")` would give a new file.
+
+    Reading the umask means setting it, for the whole process, so call this
+    before any write threads start (see `OutputTree`).
+    """
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+def _replace_if_changed(path: str, data: bytes, new_mode: int) -> bool:
+    """
+    Atomically replace `path` with `data` unless it already holds exactly that.
+
+    The directory of `path` must exist. An existing file keeps its permissions;
+    a new one gets `new_mode` (see `_new_file_mode`).
+    """
+    try:
+        with open(path, "rb") as f:
+            if f.read() == data:
+                return False
+            mode = os.fstat(f.fileno()).st_mode & 0o777
+    except FileNotFoundError:
+        mode = new_mode
+
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        # mkstemp creates the file as 0600; keep the permissions of a plain write.
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return True
+
+class OutputTree:
+    """
+    The generated files of one run, relative to `output_dir`.
+
+    `write` records each file and replaces it only if its content changed.
+    A full run then calls `prune` to delete the files of earlier runs that were
+    not written again; an incremental run (`incremental=True`) removes files
+    explicitly and calls `save_manifest`.
+
+    New files get the permissions a plain write would give them, read once
+    here on the calling thread.
+    """
+
+    def __init__(self, output_dir: str, incremental: bool = False):
+        self.output_dir = output_dir
+        self.incremental = incremental
+        self.written: Set[str] = set()
+        self.removed_paths: Set[str] = set()
+        self.changed = 0
+        self.unchanged = 0
+        self.removed = 0
+        self._previous: Optional[List[str]] = None
+        self._directories: Set[str] = set()
+        self.new_file_mode = _new_file_mode()
+
+    def _path(self, rel_path: str) -> str:
+        return os.path.join(self.output_dir, *rel_path.split("/"))
+
+    def _target(self, rel_path: str) -> str:
+        """Record `rel_path` as written and create its directory (once)."""
+        self.written.add(rel_path)
+        self.removed_paths.discard(rel_path)
+        path = self._path(rel_path)
+        directory = os.path.dirname(path)
+        if directory not in self._directories:
+            os.makedirs(directory, exist_ok=True)
+            self._directories.add(directory)
+        return path
+
+    def _prepare(self, rel_path: str, text: str) -> Tuple[str, bytes, int]:
+        """`_target(rel_path)`, `text` encoded and the mode of a new file: `_replace_if_changed`'s arguments."""
+        # Same bytes as writing in text mode, so existing output compares equal on every platform.
+        return self._target(rel_path), text.replace("\n", os.linesep).encode("utf-8"), self.new_file_mode
+
+    def _count(self, changed: bool) -> bool:
+        if changed:
+            self.changed += 1
+        else:
+            self.unchanged += 1
+        return changed
+
+    def write(self, rel_path: str, text: str) -> bool:
+        """Write `text` to `rel_path` (a /-separated path) unless it already has that content."""
+        return self._count(_replace_if_changed(*self._prepare(rel_path, text)))
+
+    def write_bytes(self, rel_path: str, data: bytes) -> bool:
+        """Like `write`, for content that is already encoded as it is stored on disk."""
+        return self._count(_replace_if_changed(self._target(rel_path), data, self.new_file_mode))
+
+    def write_all(self, files: Iterable[Tuple[str, str]], threads: int = WRITE_THREADS) -> None:
+        """
+        Write `(rel_path, text)` pairs like `write`, on `threads` I/O threads.
+
+        `files` is consumed while earlier files are still being written, so it
+        can be a generator that renders them. At most `2 * threads` files are
+        in flight; bookkeeping stays on the calling thread.
+        """
+        if threads <= 1:
+            for rel_path, text in files:
+                self.write(rel_path, text)
+            return
+        with ThreadPoolExecutor(threads, thread_name_prefix="codegen-write") as pool:
+            pending = deque()
+            for rel_path, text in files:
+                pending.append(pool.submit(_replace_if_changed, *self._prepare(rel_path, text)))
+                if len(pending) >= 2 * threads:
+                    self._count(pending.popleft().result())
+            while pending:
+                self._count(pending.popleft().result())
+
+    def remove(self, rel_path: str) -> None:
+        """Delete a previously generated file."""
+        self.removed_paths.add(rel_path)
+        try:
+            os.remove(self._path(rel_path))
+            self.removed += 1
+            print(f"  Removed: {rel_path}")
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"  [ERROR] Could not remove {rel_path}: {e}")
+
+    def previous_files(self) -> List[str]:
+        """Files of the previous run: the manifest, or all `.cs` files if there is none."""
+        if self._previous is None:
+            try:
+                with open(os.path.join(self.output_dir, MANIFEST_FILE_NAME), encoding="utf-8") as f:
+                    self._previous = list(json.load(f)["files"])
+            except (OSError, ValueError, KeyError, TypeError):
+                self._previous = self._files_on_disk(ALL_ROOTS)
+        return self._previous
+
+    def current_files(self) -> Set[str]:
+        """Files of this run (or, if incremental, of the current output)."""
+        files = set(self.written)
+        if self.incremental:
+            files.update(p for p in self.previous_files() if p not in self.removed_paths)
+        return files
+
+    def has_files(self, rel_dir: str) -> bool:
+        """Whether `rel_dir` directly contains a `.cs` file of `current_files`."""
+        return any(os.path.dirname(p) == rel_dir and p.endswith(".cs") for p in self.current_files())
+
+    def _files_on_disk(self, roots: Iterable[str]) -> List[str]:
+        """Generated-looking files under `roots`, for output written before manifests existed."""
+        files = []
+        for root in roots:
+            path = self._path(root)
+            if os.path.isfile(path):
+                files.append(root)
+            for dirpath, _, filenames in os.walk(path):
+                rel_dir = os.path.relpath(dirpath, self.output_dir).replace(os.sep, "/")
+                files.extend(f"{rel_dir}/{name}" for name in filenames if name.endswith(".cs"))
+        return files
+
+    def _remove_empty_dirs(self, roots: Iterable[str]) -> None:
+        for root in roots:
+            path = self._path(root)
+            if not os.path.isdir(path):
+                continue
+            for dirpath, _, _ in sorted(os.walk(path), key=lambda w: len(w[0]), reverse=True):
+                if dirpath != path and not os.listdir(dirpath):
+                    os.rmdir(dirpath)
+
+    def save_manifest(self) -> None:
+        """Record the previous files minus the removed ones plus the written ones."""
+        files = (set(self.previous_files()) - self.removed_paths) | self.written
+        self._remove_empty_dirs(ALL_ROOTS)
+        manifest = json.dumps({"files": sorted(files)}, indent=1) + "\n"
+        _replace_if_changed(os.path.join(self.output_dir, MANIFEST_FILE_NAME), manifest.encode("utf-8"), self.new_file_mode)
+
+    def prune(self, roots: Iterable[str] = ALL_ROOTS) -> None:
+        """
+        Delete files under `roots` that an earlier run generated and this one did
+        not, and save the manifest.
+
+        Only call this once everything under `roots` has been written. Manifest
+        entries outside `roots` are kept as they are.
+        """
+        roots = tuple(roots)
+        for rel_path in sorted(set(self.previous_files()) - self.written):
+            if _under(rel_path, roots):
+                self.remove(rel_path)
+        self.save_manifest()
+
+    def summary(self) -> str:
+        return f"{self.changed} written, {self.unchanged} unchanged, {self.removed} removed"
+
+class MemoryOutput:
+    """
+    Generated files kept in memory as `{rel_path: text}` (see `context.GeneratorContext`).
+
+    Offers the part of `OutputTree` that rendering uses; nothing is written to disk.
+    """
+
+    output_dir = "<memory>"
+
+    def __init__(self):
+        self.files: Dict[str, str] = {}
+
+    def write(self, rel_path: str, text: str) -> bool:
+        changed = self.files.get(rel_path) != text
+        self.files[rel_path] = text
+        return changed
+
+    def write_all(self, files: Iterable[Tuple[str, str]], threads: int = 1) -> None:
+        for rel_path, text in files:
+            self.write(rel_path, text)
+
+    def current_files(self) -> Set[str]:
+        return set(self.files)
+
+    def has_files(self, rel_dir: str) -> bool:
+        return any(os.path.dirname(p) == rel_dir and p.endswith(".cs") for p in self.files)
+
+    def summary(self) -> str:
+        return f"{len(self.files)} files in memory"
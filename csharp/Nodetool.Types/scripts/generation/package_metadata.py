@@ -0,0 +1,228 @@
+"""
+Node descriptions read from package metadata instead of imported classes.
+
+`nodetool package scan --write` stores each package's `NodeMetadata` list in
+`src/nodetool/package_metadata/<name>.json`. This module turns those files
+into `NodeSchema` records without importing any node module, reproducing what
+`describe.describe_node` would produce from the live classes:
+
+- Property and output types are described from the structure of their
+  `TypeMetadata` (`describe.describe_type_metadata`): element types,
+  unions, optionality and enum values come from the metadata, and leaf
+  names go through the same lookup as `TypeMetadata.get_python_type()`, in
+  which primitives and BaseType `type` names resolve and anything else fails.
+- When a node has such a type, the live path falls back to the pydantic
+  fields; here the fallback is rebuilt from the same `TypeMetadata`, which
+  carries the structure of the original annotation.
+
+Metadata is not used when the scan recorded metadata failures, or, for a
+source checkout, when it is older than any source file under the nodes
+directory. The caller then imports the package as usual.
+"""
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from .context import progress
+from .schema import DefaultValue, FieldSchema, NodeSchema, TypeRef, TypeSchema, optional_ref
+from .static_scan import parse_module
+
+METADATA_DIR = "package_metadata"
+
+_PRIMITIVES = {"str", "int", "float", "bool", "bytes", "none", "object"}
+_CONTAINERS = {"list", "dict", "tuple"}
+
+class MetadataUnavailable(Exception):
+    """The package's metadata is missing or cannot be trusted; import it instead."""
+
+class _Unresolved(Exception):
+    pass
+
+class TypeNameResolver:
+    """Maps BaseType `type` names (as used in TypeMetadata) to described types."""
+
+    def __init__(self, all_types: Dict[str, List[TypeSchema]]):
+        self._by_name: Dict[str, TypeRef] = {}
+        for classes in all_types.values():
+            for schema in classes:
+                for f in schema.fields:
+                    if f.name == "type" and f.default.kind == "str":
+                        self._by_name[f.default.value] = TypeRef("base_type", schema.name, schema.module)
+
+    def get(self, name: str) -> Optional[TypeRef]:
+        return self._by_name.get(name)
+
+def _describe(meta: Dict[str, Any], resolver: TypeNameResolver, strict: bool) -> TypeRef:
+    """
+    TypeRef of a serialized TypeMetadata. `strict` raises _Unresolved for
+    names `get_python_type()` cannot resolve; otherwise they describe as unknown.
+    """
+    name = meta["type"]
+    args = tuple(_describe(a, resolver, strict) for a in meta.get("type_args", []))
+    if name in _CONTAINERS and args:
+        ref = TypeRef(name, args=args)
+    elif name == "union":
+        ref = TypeRef("union", args=args)
+    elif name == "enum":
+        module, _, enum_name = (meta.get("type_name") or "").rpartition(".")
+        ref = TypeRef("enum", enum_name, module, values=tuple(meta.get("values") or ()))
+    elif name in _PRIMITIVES:
+        ref = TypeRef("primitive", name)
+    elif name == "any":
+        ref = TypeRef("any")
+    elif name in _CONTAINERS:
+        ref = TypeRef("class", name, "builtins")
+    else:
+        ref = resolver.get(name)
+        if ref is None:
+            if strict:
+                raise _Unresolved(f"Unknown type: {name}")
+            ref = TypeRef("unknown", name)
+    return optional_ref(ref) if meta.get("optional") else ref
+
+def _python_type(meta: Dict[str, Any], resolver: TypeNameResolver) -> TypeRef:
+    """TypeRef of `describe.describe_type_metadata`; raises _Unresolved where that raises."""
+    return _describe(meta, resolver, strict=True)
+
+def _annotation(meta: Dict[str, Any], resolver: TypeNameResolver) -> TypeRef:
+    """TypeRef of the annotation the TypeMetadata was derived from (field fallback)."""
+    return _describe(meta, resolver, strict=False)
+
+def _default(value: Any, meta: Dict[str, Any], resolver: TypeNameResolver) -> DefaultValue:
+    """DefaultValue of a JSON-serialized default, as `describe_default` sees the original."""
+    if value is None:
+        return DefaultValue("none")
+    if isinstance(value, bool):
+        return DefaultValue("bool", value)
+    if isinstance(value, str):
+        return DefaultValue("str", value)
+    if isinstance(value, (int, float)):
+        return DefaultValue("number", value)
+    if isinstance(value, list):
+        # Tuples serialize as lists; describe_default leaves them unrendered.
+        return DefaultValue("unset") if meta["type"] == "tuple" else DefaultValue("list")
+    if isinstance(value, dict):
+        # BaseType defaults serialize via model_dump(), which includes their `type` name.
+        ref = resolver.get(value["type"]) if isinstance(value.get("type"), str) else None
+        return DefaultValue("base_type", type=ref) if ref is not None else DefaultValue("dict")
+    return DefaultValue("unset")
+
+def _class_name(nodes_path: str, namespace: str, short_name: str) -> Optional[str]:
+    """
+    Class name behind `node_type` (get_node_type() strips a trailing "Node").
+    None if the defining module is not under `nodes_path`.
+    """
+    rel = os.path.join(nodes_path, *namespace.split("."))
+    for path in (rel + ".py", os.path.join(rel, "__init__.py")):
+        if os.path.isfile(path):
+            info = parse_module(f"nodetool.nodes.{namespace}", path)
+            if info is not None and short_name + "Node" in info.classes and short_name not in info.classes:
+                return short_name + "Node"
+            return short_name
+    return None
+
+def _newest_source(nodes_path: str) -> float:
+    newest = 0.0
+    for root, _, files in os.walk(nodes_path):
+        for file in files:
+            if file.endswith(".py"):
+                newest = max(newest, os.path.getmtime(os.path.join(root, file)))
+    return newest
+
+def metadata_files(import_root: str) -> List[str]:
+    directory = os.path.join(import_root, "nodetool", METADATA_DIR)
+    if not os.path.isdir(directory):
+        return []
+    return [os.path.join(directory, f) for f in sorted(os.listdir(directory)) if f.endswith(".json")]
+
+def read_package_metadata(nodes_path: str, import_root: str) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    Load the metadata files that describe the nodes under `nodes_path` ([] if there are none).
+
+    Raises MetadataUnavailable if a source checkout's metadata is older than
+    its node sources, or if the scan recorded nodes whose metadata failed (the
+    live path would still render those).
+    """
+    files = metadata_files(import_root)
+    if not files:
+        return []
+    # Installed packages ship code and metadata together; only checkouts go stale.
+    is_checkout = os.path.isfile(os.path.join(os.path.dirname(import_root), "pyproject.toml"))
+    if is_checkout and min(os.path.getmtime(f) for f in files) < _newest_source(nodes_path):
+        raise MetadataUnavailable("package metadata is older than the node sources")
+
+    packages = []
+    for path in files:
+        try:
+            with open(path, encoding="utf-8") as f:
+                package = json.load(f)
+        except (OSError, ValueError) as e:
+            raise MetadataUnavailable(f"cannot read {path}: {e}")
+        if any("metadata_failed" in w for w in package.get("warnings", [])):
+            raise MetadataUnavailable(f"{os.path.basename(path)} records nodes without metadata")
+        packages.append((path, package))
+    return packages
+
+def describe_metadata_node(
+    node: Dict[str, Any],
+    class_name: str,
+    module: str,
+    resolver: TypeNameResolver,
+    source: str = "",
+) -> NodeSchema:
+    """NodeSchema for one serialized NodeMetadata (see module docstring)."""
+    properties = node.get("properties", [])
+    try:
+        return NodeSchema(
+            name=class_name,
+            module=module,
+            properties=[
+                FieldSchema(p["name"], _python_type(p["type"], resolver), _default(p.get("default"), p["type"], resolver))
+                for p in properties
+            ],
+            outputs=[
+                FieldSchema(o["name"], _python_type(o["type"], resolver))
+                for o in node.get("outputs", [])
+            ],
+            source=source,
+        )
+    except _Unresolved as e:
+        progress(f"Warning: Could not get metadata for {class_name}: {e}")
+        return NodeSchema(
+            name=class_name,
+            module=module,
+            properties=[
+                FieldSchema(p["name"], _annotation(p["type"], resolver), _default(p.get("default"), p["type"], resolver))
+                for p in properties
+                if not p["name"].startswith("_")
+            ],
+            source=source,
+        )
+
+def describe_package_nodes(
+    packages: List[Tuple[str, Dict[str, Any]]],
+    nodes_path: str,
+    resolver: TypeNameResolver,
+    indent: str = "    ",
+    package_name: Optional[str] = None,
+) -> List[NodeSchema]:
+    """
+    Describe the nodes from `read_package_metadata` that are defined under `nodes_path`.
+
+    When `package_name` is given it replaces each node's module, as in import-based discovery.
+    """
+    nodes: List[NodeSchema] = []
+    for path, package in packages:
+        count = 0
+        for node in package.get("nodes") or []:
+            namespace, _, short_name = node["node_type"].rpartition(".")
+            namespace = node.get("namespace", namespace)
+            class_name = _class_name(nodes_path, namespace, short_name)
+            if class_name is None:
+                continue  # Node of another package sharing this metadata directory
+            source = f"nodetool.nodes.{namespace}"
+            nodes.append(describe_metadata_node(node, class_name, package_name or source, resolver, source))
+            count += 1
+        if count:
+            progress(f"{indent}[OK] {os.path.basename(path)}: {count} nodes from package metadata")
+    return nodes
@@ -0,0 +1,274 @@
+"""
+Where a generator run spends its time (`--profile`, `--cprofile`, `--profile-stacks`).
+
+`--profile` records, in this process:
+
+- wall and CPU time per phase (package index, type discovery, node discovery,
+  render, write, summary, ...). Phases nest exclusively: while an inner phase
+  runs, the outer one is paused, so the phase times add up to the run time
+  (minus what no phase covers, reported as "other").
+- every module the scanner imports: wall and CPU time of the import plus
+  describing its classes (`get_metadata()` included; `describe_seconds` is
+  that part alone), and the tracemalloc peak while doing so. Modules served
+  from the metadata cache are not imported and do not appear.
+- the hit rates of the type mapping memos (`CSharpTypeMap.stats` of each
+  generation, see `record_type_mapping`).
+
+tracemalloc slows down allocation-heavy code, so profiled runs are slower
+than unprofiled ones; compare profiles with each other. Discovery workers
+(`--jobs`) are not profiled, only the time spent waiting for them.
+
+`--cprofile` dumps `cProfile` statistics (for `pstats` or snakeviz) and
+`--profile-stacks` samples the main thread's stack every few milliseconds and
+writes collapsed stacks (one `frame;frame;... count` line per stack) for
+flamegraph.pl or speedscope.
+"""
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, Iterator, List, Optional, TypeVar
+
+from .utils import MemoStats
+
+T = TypeVar("T")
+
+# Seconds between two samples of `StackSampler`.
+SAMPLE_INTERVAL = 0.005
+
+@dataclass
+class PhaseStats:
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    calls: int = 0
+
+@dataclass
+class ModuleStats:
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    describe_seconds: float = 0.0
+    peak_bytes: int = 0  # tracemalloc peak above what was allocated before
+    retained_bytes: int = 0  # still allocated afterwards (the module, its classes, ...)
+    loads: int = 0
+
+class Profiler:
+    """Phase and per-module measurements of one run."""
+
+    def __init__(self, trace_memory: bool = True):
+        self.trace_memory = trace_memory
+        self.phases: Dict[str, PhaseStats] = {}
+        self.modules: Dict[str, ModuleStats] = {}
+        self.type_mapping: Dict[str, MemoStats] = {}
+        # Running phases, innermost last: [name, wall started, cpu started]
+        self._stack: List[list] = []
+        self._started = (time.perf_counter(), time.process_time())
+        self._finished: Optional[tuple] = None
+        self._traced_peak: Optional[int] = None
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def _charge(self, entry: list, wall: float, cpu: float) -> None:
+        stats = self.phases.setdefault(entry[0], PhaseStats())
+        stats.wall_seconds += wall - entry[1]
+        stats.cpu_seconds += cpu - entry[2]
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        wall, cpu = time.perf_counter(), time.process_time()
+        if self._stack:
+            self._charge(self._stack[-1], wall, cpu)
+        entry = [name, wall, cpu]
+        self._stack.append(entry)
+        self.phases.setdefault(name, PhaseStats()).calls += 1
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter(), time.process_time()
+            self._charge(entry, wall, cpu)
+            self._stack.pop()
+            if self._stack:
+                self._stack[-1][1:] = [wall, cpu]
+
+    def load(self, module_name: str, load: Callable[[Callable], T], describe: Callable) -> T:
+        """`load(describe)`, measured as the import of `module_name`."""
+        stats = self.modules.setdefault(module_name, ModuleStats())
+
+        def timed_describe(module):
+            started = time.perf_counter()
+            try:
+                return describe(module)
+            finally:
+                stats.describe_seconds += time.perf_counter() - started
+
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        if tracing:
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            return load(timed_describe)
+        finally:
+            stats.wall_seconds += time.perf_counter() - wall
+            stats.cpu_seconds += time.process_time() - cpu
+            stats.loads += 1
+            if tracing:
+                current, peak = tracemalloc.get_traced_memory()
+                stats.peak_bytes = max(stats.peak_bytes, peak - before)
+                stats.retained_bytes += current - before
+
+    def finish(self) -> None:
+        if self._finished is None:
+            self._finished = (time.perf_counter(), time.process_time())
+            if self.trace_memory and tracemalloc.is_tracing():
+                self._traced_peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+
+    def report(self) -> dict:
+        self.finish()
+        wall = self._finished[0] - self._started[0]
+        cpu = self._finished[1] - self._started[1]
+        phases = {name: asdict(stats) for name, stats in self.phases.items()}
+        phases["other"] = {
+            "wall_seconds": wall - sum(s.wall_seconds for s in self.phases.values()),
+            "cpu_seconds": cpu - sum(s.cpu_seconds for s in self.phases.values()),
+            "calls": 0,
+        }
+        modules = sorted(self.modules.items(), key=lambda item: item[1].wall_seconds, reverse=True)
+        return {
+            "argv": sys.argv,
+            "pid": os.getpid(),
+            "wall_seconds": wall,
+            "cpu_seconds": cpu,
+            "tracemalloc_peak_bytes": self._traced_peak,
+            "phases": phases,
+            "modules": [{"module": name, **asdict(stats)} for name, stats in modules],
+            "type_mapping_memo": {name: asdict(stats) for name, stats in self.type_mapping.items()},
+        }
+
+    def record_type_mapping(self, stats: Dict[str, MemoStats]) -> None:
+        """Add the memo counters of one generation's C# name map."""
+        for name, memo in stats.items():
+            total = self.type_mapping.setdefault(name, MemoStats())
+            total.hits += memo.hits
+            total.misses += memo.misses
+
+    def print_summary(self, top: int = 10) -> None:
+        report = self.report()
+        print(f"\n=== Profile ({report['wall_seconds']:.2f}s wall, {report['cpu_seconds']:.2f}s CPU) ===")
+        for name, stats in sorted(report["phases"].items(), key=lambda item: item[1]["wall_seconds"], reverse=True):
+            print(f"  {name:<16} {stats['wall_seconds']:8.3f}s wall {stats['cpu_seconds']:8.3f}s CPU")
+        if report["modules"]:
+            print(f"  Slowest of {len(report['modules'])} imported modules:")
+            for entry in report["modules"][:top]:
+                print(f"    {entry['wall_seconds']:8.3f}s {entry['peak_bytes'] / 1e6:8.1f} MB peak  {entry['module']}")
+
+class StackSampler:
+    """Samples the stack of one thread in the background and counts identical stacks."""
+
+    def __init__(self, thread_id: Optional[int] = None, interval: float = SAMPLE_INTERVAL):
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.interval = interval
+        self.counts: Dict[str, int] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="codegen-stack-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                frames.append(f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if frames:
+                stack = ";".join(reversed(frames))
+                self.counts[stack] = self.counts.get(stack, 0) + 1
+
+    def write(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in sorted(self.counts.items()):
+                f.write(f"{stack} {count}\n")
+
+def _short_path(path: str) -> str:
+    """The last two components of `path` (`package/module.py`), without `;` for the collapsed format."""
+    parts = path.replace("\\", "/").split("/")
+    return "/".join(parts[-2:]).replace(";", "_")
+
+_ACTIVE: Optional[Profiler] = None
+
+def active() -> Optional[Profiler]:
+    return _ACTIVE
+
+def phase(name: str):
+    """Context manager timing a phase of the active profiler (does nothing without one)."""
+    return _ACTIVE.phase(name) if _ACTIVE is not None else nullcontext()
+
+def timed_iter(name: str, items: Iterator[T]) -> Iterator[T]:
+    """`items`, with the time spent producing each item charged to phase `name`."""
+    if _ACTIVE is None:
+        return items
+
+    def timed():
+        while True:
+            with _ACTIVE.phase(name):
+                try:
+                    item = next(items)
+                except StopIteration:
+                    return
+            yield item
+
+    return timed()
+
+@contextmanager
+def profiled(
+    report_path: Optional[str] = None,
+    cprofile_path: Optional[str] = None,
+    stacks_path: Optional[str] = None,
+) -> Iterator[Optional[Profiler]]:
+    """
+    Profile the enclosed code and write whichever outputs have a path.
+
+    The outputs are written even if the code raises (including SystemExit).
+    """
+    global _ACTIVE
+    profiler = Profiler() if report_path else None
+    sampler = StackSampler() if stacks_path else None
+    cprofiler = None
+    if cprofile_path:
+        import cProfile
+        cprofiler = cProfile.Profile()
+    _ACTIVE = profiler
+    if sampler is not None:
+        sampler.start()
+    if cprofiler is not None:
+        cprofiler.enable()
+    try:
+        yield profiler
+    finally:
+        if cprofiler is not None:
+            cprofiler.disable()
+        if sampler is not None:
+            sampler.stop()
+            sampler.write(stacks_path)
+            print(f"\nSaved {sum(sampler.counts.values())} stack samples: {os.path.abspath(stacks_path)}")
+        if cprofiler is not None:
+            cprofiler.dump_stats(cprofile_path)
+            print(f"\nSaved cProfile stats: {os.path.abspath(cprofile_path)}")
+        if profiler is not None:
+            _ACTIVE = None
+            profiler.print_summary()
+            with open(report_path, "w", encoding="utf-8") as f:
+                json.dump(profiler.report(), f, indent=1)
+                f.write("\n")
+            print(f"Saved profile: {os.path.abspath(report_path)}")
@@ -0,0 +1,92 @@
+"""
+Modules that took too long to import (`--import-timeout`).
+
+With an import budget, discovery runs in worker interpreters (see
+`discovery._run_isolated`) that announce each module before importing it. A
+worker that spends longer than the budget on one module (a model download, a
+socket that never answers, ...) is killed, the module is quarantined and the
+package is discovered again without it.
+
+The quarantine is kept in `.nodetool-codegen-quarantine.json` in the output
+directory. Every later run skips the modules listed there, with or without a
+budget, until their source changes or `--retry-quarantined` is given. Runs
+with a budget update the file: a quarantined module that imports within the
+budget again is taken off the list.
+"""
+import hashlib
+import json
+import os
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, List, Optional
+
+from .context import progress
+
+QUARANTINE_FILE_NAME = ".nodetool-codegen-quarantine.json"
+
+@dataclass
+class QuarantinedModule:
+    module: str
+    path: str
+    package: str
+    seconds: float  # the budget the import exceeded
+    digest: str  # of the source at the time; an edited module is tried again
+    quarantined_at: float
+
+def source_digest(path: str) -> str:
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return ""
+
+class Quarantine:
+    """The quarantine file of one output directory (in memory until `save`)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.modules: Dict[str, QuarantinedModule] = {}
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            for entry in data["modules"]:
+                module = QuarantinedModule(**entry)
+                self.modules[module.module] = module
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            progress(f"[WARNING] Ignoring unreadable quarantine file {path}: {e}")
+        self._changed = False
+
+    def entry(self, module_name: str, module_path: str) -> Optional[QuarantinedModule]:
+        """The quarantine entry of a module, unless its source changed since."""
+        module = self.modules.get(module_name)
+        if module is None or module.digest != source_digest(module_path):
+            return None
+        return module
+
+    def add(self, module_name: str, module_path: str, package: str, seconds: float) -> QuarantinedModule:
+        module = QuarantinedModule(module_name, module_path, package, seconds, source_digest(module_path), time.time())
+        self.modules[module_name] = module
+        self._changed = True
+        return module
+
+    def release(self, module_names: Iterable[str]) -> List[QuarantinedModule]:
+        """Take modules off the list; returns the entries that were on it."""
+        released = [self.modules.pop(name) for name in module_names if name in self.modules]
+        if released:
+            self._changed = True
+        return released
+
+    def save(self) -> None:
+        if not self._changed:
+            return
+        if self.modules:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            data = {"modules": [asdict(m) for _, m in sorted(self.modules.items())]}
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=1)
+                f.write("\n")
+        elif os.path.exists(self.path):
+            os.remove(self.path)
+        self._changed = False
@@ -0,0 +1,175 @@
+"""
+Rendering generated files on a process pool while writing them on I/O threads.
+
+Every type and node file is a `RenderJob`. Rendering only needs the schema
+and the C# name map, so with `workers > 1` the jobs are rendered in spawned
+worker processes, in order and in chunks, while the calling thread hands each
+finished file to `OutputTree.write_all`. Types and nodes are rendered in one
+batch: once discovery has produced the name map, neither depends on the other.
+
+Jobs can be a lazy iterable: only a few chunks are taken ahead of the files
+being written, so a caller can discover nodes package by package while the
+previous package is rendered (see `orchestrator._plan_nodes`).
+
+The output does not depend on the number of workers. `check=True` renders
+every job again serially in this process and raises `RenderMismatch` if any
+file differs.
+"""
+import itertools
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from . import profiling
+from .codegen import node_formatters, node_member_types, render_node_source, render_type_source, type_formatters, type_member_types
+from .output import OutputTree, node_output_path, type_output_path
+from .schema import NodeSchema, TypeSchema
+from .unions import TaggedUnions
+from .utils import get_package_name, known_csharp_type_names, known_tagged_unions, set_known_csharp_type_names
+
+# Jobs sent to a worker at a time, and chunks in flight per worker.
+CHUNK_SIZE = 32
+CHUNKS_PER_WORKER = 4
+
+class RenderMismatch(Exception):
+    """Rendering on the worker pool produced different output than serial rendering."""
+
+@dataclass(frozen=True)
+class RenderJob:
+    """One type (`kind == "type"`) or node (`kind == "node"`) file of a discovery source."""
+    kind: str
+    source_name: str
+    schema: Union[TypeSchema, NodeSchema]
+
+    @property
+    def rel_path(self) -> str:
+        if self.kind == "type":
+            return type_output_path(self.source_name, self.schema)
+        return node_output_path(self.source_name, self.schema)
+
+def type_jobs(source_name: str, classes: List[TypeSchema]) -> List[RenderJob]:
+    return [RenderJob("type", source_name, cls) for cls in classes]
+
+def node_jobs(source_name: str, nodes: List[NodeSchema]) -> List[RenderJob]:
+    return [RenderJob("node", source_name, node) for node in nodes]
+
+def render_job(job: RenderJob) -> str:
+    if job.kind == "type":
+        return render_type_source(job.schema, f"Nodetool.Types.{get_package_name(job.source_name)}")
+    return render_node_source(job.schema, job.source_name)
+
+def job_formatters(job: RenderJob) -> List[Tuple[str, str]]:
+    """`(class, formatter)` C# names of the classes in the file of `job`."""
+    if job.kind == "type":
+        return type_formatters(job.schema, f"Nodetool.Types.{get_package_name(job.source_name)}")
+    return node_formatters(job.schema, job.source_name)
+
+def job_member_types(job: RenderJob) -> List[str]:
+    """C# types of the members of the classes in the file of `job`."""
+    if job.kind == "type":
+        return type_member_types(job.schema)
+    return node_member_types(job.schema)
+
+def _render_or_error(job: RenderJob) -> Tuple[Optional[str], Optional[str]]:
+    try:
+        return render_job(job), None
+    except Exception as e:
+        return None, str(e)
+
+def _render_chunk(jobs: List[RenderJob]) -> List[Tuple[Optional[str], Optional[str]]]:
+    return [_render_or_error(job) for job in jobs]
+
+def _init_worker(type_names: Dict[str, str], unions: TaggedUnions) -> None:
+    set_known_csharp_type_names(type_names, unions)
+
+def _rendered(jobs: Iterable[RenderJob], workers: int) -> Iterator[Tuple[RenderJob, Optional[str], Optional[str]]]:
+    """(job, source, error) per job, in job order."""
+    jobs = iter(jobs)
+    first = list(itertools.islice(jobs, 2))
+    jobs = itertools.chain(first, jobs)
+    if workers == 1 or len(first) < 2:
+        for job in jobs:
+            yield (job, *_render_or_error(job))
+        return
+    with ProcessPoolExecutor(
+        workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(known_csharp_type_names(), known_tagged_unions()),
+    ) as pool:
+        # Like pool.map, but takes jobs from the iterable only as chunks complete.
+        pending = deque()
+        while True:
+            chunk = list(itertools.islice(jobs, CHUNK_SIZE))
+            if chunk:
+                pending.append((chunk, pool.submit(_render_chunk, chunk)))
+            if pending and (not chunk or len(pending) >= workers * CHUNKS_PER_WORKER):
+                done, future = pending.popleft()
+                for job, (src, error) in zip(done, future.result()):
+                    yield job, src, error
+            elif not chunk:
+                return
+
+@dataclass
+class RenderResult:
+    generated: Dict[Tuple[str, str], int] = field(default_factory=dict)  # (kind, source) -> files
+    errors: Dict[str, int] = field(default_factory=dict)  # kind -> failed jobs
+
+    def count(self, kind: str, source_name: Optional[str] = None) -> int:
+        return sum(n for (k, s), n in self.generated.items() if k == kind and source_name in (None, s))
+
+def render_and_write(
+    jobs: Iterable[RenderJob],
+    tree: OutputTree,
+    workers: int = 1,
+    check: bool = False,
+    log: Callable[[str], None] = print,
+) -> RenderResult:
+    """
+    Render `jobs` (on `workers` processes; 0 = one per CPU core) and write them to `tree`.
+
+    Uses this thread's C# name map (see `set_known_csharp_type_names`). `jobs`
+    is consumed while files are written; errors are reported through `log`.
+    """
+    workers = workers if workers > 0 else (os.cpu_count() or 1)
+    result = RenderResult()
+    rendered: Dict[str, str] = {}
+    checked: List[RenderJob] = []
+
+    def files():
+        for job, src, error in profiling.timed_iter("render", _rendered(jobs, workers)):
+            if check:
+                checked.append(job)
+            if error is not None:
+                where = f" from {get_package_name(job.source_name)}" if job.kind == "type" else ""
+                log(f"[ERROR] Error generating {job.schema.name}{where}: {error}")
+                result.errors[job.kind] = result.errors.get(job.kind, 0) + 1
+                continue
+            key = (job.kind, job.source_name)
+            result.generated[key] = result.generated.get(key, 0) + 1
+            if check:
+                rendered[job.rel_path] = src
+            yield job.rel_path, src
+
+    with profiling.phase("write"):
+        tree.write_all(files())
+    if check:
+        verify_serial(checked, rendered, log)
+    return result
+
+def verify_serial(jobs: List[RenderJob], rendered: Dict[str, str], log: Callable[[str], None] = print) -> None:
+    """Render `jobs` again in this process and compare with `rendered` (path -> source)."""
+    log(f"\n>>> Checking {len(rendered)} rendered files against serial rendering...")
+    mismatches = []
+    for job in jobs:
+        src, _ = _render_or_error(job)
+        if rendered.get(job.rel_path) != src:
+            mismatches.append(job.rel_path)
+    for rel_path in mismatches:
+        log(f"[ERROR] Differs from serial rendering: {rel_path}")
+    if mismatches:
+        raise RenderMismatch(f"{len(mismatches)} files differ from serial rendering")
+    log("  [OK] Identical to serial rendering")
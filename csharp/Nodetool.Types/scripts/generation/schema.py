@@ -0,0 +1,96 @@
+"""
+Picklable, JSON-serializable descriptions of BaseType and BaseNode subclasses.
+
+These records are the intermediate representation between discovery and
+codegen: discovery reduces live classes to them (see `describe.py`) and
+codegen renders them without importing any nodetool package. `ir.py` saves
+and loads them as JSON.
+"""
+from dataclasses import dataclass, field
+from typing import Any, List, Optional
+
+# Bump whenever the shape or meaning of the descriptions below changes, so that
+# persisted descriptions (see cache.py and ir.py) from older generators are not reused.
+SCHEMA_VERSION = 4
+
+@dataclass(frozen=True)
+class TypeRef:
+    """
+    A Python type annotation reduced to plain data.
+
+    `kind` is one of: primitive, base_type, enum, class, any, literal, list,
+    dict, set, tuple, union, ellipsis, unknown. Class references carry their
+    `module` and `name`; generic kinds carry their arguments in `args`;
+    literals and enums carry their values in `values`.
+    """
+    kind: str
+    name: str = ""
+    module: str = ""
+    args: tuple["TypeRef", ...] = ()
+    values: tuple[Any, ...] = ()
+
+    @property
+    def key(self) -> str:
+        return f"{self.module}.{self.name}"
+
+NONE_REF = TypeRef("primitive", "none")
+
+def optional_ref(ref: TypeRef) -> TypeRef:
+    """`ref | None`, added to the members if `ref` is already a union."""
+    if ref == NONE_REF or (ref.kind == "union" and NONE_REF in ref.args):
+        return ref
+    return TypeRef("union", args=(ref.args if ref.kind == "union" else (ref,)) + (NONE_REF,))
+
+@dataclass(frozen=True)
+class DefaultValue:
+    """
+    A field default reduced to plain data.
+
+    `kind` is one of: none, str, bool, number, list, dict, base_type, unset.
+    `unset` covers required fields and defaults codegen does not render.
+    """
+    kind: str
+    value: Any = None
+    type: Optional[TypeRef] = None
+
+@dataclass
+class FieldSchema:
+    name: str
+    type: TypeRef
+    default: DefaultValue = field(default_factory=lambda: DefaultValue("unset"))
+
+@dataclass
+class TypeSchema:
+    """
+    Description of a BaseType subclass.
+
+    `base` is the `type_key` of the closest BaseType subclass it derives from
+    (empty if it derives from BaseType directly); see unions.py.
+    """
+    name: str
+    module: str
+    fields: List[FieldSchema] = field(default_factory=list)
+    base: str = ""
+
+    @property
+    def key(self) -> str:
+        return f"{self.module}.{self.name}"
+
+@dataclass
+class NodeSchema:
+    """
+    Description of a BaseNode subclass.
+
+    `outputs` is None when `get_metadata()` failed and `properties` was taken
+    from the pydantic fields instead. `source` is the module that defines the
+    class; `module` may have been replaced by a package name.
+    """
+    name: str
+    module: str
+    properties: List[FieldSchema] = field(default_factory=list)
+    outputs: Optional[List[FieldSchema]] = None
+    source: str = ""
+
+def type_key(cls: type) -> str:
+    """Stable identifier for a class that survives process boundaries."""
+    return f"{cls.__module__}.{cls.__name__}"
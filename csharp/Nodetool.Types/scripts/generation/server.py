@@ -0,0 +1,256 @@
+"""
+Node descriptions fetched from a running NodeTool server.
+
+The server already has every package loaded, so `/api/nodes/metadata` returns
+the same `NodeMetadata` records that `nodetool package scan` writes, for all of
+them in one response. They are described with `package_metadata`, so this
+machine needs neither the packages nor their ML dependencies.
+
+The paged `/api/sdk/v1/node-types` inventory is fetched alongside it (pages
+concurrently, over a small pool of keep-alive connections) to check that the
+server's registry is ready and did not change while it was read, and to report
+packs the server could not load.
+
+The server does not describe BaseTypes, so types come from another source (a
+`--from-ir` file or local discovery). Nodes are grouped into packages by the
+first segment of their namespace.
+"""
+import gzip
+import http.client
+import json
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+from .context import progress
+from .ir import GeneratorIR
+from .package_metadata import TypeNameResolver, describe_metadata_node
+from .schema import NodeSchema, TypeSchema
+from .utils import get_package_name
+
+if TYPE_CHECKING:
+    from .session import DiscoverySession
+
+NODES_METADATA_ENDPOINT = "/api/nodes/metadata?fields=full"
+NODE_TYPE_INVENTORY_ENDPOINT = "/api/sdk/v1/node-types"
+INVENTORY_PAGE_SIZE = 100  # The server's maximum
+DEFAULT_CONNECTIONS = 8
+API_KEY_ENV = "NODETOOL_API_KEY"
+
+class ServerError(Exception):
+    """The server could not be reached or returned something unusable."""
+
+class HTTPStatusError(ServerError):
+    def __init__(self, path: str, status: int, reason: str):
+        super().__init__(f"GET {path}: HTTP {status} {reason}")
+        self.status = status
+
+class ConnectionPool:
+    """
+    Keep-alive connections to one server, shared by worker threads.
+
+    A connection is checked out for one request/response and then returned, so
+    at most `size` requests are in flight and no request pays for a new TCP (or
+    TLS) handshake once the pool is warm.
+    """
+
+    def __init__(self, base_url: str, size: int = DEFAULT_CONNECTIONS, timeout: float = 60.0):
+        parts = urlsplit(base_url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ServerError(f"Not an http(s) URL: {base_url}")
+        self._connection_class = (
+            http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+        )
+        self._host = parts.hostname
+        self._port = parts.port
+        self._prefix = parts.path.rstrip("/")
+        self._timeout = timeout
+        self._headers = {"Accept": "application/json", "Accept-Encoding": "gzip"}
+        api_key = os.environ.get(API_KEY_ENV)
+        if api_key:
+            self._headers["Authorization"] = f"Bearer {api_key}"
+        self._idle: "queue.LifoQueue[http.client.HTTPConnection]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def __enter__(self) -> "ConnectionPool":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        while not self._idle.empty():
+            self._idle.get_nowait().close()
+
+    def _acquire(self) -> http.client.HTTPConnection:
+        self._slots.acquire()
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return self._connection_class(self._host, self._port, timeout=self._timeout)
+
+    def _release(self, conn: http.client.HTTPConnection, reuse: bool) -> None:
+        if reuse:
+            self._idle.put(conn)
+        else:
+            conn.close()
+        self._slots.release()
+
+    def get_json(self, path: str) -> Any:
+        conn = self._acquire()
+        reuse = False
+        try:
+            for attempt in range(2):
+                try:
+                    conn.request("GET", self._prefix + path, headers=self._headers)
+                    response = conn.getresponse()
+                    body = response.read()
+                    break
+                except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                    # The server closed an idle keep-alive connection; reconnect once.
+                    conn.close()
+                    if attempt:
+                        raise
+            reuse = not response.will_close
+        except (OSError, http.client.HTTPException) as e:
+            raise ServerError(f"GET {path}: {e}") from e
+        finally:
+            self._release(conn, reuse)
+
+        if response.status != 200:
+            raise HTTPStatusError(path, response.status, response.reason)
+        if response.getheader("Content-Encoding", "").lower() == "gzip":
+            body = gzip.decompress(body)
+        try:
+            return json.loads(body)
+        except ValueError as e:
+            raise ServerError(f"GET {path}: response is not JSON: {e}") from e
+
+@dataclass
+class ServerMetadata:
+    """What one fetch from the server returned."""
+    nodes: List[Dict[str, Any]]
+    inventory_pages: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def unavailable_packs(self) -> List[Dict[str, Any]]:
+        return self.inventory_pages[0].get("unavailable_packs", []) if self.inventory_pages else []
+
+def _inventory_page(pool: ConnectionPool, cursor: int) -> Dict[str, Any]:
+    page = pool.get_json(f"{NODE_TYPE_INVENTORY_ENDPOINT}?cursor={cursor}&limit={INVENTORY_PAGE_SIZE}")
+    if not isinstance(page, dict) or page.get("version") != 1:
+        raise ServerError("The server returned an unsupported node type inventory")
+    if not page.get("registry_ready"):
+        raise ServerError("The server's node registry is not ready yet; try again once it has loaded")
+    return page
+
+def _fetch_inventory(pool: ConnectionPool, executor: ThreadPoolExecutor) -> List[Dict[str, Any]]:
+    """All inventory pages; [] if the server has no inventory endpoint."""
+    try:
+        first = _inventory_page(pool, 0)
+    except HTTPStatusError as e:
+        if e.status != 404:
+            raise
+        progress("  [WARNING] Server has no node type inventory; registry readiness is not checked")
+        return []
+    if first.get("next_cursor") is None:
+        return [first]
+    # The cursor is an offset, so the remaining pages are known up front and can be fetched together.
+    cursors = range(first["next_cursor"], first.get("type_count", 0), INVENTORY_PAGE_SIZE)
+    pages = [first] + list(executor.map(lambda c: _inventory_page(pool, c), cursors))
+    revisions = {page.get("registry_revision") for page in pages}
+    if len(revisions) > 1:
+        raise ServerError("The server's node registry changed while it was read; run again")
+    return pages
+
+def fetch_server_metadata(base_url: str, connections: int = DEFAULT_CONNECTIONS) -> ServerMetadata:
+    """Fetch node metadata and the node type inventory from the server at `base_url`, concurrently."""
+    with ConnectionPool(base_url, connections) as pool, ThreadPoolExecutor(connections) as executor:
+        nodes_future = executor.submit(pool.get_json, NODES_METADATA_ENDPOINT)
+        inventory_pages = _fetch_inventory(pool, executor)
+        nodes = nodes_future.result()
+    if not isinstance(nodes, list):
+        raise ServerError(f"{NODES_METADATA_ENDPOINT} did not return a list of nodes")
+    if inventory_pages and inventory_pages[0].get("node_count") not in (None, len(nodes)):
+        # The two endpoints may filter differently, so this is worth a note but not fatal.
+        progress(f"  [WARNING] The inventory lists {inventory_pages[0]['node_count']} nodes, the metadata {len(nodes)}")
+    return ServerMetadata(nodes, inventory_pages)
+
+def group_server_nodes(
+    metadata: ServerMetadata,
+    resolver: TypeNameResolver,
+) -> Dict[str, List[NodeSchema]]:
+    """Describe the fetched nodes, grouped by namespace root and sorted by class name."""
+    grouped: Dict[str, Dict[str, NodeSchema]] = {}
+    for node in metadata.nodes:
+        namespace, _, class_name = node["node_type"].rpartition(".")
+        namespace = node.get("namespace") or namespace
+        package_name = get_package_name(namespace.split(".")[0])
+        source = f"nodetool.nodes.{namespace}"
+        schema = describe_metadata_node(node, class_name, source, resolver, source)
+        grouped.setdefault(package_name, {})[schema.name] = schema
+    return {
+        package_name: [unique[n] for n in sorted(unique.keys())]
+        for package_name, unique in sorted(grouped.items())
+    }
+
+class ServerSession:
+    """
+    Schema source that takes nodes from a NodeTool server and types from `types_source`.
+
+    Can be passed to the orchestrator in place of a `DiscoverySession`. The
+    server is contacted once, on first use.
+    """
+
+    def __init__(self, base_url: str, types_source: Union["DiscoverySession", GeneratorIR]):
+        self.base_url = base_url
+        self.types_source = types_source
+        self._metadata: Optional[ServerMetadata] = None
+        self._nodes: Optional[Dict[str, List[NodeSchema]]] = None
+
+    def fetch(self) -> ServerMetadata:
+        """The server's metadata, fetched on the first call; raises ServerError."""
+        if self._metadata is None:
+            progress(f">>> Fetching node metadata from {self.base_url}...")
+            self._metadata = fetch_server_metadata(self.base_url)
+            pages = self._metadata.inventory_pages
+            revision = f" (registry revision {pages[0].get('registry_revision')})" if pages else ""
+            progress(f"  [OK] {len(self._metadata.nodes)} nodes{revision}")
+        return self._metadata
+
+    def types(self) -> Dict[str, List[TypeSchema]]:
+        return self.types_source.types()
+
+    def nodes(self) -> Dict[str, List[NodeSchema]]:
+        if self._nodes is None:
+            self._nodes = group_server_nodes(self.fetch(), TypeNameResolver(self.types()))
+            for package_name, nodes in self._nodes.items():
+                progress(f"Found {len(nodes)} nodes from {package_name} (server)")
+        return self._nodes
+
+    def iter_nodes(self) -> Iterator[Tuple[str, List[NodeSchema]]]:
+        return iter(self.nodes().items())
+
+    def csharp_type_names(self) -> Dict[str, str]:
+        return self.types_source.csharp_type_names()
+
+    def package_names(self) -> List[str]:
+        names = set(self.types_source.package_names())
+        names.update(self.nodes().keys())
+        return sorted(names)
+
+    def package_errors(self) -> List[str]:
+        errors = list(self.types_source.package_errors())
+        for pack in self.fetch().unavailable_packs:
+            errors.append(f"{pack.get('name') or pack.get('id')} is unavailable on the server: {pack.get('reason')}")
+        return errors
+
+    def cache_summary(self) -> Optional[str]:
+        return self.types_source.cache_summary()
+
+    def to_ir(self) -> GeneratorIR:
+        return GeneratorIR(self.types(), self.nodes(), self.package_names())
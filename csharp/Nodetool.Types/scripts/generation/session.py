@@ -0,0 +1,118 @@
+"""
+One discovery pass per generator run, shared by every orchestrator entry point.
+"""
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .discovery import (
+    DiscoveryOptions,
+    PackageIndex,
+    discover_all_base_types,
+    discover_all_parallel,
+    iter_base_nodes,
+)
+from .ir import GeneratorIR, csharp_type_name_map
+from .schema import NodeSchema, TypeSchema
+
+class DiscoverySession:
+    """
+    Memoized discovery results for one run.
+
+    The package index, the type and node descriptions and the C# name map are
+    each computed on first use and then reused, so generating types and nodes
+    in the same run discovers every package once.
+
+    `jobs == 1` imports everything in this interpreter; any other value, or an
+    import budget (`options.import_timeout`), runs one worker interpreter per
+    package (see `discover_all_parallel`). In that mode
+    types and nodes come from the same workers, so `include_nodes=False` only
+    saves work when nodes will not be requested later.
+    """
+
+    def __init__(
+        self,
+        jobs: int = 1,
+        options: Optional[DiscoveryOptions] = None,
+        include_nodes: bool = True,
+    ):
+        self.jobs = jobs
+        self.options = options or DiscoveryOptions()
+        self.include_nodes = include_nodes
+        self._index: Optional[PackageIndex] = None
+        self._types: Optional[Dict[str, List[TypeSchema]]] = None
+        self._nodes: Optional[Dict[str, List[NodeSchema]]] = None
+        self._csharp_type_names: Optional[Dict[str, str]] = None
+
+    @property
+    def isolated(self) -> bool:
+        """Whether discovery runs in worker interpreters."""
+        return self.jobs != 1 or self.options.import_timeout is not None
+
+    @property
+    def index(self) -> PackageIndex:
+        if self._index is None:
+            self._index = PackageIndex.build()
+        return self._index
+
+    def _discover_parallel(self, include_nodes: bool) -> None:
+        self._types, nodes = discover_all_parallel(self.jobs, self.options, include_nodes, self.index)
+        if include_nodes:
+            self._nodes = nodes
+
+    def types(self) -> Dict[str, List[TypeSchema]]:
+        """BaseType descriptions grouped by package."""
+        if self._types is None:
+            if self.isolated:
+                self._discover_parallel(self.include_nodes)
+            else:
+                self._types = discover_all_base_types(self.options, self.index)
+        return self._types
+
+    def nodes(self) -> Dict[str, List[NodeSchema]]:
+        """BaseNode descriptions grouped by package."""
+        if self._nodes is None:
+            for _ in self.iter_nodes():
+                pass
+        return self._nodes
+
+    def iter_nodes(self) -> Iterator[Tuple[str, List[NodeSchema]]]:
+        """
+        `nodes().items()`, discovered one package at a time while the caller consumes them.
+
+        In this interpreter (not `isolated`), a package's node modules are released
+        before the next package is imported (see `discovery.iter_base_nodes`).
+        """
+        if self._nodes is not None:
+            yield from self._nodes.items()
+            return
+        if self.isolated:
+            self._discover_parallel(True)
+            yield from self._nodes.items()
+            return
+        # Type modules stay imported; package metadata names types, which resolve against them.
+        nodes = {}
+        for source_name, source_nodes in iter_base_nodes(self.options, self.index, self.types(), release=True):
+            nodes[source_name] = source_nodes
+            yield source_name, source_nodes
+        self._nodes = nodes
+
+    def csharp_type_names(self) -> Dict[str, str]:
+        """Map of `module.Name` to the fully-qualified C# name of every discovered type."""
+        if self._csharp_type_names is None:
+            self._csharp_type_names = csharp_type_name_map(self.types())
+        return self._csharp_type_names
+
+    def package_names(self) -> List[str]:
+        return self.index.package_names()
+
+    def package_errors(self) -> List[str]:
+        index = self.index
+        return [e for e in (index.registry_error, index.workspace_error) if e is not None]
+
+    def cache_summary(self) -> Optional[str]:
+        if not self.options.cache_path:
+            return None
+        return f"{self.options.scanner().cache.stats.summary()} ({self.options.cache_path})"
+
+    def to_ir(self) -> GeneratorIR:
+        """Snapshot of what this session has discovered (nodes only if they were requested)."""
+        return GeneratorIR(self.types(), self._nodes, self.package_names())
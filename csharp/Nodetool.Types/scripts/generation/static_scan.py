@@ -0,0 +1,277 @@
+"""
+Import-free class hierarchy index built from Python source with `ast`.
+
+Discovery only needs to import the modules that define BaseType/BaseNode
+subclasses. This index parses module sources, resolves each class's bases
+through the module's imports (including re-exports and `from x import *`),
+and answers "does this module define a subclass of X?" without executing
+any package code.
+
+Resolution is deliberately conservative: a base that points into the
+`nodetool` namespace but cannot be located on disk counts as a possible
+match, so the module is imported and checked the regular way.
+"""
+import ast
+import os
+import sys
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set
+
+_NAMESPACE_PREFIX = "nodetool."
+
+@dataclass
+class _ModuleInfo:
+    name: str
+    is_package: bool
+    classes: Dict[str, List[str]] = field(default_factory=dict)  # class name -> base expressions
+    aliases: Dict[str, str] = field(default_factory=dict)  # local name -> fully-qualified target
+    star_imports: List[str] = field(default_factory=list)
+
+def _dotted(node: ast.expr) -> Optional[str]:
+    """Return `a.b.C` for Name/Attribute chains, unwrapping subscripts like `Generic[T]`."""
+    if isinstance(node, ast.Subscript):
+        return _dotted(node.value)
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if isinstance(node, ast.Name):
+        parts.append(node.id)
+        return ".".join(reversed(parts))
+    return None
+
+def _module_level_statements(body: List[ast.stmt]):
+    """Yield module-level statements, descending into if/try blocks but not into defs."""
+    for stmt in body:
+        if isinstance(stmt, ast.If):
+            yield from _module_level_statements(stmt.body)
+            yield from _module_level_statements(stmt.orelse)
+        elif isinstance(stmt, ast.Try):
+            for block in (stmt.body, stmt.orelse, stmt.finalbody):
+                yield from _module_level_statements(block)
+            for handler in stmt.handlers:
+                yield from _module_level_statements(handler.body)
+        else:
+            yield stmt
+
+def _resolve_relative(module: _ModuleInfo, level: int, target: Optional[str]) -> str:
+    package = module.name if module.is_package else module.name.rpartition(".")[0]
+    for _ in range(level - 1):
+        package = package.rpartition(".")[0]
+    if target:
+        return f"{package}.{target}" if package else target
+    return package
+
+def parse_module(name: str, path: str) -> Optional[_ModuleInfo]:
+    """Parse one source file into class and import tables; None if it does not parse."""
+    try:
+        with open(path, "rb") as f:
+            tree = ast.parse(f.read(), filename=path)
+    except (OSError, SyntaxError, ValueError):
+        return None
+
+    info = _ModuleInfo(name, os.path.basename(path) == "__init__.py")
+    for stmt in _module_level_statements(tree.body):
+        if isinstance(stmt, ast.ClassDef):
+            info.classes[stmt.name] = [b for b in (_dotted(base) for base in stmt.bases) if b]
+        elif isinstance(stmt, ast.Import):
+            for alias in stmt.names:
+                if alias.asname:
+                    info.aliases[alias.asname] = alias.name
+                else:
+                    head = alias.name.split(".")[0]
+                    info.aliases[head] = head
+        elif isinstance(stmt, ast.ImportFrom):
+            source = _resolve_relative(info, stmt.level, stmt.module) if stmt.level else (stmt.module or "")
+            for alias in stmt.names:
+                if alias.name == "*":
+                    info.star_imports.append(source)
+                else:
+                    info.aliases[alias.asname or alias.name] = f"{source}.{alias.name}"
+        elif isinstance(stmt, ast.Assign) and len(stmt.targets) == 1 and isinstance(stmt.targets[0], ast.Name):
+            # Simple re-binding such as `ImageRef = _ImageRef`
+            target = _dotted(stmt.value)
+            if target:
+                info.aliases.setdefault(stmt.targets[0].id, f"@{target}")
+    return info
+
+class StaticIndex:
+    """
+    Lazily parsed view of every module reachable from `sys.path` (plus extra roots).
+
+    Modules are located on disk by name and parsed on first use; nothing is imported.
+    """
+
+    def __init__(self, roots: Optional[List[str]] = None):
+        self._roots = list(roots or [])
+        self._modules: Dict[str, Optional[_ModuleInfo]] = {}
+        self._subclass_cache: Dict[tuple[str, str], Optional[bool]] = {}
+        self.parsed = 0
+        self.skipped = 0
+
+    def _find_file(self, module_name: str) -> Optional[str]:
+        rel = module_name.replace(".", os.sep)
+        for root in self._roots + sys.path:
+            if not root or not os.path.isdir(root):
+                continue
+            candidate = os.path.join(root, rel + ".py")
+            if os.path.isfile(candidate):
+                return candidate
+            candidate = os.path.join(root, rel, "__init__.py")
+            if os.path.isfile(candidate):
+                return candidate
+        return None
+
+    def module(self, module_name: str, path: Optional[str] = None) -> Optional[_ModuleInfo]:
+        if module_name not in self._modules:
+            path = path or self._find_file(module_name)
+            info = parse_module(module_name, path) if path else None
+            if info is not None:
+                self.parsed += 1
+            self._modules[module_name] = info
+        return self._modules[module_name]
+
+    def add_root(self, root: str) -> None:
+        """Also look for modules under `root`; modules not found before are looked up again."""
+        if root in self._roots:
+            return
+        self._roots.append(root)
+        self._modules = {name: info for name, info in self._modules.items() if info is not None}
+        self._subclass_cache.clear()
+
+    def forget(self, module_names: Iterable[str]) -> None:
+        """Drop parsed modules so they are read again (their sources changed)."""
+        for name in module_names:
+            self._modules.pop(name, None)
+        self._subclass_cache.clear()
+
+    def _split(self, qualified: str) -> Optional[tuple[_ModuleInfo, str]]:
+        """Split `pkg.mod.Name` into the longest locatable module and the attribute name."""
+        parts = qualified.split(".")
+        for i in range(len(parts) - 1, 0, -1):
+            info = self.module(".".join(parts[:i]))
+            if info is not None:
+                return info, ".".join(parts[i:])
+        return None
+
+    def resolve(self, module: _ModuleInfo, expr: str, _seen: Optional[Set[str]] = None) -> str:
+        """Resolve a name used inside `module` to a fully-qualified dotted name."""
+        head, _, rest = expr.partition(".")
+        if head in module.classes:
+            resolved = f"{module.name}.{head}"
+        elif head in module.aliases:
+            target = module.aliases[head]
+            if target.startswith("@"):
+                seen = _seen or set()
+                key = f"{module.name}:{head}"
+                if key in seen:
+                    return expr
+                seen.add(key)
+                resolved = self.resolve(module, target[1:], seen)
+            else:
+                resolved = target
+        else:
+            for star in module.star_imports:
+                info = self.module(star)
+                if info is not None and (head in info.classes or head in info.aliases):
+                    resolved = self.resolve(info, head, _seen)
+                    break
+            else:
+                return expr
+        return f"{resolved}.{rest}" if rest else resolved
+
+    def is_subclass(self, qualified: str, root: str) -> Optional[bool]:
+        """
+        True/False if `qualified` does/does not derive from `root`; None if undecidable.
+        """
+        if qualified == root:
+            return True
+        key = (qualified, root)
+        if key in self._subclass_cache:
+            return self._subclass_cache[key]
+        self._subclass_cache[key] = False  # break inheritance cycles
+
+        result: Optional[bool] = False
+        split = self._split(qualified)
+        if split is None:
+            if qualified.startswith(_NAMESPACE_PREFIX):
+                result = None
+        else:
+            info, name = split
+            if name in info.classes:
+                for base in info.classes[name]:
+                    verdict = self.is_subclass(self.resolve(info, base), root)
+                    if verdict:
+                        result = True
+                        break
+                    if verdict is None:
+                        result = None
+            elif "." not in name:
+                # Re-exported name: follow the import in the defining module.
+                target = self.resolve(info, name)
+                if target != name:
+                    result = self.is_subclass(target, root)
+                elif qualified.startswith(_NAMESPACE_PREFIX):
+                    result = None
+
+        self._subclass_cache[key] = result
+        return result
+
+    def defines_subclass(self, module_name: str, path: str, roots: List[str]) -> bool:
+        """
+        Whether the module at `path` may define a subclass of any of `roots`.
+
+        Unparseable modules and undecidable hierarchies answer True so that the
+        caller falls back to importing them.
+        """
+        info = self.module(module_name, path)
+        if info is None:
+            return True
+        for class_name in info.classes:
+            qualified = f"{module_name}.{class_name}"
+            for root in roots:
+                if self.is_subclass(qualified, root) is not False:
+                    return True
+        self.skipped += 1
+        return False
+
+    def imported_modules(self, info: _ModuleInfo) -> List[str]:
+        """Names of the modules `info` imports from (attribute imports mapped to their module)."""
+        names = set(info.star_imports)
+        for target in info.aliases.values():
+            if target.startswith("@"):
+                continue
+            if self.module(target) is not None:
+                names.add(target)
+            else:
+                names.add(target.rpartition(".")[0])
+        return sorted(n for n in names if n)
+
+    def dependency_files(self, module_name: str, path: Optional[str] = None, prefix: str = _NAMESPACE_PREFIX) -> List[str]:
+        """
+        Source files of every `prefix` module reachable from `module_name` through imports,
+        including the module itself. Used to key caches on everything a class can inherit from.
+        """
+        files: Dict[str, str] = {}
+        pending = [(module_name, path)]
+        while pending:
+            name, file_path = pending.pop()
+            if name in files:
+                continue
+            file_path = file_path or self._find_file(name)
+            info = self.module(name, file_path)
+            if info is None or file_path is None:
+                continue
+            files[name] = file_path
+            for imported in self.imported_modules(info):
+                if imported.startswith(prefix) and imported not in files:
+                    pending.append((imported, None))
+                    # Importing a submodule executes its parent packages too.
+                    parent = imported.rpartition(".")[0]
+                    while parent.startswith(prefix.rstrip(".")) and parent not in files:
+                        pending.append((parent, None))
+                        parent = parent.rpartition(".")[0]
+        return [files[n] for n in sorted(files)]
+
+def qualified_name(cls: type) -> str:
+    return f"{cls.__module__}.{cls.__qualname__}"
@@ -0,0 +1,179 @@
+"""
+Stand-ins for heavy third-party packages while node and type modules are imported.
+
+Discovery only needs class shapes, but importing a node module runs its
+top-level `import torch` (or transformers, diffusers, ...), which can take
+seconds and gigabytes. With stubbing enabled, a meta-path finder answers those
+imports with lightweight modules instead:
+
+- Any public attribute of a stub module or stub class is another stub class,
+  so `class Model(torch.nn.Module)`, `x: torch.Tensor | None = None` and
+  `from transformers import AutoModel` all work, and class bodies and
+  `get_metadata()` evaluate as usual. A stub class stands for an unknown class,
+  which is what the generator maps the real one to as well.
+- Actually using a stub (calling it, iterating it, ...) raises
+  `StubbedDependencyUsed`. The module is then imported again with the real
+  dependency, and the scanner reports it.
+"""
+import importlib
+import importlib.abc
+import importlib.machinery
+import sys
+import types
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Set, TypeVar
+
+from .context import progress
+
+T = TypeVar("T")
+
+# Packages that node modules import at top level but discovery never needs.
+DEFAULT_STUBBED_PACKAGES = (
+    "torch",
+    "torchvision",
+    "torchaudio",
+    "transformers",
+    "diffusers",
+    "accelerate",
+    "peft",
+    "bitsandbytes",
+    "xformers",
+    "sentence_transformers",
+    "tensorflow",
+    "jax",
+    "onnxruntime",
+    "cv2",
+    "librosa",
+)
+
+class StubbedDependencyUsed(Exception):
+    """A stubbed package was used for more than its names at import time."""
+
+def _used(path: str, what: str):
+    raise StubbedDependencyUsed(f"{path} was {what} while stubbed")
+
+class _StubMeta(type):
+    """Metaclass of stub classes: attribute access yields more stubs, use raises."""
+
+    def __getattr__(cls, name: str) -> Any:
+        # Private and dunder lookups (pydantic, typing, abc probes) must fail as on a plain class.
+        if name.startswith("_"):
+            raise AttributeError(name)
+        attr = _stub_class(f"{cls.__module__}.{cls.__qualname__}", name)
+        type.__setattr__(cls, name, attr)
+        return attr
+
+    def __call__(cls, *args, **kwargs):
+        _used(f"{cls.__module__}.{cls.__qualname__}", "called")
+
+    def __iter__(cls):
+        _used(f"{cls.__module__}.{cls.__qualname__}", "iterated")
+
+    def __len__(cls):
+        _used(f"{cls.__module__}.{cls.__qualname__}", "measured")
+
+    def __bool__(cls):
+        return True  # Not `__len__`, which would be the fallback
+
+    def __getitem__(cls, item):
+        # `Tensor[...]` in an annotation; the parameters do not matter for codegen.
+        return cls
+
+def _stub_class(module: str, name: str) -> type:
+    return _StubMeta(name, (), {"__module__": module, "__qualname__": name})
+
+class _StubModule(types.ModuleType):
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        attr = _stub_class(self.__name__, name)
+        setattr(self, name, attr)
+        return attr
+
+def _is_stub(value: Any) -> bool:
+    return isinstance(value, (_StubModule, _StubMeta))
+
+def _caused_by_stubs(error: BaseException) -> bool:
+    """Whether `error` came from a stub, or from code that has stubs in scope."""
+    if isinstance(error, StubbedDependencyUsed):
+        return True
+    tb = error.__traceback__
+    while tb is not None:
+        if any(_is_stub(v) for v in tb.tb_frame.f_globals.values()):
+            return True
+        tb = tb.tb_next
+    return False
+
+class HeavyImportStubs(importlib.abc.MetaPathFinder, importlib.abc.Loader):
+    """
+    Meta-path finder that stubs the given top-level packages (see module docstring).
+
+    Only active inside `load()`; stub modules stay in `sys.modules` in between
+    so every module sees the same stub classes.
+    """
+
+    def __init__(self, packages: Iterable[str]):
+        self.packages = tuple(packages)
+        self._roots: Set[str] = set(self.packages)
+        self.stubbed: Set[str] = set()
+        self.stubbed_roots: Set[str] = set()
+        self.needed_real: Dict[str, str] = {}
+
+    def find_spec(self, fullname, path=None, target=None):
+        root = fullname.partition(".")[0]
+        if root not in self._roots:
+            return None
+        # Once the real package is loaded, its submodules must be real too.
+        if root != fullname and not isinstance(sys.modules.get(root), _StubModule):
+            return None
+        return importlib.machinery.ModuleSpec(fullname, self, is_package=True)
+
+    def create_module(self, spec):
+        module = _StubModule(spec.name)
+        module.__path__ = []
+        self.stubbed.add(spec.name)
+        self.stubbed_roots.add(spec.name.partition(".")[0])
+        return module
+
+    def exec_module(self, module):
+        pass
+
+    @contextmanager
+    def _installed(self):
+        sys.meta_path.insert(0, self)
+        try:
+            yield
+        finally:
+            sys.meta_path.remove(self)
+
+    def load(self, module_name: str, describe: Callable[[types.ModuleType], T]) -> T:
+        """
+        Import `module_name` with stubs and pass it to `describe`.
+
+        If that fails while stubs are in use, the modules imported by the attempt
+        and the stubs are dropped, and the module is imported for real.
+        """
+        before = set(sys.modules)
+        try:
+            with self._installed():
+                return describe(importlib.import_module(module_name))
+        except Exception as e:
+            if not _caused_by_stubs(e):
+                raise
+            for name in set(sys.modules) - before:
+                del sys.modules[name]
+            for name in self.stubbed:
+                if isinstance(sys.modules.get(name), _StubModule):
+                    del sys.modules[name]
+            self.stubbed.clear()
+            self.needed_real[module_name] = str(e) or type(e).__name__
+        return describe(importlib.import_module(module_name))
+
+    def report(self) -> None:
+        if not self.stubbed_roots:
+            return
+        progress(f"Stubbed imports: {', '.join(sorted(self.stubbed_roots))}")
+        if self.needed_real:
+            progress(f"  {len(self.needed_real)} modules needed the real dependency:")
+            for module_name, reason in sorted(self.needed_real.items()):
+                progress(f"    {module_name}: {reason}")
@@ -0,0 +1,122 @@
+"""
+Discovery through the subclass registry (`--subclass-scan`).
+
+The default scan imports a module and sweeps its attributes with
+`inspect.getmembers`, which evaluates and sorts every attribute of every
+module, then tries `issubclass` on each class. With `--subclass-scan`, all
+modules of a source are imported first and `BaseType.__subclasses__()` /
+`BaseNode.__subclasses__()` are walked once; each class is attributed to the
+module named by its `__module__`.
+
+Scanned modules are executed from their file (`spec_from_file_location`).
+The modules they import are found through `SourceFinder`, a meta path finder
+over the import roots of the sources, so `sys.path` is left alone.
+"""
+import importlib
+import importlib.abc
+import importlib.machinery
+import importlib.util
+import os
+import sys
+import types
+from typing import Callable, Dict, Iterable, List, Set
+
+class SourceFinder(importlib.abc.MetaPathFinder):
+    """
+    Finds modules under the registered import roots.
+
+    Installed after the regular finders, so it only supplies what `sys.path`
+    cannot: the `nodetool.*` modules of source checkouts that are not
+    installed. A namespace package spans every root that has its directory.
+    """
+
+    def __init__(self):
+        self.roots: List[str] = []
+
+    def add_root(self, root: str) -> None:
+        root = os.path.abspath(root)
+        if root not in self.roots:
+            self.roots.append(root)
+
+    def install(self) -> None:
+        if self not in sys.meta_path:
+            sys.meta_path.append(self)
+
+    def find_spec(self, fullname, path=None, target=None):
+        # Top-level packages (nodetool itself) always come from sys.path.
+        if "." not in fullname:
+            return None
+        parts = fullname.split(".")
+        portions = []
+        for root in self.roots:
+            base = os.path.join(root, *parts)
+            init = os.path.join(base, "__init__.py")
+            if os.path.isfile(init):
+                return importlib.util.spec_from_file_location(fullname, init, submodule_search_locations=[base])
+            if os.path.isfile(base + ".py"):
+                return importlib.util.spec_from_file_location(fullname, base + ".py")
+            if os.path.isdir(base):
+                portions.append(base)
+        if not portions:
+            return None
+        spec = importlib.machinery.ModuleSpec(fullname, None, is_package=True)
+        spec.submodule_search_locations = portions
+        return spec
+
+def load_file(module_name: str, module_path: str) -> types.ModuleType:
+    """
+    Import `module_name` by executing `module_path` (its parent packages are
+    imported normally). An already imported module is returned as it is.
+    """
+    module = sys.modules.get(module_name)
+    if module is not None:
+        return module
+    parent_name, _, child = module_name.rpartition(".")
+    parent = importlib.import_module(parent_name) if parent_name else None
+    spec = importlib.util.spec_from_file_location(module_name, module_path)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"cannot load {module_name} from {module_path}", name=module_name, path=module_path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        sys.modules.pop(module_name, None)
+        raise
+    if parent is not None:
+        setattr(parent, child, module)
+    return module
+
+def subclasses_by_module(
+    base: type,
+    modules: Iterable[str],
+    module_of: Callable[[type], str] = lambda cls: cls.__module__,
+) -> Dict[str, List[type]]:
+    """
+    Subclasses of `base` (at any depth) defined at the top level of one of
+    `modules`, by module name and sorted by class name.
+
+    A class counts as defined in a module if `module_of(cls)` names it and the
+    module still binds the class under its name. That leaves out classes of a
+    module's earlier versions (re-imported modules), which stay in
+    `__subclasses__()` until they are garbage collected.
+    """
+    wanted: Set[str] = set(modules)
+    found: Dict[str, List[type]] = {}
+    seen = {base}
+    stack = [base]
+    while stack:
+        for cls in type.__subclasses__(stack.pop()):
+            if cls in seen:
+                continue
+            seen.add(cls)
+            stack.append(cls)
+            module_name = module_of(cls)
+            if module_name not in wanted:
+                continue
+            module = sys.modules.get(module_name)
+            if module is not None and vars(module).get(cls.__name__) is cls:
+                found.setdefault(module_name, []).append(cls)
+    for classes in found.values():
+        classes.sort(key=lambda cls: cls.__name__)
+    return found
@@ -0,0 +1,156 @@
+"""
+Families of BaseType subclasses told apart by their `type` tag.
+
+Every BaseType carries a literal `type` tag, which is how pydantic tells the
+members of a union apart. C# has no union types, so a field accepting several
+refs (`ImageRef | AudioRef`) used to be generated as `object`. Instead, every
+tagged class derives from an abstract C# base: the base of its family, named
+after the described class it descends from furthest up (`AssetRefBase` for
+`ImageRef` and `AudioRef`), or `Nodetool.Types.BaseType` if no other described
+class is in its line. Family bases derive from `BaseType` in turn.
+
+A union whose members are all tagged classes is generated as their closest
+common base. The base's formatter (see `codegen.render_union_source`) reads the
+`type` tag before anything else and hands the value to the formatter of the
+class the tag names, through a switch over the tags computed here.
+
+A tag shared by a class and its subclasses that do not override it belongs to
+that class: pydantic cannot tell them apart on the wire either. Any other tag
+shared under a base is ambiguous there: the base's formatter decodes no class
+for it, and a union that needs that base stays `object`.
+"""
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .schema import TypeRef, TypeSchema
+
+TAG_FIELD = "type"
+
+# The abstract base of every tagged class.
+ROOT_NAMESPACE = "Nodetool.Types"
+ROOT_NAME = "BaseType"
+
+_STR_REF = TypeRef("primitive", "str")
+
+@dataclass(frozen=True)
+class Member:
+    """A tagged class: its `type_key`, fully-qualified C# name and tag."""
+    key: str
+    csharp: str
+    tag: str
+
+@dataclass
+class Family:
+    """An abstract C# base, the classes deriving from it and the class each tag decodes to."""
+    namespace: str
+    name: str
+    origin: str  # the class the base is named after (a family's topmost class), or ""
+    members: List[Member] = field(default_factory=list)  # sorted by C# name
+    dispatch: Dict[str, Member] = field(default_factory=dict)  # sorted by tag
+    ambiguous: Dict[str, List[Member]] = field(default_factory=dict)
+
+    @property
+    def csharp(self) -> str:
+        return f"{self.namespace}.{self.name}"
+
+@dataclass
+class TaggedUnions:
+    """The C# bases of one generation (empty if no described class is tagged)."""
+    root: Optional[Family] = None
+    families: List[Family] = field(default_factory=list)  # sorted by C# name, root excluded
+    bases: Dict[str, str] = field(default_factory=dict)  # type_key -> C# base its class derives from
+    decoders: Dict[str, Tuple[str, ...]] = field(default_factory=dict)  # type_key -> bases decoding it, closest first
+    skipped: List[str] = field(default_factory=list)  # family bases whose name is taken by a class
+
+    def common_base(self, keys: Iterable[str]) -> Optional[str]:
+        """The closest base whose formatter decodes every class in `keys`, or None."""
+        chains = [self.decoders.get(key, ()) for key in keys]
+        if not chains:
+            return None
+        for base in chains[0]:
+            if all(base in chain for chain in chains[1:]):
+                return base
+        return None
+
+def tag_of(schema: TypeSchema) -> Optional[str]:
+    """The `type` tag of a described class: a single-value Literal, or the default of a `str` field."""
+    for f in schema.fields:
+        if f.name != TAG_FIELD:
+            continue
+        if f.type.kind == "literal" and len(f.type.values) == 1 and isinstance(f.type.values[0], str):
+            return f.type.values[0]
+        if f.type == _STR_REF and f.default.kind == "str":
+            return f.default.value
+    return None
+
+def _dispatch(family: Family, parents: Dict[str, str]) -> None:
+    """Fill `family.dispatch` and `family.ambiguous` from its members' tags."""
+    def ancestors(key: str) -> Iterable[str]:
+        while key in parents:
+            key = parents[key]
+            yield key
+
+    by_tag: Dict[str, List[Member]] = {}
+    for member in family.members:
+        by_tag.setdefault(member.tag, []).append(member)
+    for tag in sorted(by_tag):
+        members = by_tag[tag]
+        keys = {m.key for m in members}
+        # The member every other one with this tag inherits it from.
+        owners = [m for m in members if all(m.key in ancestors(k) for k in keys - {m.key})]
+        if len(owners) == 1:
+            family.dispatch[tag] = owners[0]
+        else:
+            family.ambiguous[tag] = members
+
+def plan(all_types: Dict[str, List[TypeSchema]], csharp_names: Dict[str, str]) -> TaggedUnions:
+    """
+    The bases for the described classes in `all_types`.
+
+    `csharp_names` maps `type_key` to fully-qualified C# names (see
+    `ir.csharp_type_name_map`); only classes in it take part.
+    """
+    schemas = {t.key: t for classes in all_types.values() for t in classes if t.key in csharp_names}
+    members: Dict[str, Member] = {}
+    for key, schema in schemas.items():
+        tag = tag_of(schema)
+        if tag is not None:
+            members[key] = Member(key, csharp_names[key], tag)
+    if not members:
+        return TaggedUnions()
+    # Described, tagged parents only; a family does not reach past a class that is neither.
+    parents = {key: schemas[key].base for key in members if schemas[key].base in members}
+
+    def root_of(key: str) -> str:
+        while key in parents:
+            key = parents[key]
+        return key
+
+    lines: Dict[str, List[Member]] = {}
+    for key, member in members.items():
+        lines.setdefault(root_of(key), []).append(member)
+
+    taken = set(csharp_names.values())
+    result = TaggedUnions()
+    for root_key in sorted(lines, key=lambda k: csharp_names[k]):
+        if len(lines[root_key]) < 2:
+            continue
+        namespace, _, name = csharp_names[root_key].rpartition(".")
+        family = Family(namespace, f"{name}Base", name, sorted(lines[root_key], key=lambda m: m.csharp))
+        if family.csharp in taken:
+            result.skipped.append(family.csharp)
+            continue
+        _dispatch(family, parents)
+        result.families.append(family)
+        for member in family.members:
+            result.bases[member.key] = family.csharp
+
+    result.root = Family(ROOT_NAMESPACE, ROOT_NAME, "", sorted(members.values(), key=lambda m: m.csharp))
+    _dispatch(result.root, parents)
+    for key in members:
+        result.bases.setdefault(key, result.root.csharp)
+
+    for family in result.families + [result.root]:
+        for member in family.dispatch.values():
+            result.decoders[member.key] = result.decoders.get(member.key, ()) + (family.csharp,)
+    return result
@@ -2,26 +2,27 @@
 Utility functions for C# type generation.
 """
 import json
-from typing import Any, get_origin, get_args
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Iterable, Iterator
 
-try:
-    from nodetool.metadata.types import BaseType
-except ImportError:
-    # Define a dummy BaseType if nodetool is not available
-    class BaseType:
-        pass
+from .schema import DefaultValue, TypeRef, type_key
+from .unions import TaggedUnions
 
-# Type mapping from Python to C#
+# Type mapping from Python to C# (keyed by schema primitive name)
 _PRIMITIVE_TYPE_MAP = {
-    str: "string",
-    int: "int",
-    float: "double",
-    bool: "bool",
-    bytes: "byte[]",
-    type(None): "object",
-    object: "object",
+    "str": "string",
+    "int": "int",
+    "float": "double",
+    "bool": "bool",
+    "bytes": "byte[]",
+    "none": "object",
+    "object": "object",
 }
 
+_NONE_REF = TypeRef("primitive", "none")
+
 CSHARP_KEYWORDS = {
     "abstract", "as", "base", "bool", "break", "byte", "case", "catch", "char",
     "checked", "class", "const", "continue", "decimal", "default", "delegate",
@@ -35,16 +36,85 @@ CSHARP_KEYWORDS = {
     "unsafe", "ushort", "using", "virtual", "void", "volatile", "while",
 }
 
-_KNOWN_CSHARP_TYPE_NAMES: dict[type, str] = {}
+@dataclass
+class MemoStats:
+    hits: int = 0
+    misses: int = 0
+
+    def summary(self) -> str:
+        total = self.hits + self.misses
+        return f"{self.hits}/{total} hits ({100.0 * self.hits / total:.1f}%)" if total else "unused"
+
+class CSharpTypeMap:
+    """
+    Fully-qualified C# names of BaseType subclasses, keyed by `type_key`, the
+    C# bases of their tagged unions (see unions.py), and the `typeref_to_csharp`
+    results memoized against them.
+
+    The memo is keyed by `id(TypeRef)` because hashing a nested TypeRef costs
+    more than mapping it; descriptions share TypeRef objects (see
+    describe_annotation and ir.py), so repeated annotations are the same
+    object. Holding the TypeRef keeps its id from being reused.
+
+    `stats` counts the memo hits of the generation using this map:
+    "annotations" (describe.describe_annotation, during discovery) and
+    "csharp" (typeref_to_csharp, during rendering).
+    """
+
+    def __init__(self, mapping: dict[type | str, str] | None = None, unions: TaggedUnions | None = None):
+        self.stats = {"annotations": MemoStats(), "csharp": MemoStats()}
+        self.set(mapping or {}, unions)
+
+    def set(self, mapping: dict[type | str, str], unions: TaggedUnions | None = None) -> None:
+        """Replace the names (keys may be classes or their `type_key` strings) and bases."""
+        self.names: dict[str, str] = {
+            (k if isinstance(k, str) else type_key(k)): v for k, v in mapping.items()
+        }
+        self.unions = unions or TaggedUnions()
+        # Memoized C# types may embed names from the previous map.
+        self.memo: dict[int, tuple[TypeRef, str]] = {}
+
+    def summary(self) -> str | None:
+        """One line of memo hit rates, or None if nothing was mapped with this map."""
+        if not any(s.hits or s.misses for s in self.stats.values()):
+            return None
+        return ", ".join(f"{name} {stats.summary()}" for name, stats in self.stats.items())
+
+# The map `typeref_to_csharp` uses. A context variable rather than a global, so
+# generations on different threads (see context.GeneratorContext) each see their own.
+_TYPE_MAP: ContextVar[CSharpTypeMap] = ContextVar("csharp_type_map", default=CSharpTypeMap())
 
-def set_known_csharp_type_names(mapping: dict[type, str]) -> None:
+def set_known_csharp_type_names(mapping: dict[type | str, str], unions: TaggedUnions | None = None) -> None:
     """
     Provide a mapping from Python BaseType subclasses to fully-qualified C# type names.
 
     This is needed to generate correct cross-namespace references for types/nodes.
+    Keys may be classes or their `type_key` strings (as carried by schema descriptions).
+    `unions` are the bases of tagged classes (see `unions.plan`).
+    The mapping applies to the current thread (context) until it is set again.
     """
-    global _KNOWN_CSHARP_TYPE_NAMES
-    _KNOWN_CSHARP_TYPE_NAMES = dict(mapping)
+    _TYPE_MAP.set(CSharpTypeMap(mapping, unions))
+
+@contextmanager
+def using_csharp_type_map(type_map: CSharpTypeMap) -> Iterator[CSharpTypeMap]:
+    """Map C# types with `type_map` in this thread (context) within the block."""
+    token = _TYPE_MAP.set(type_map)
+    try:
+        yield type_map
+    finally:
+        _TYPE_MAP.reset(token)
+
+def known_csharp_type_names() -> dict[str, str]:
+    """The mapping in use in this thread, keyed by `type_key`."""
+    return dict(_TYPE_MAP.get().names)
+
+def known_tagged_unions() -> TaggedUnions:
+    """The bases of tagged classes in use in this thread."""
+    return _TYPE_MAP.get().unions
+
+def type_mapping_stats() -> dict[str, MemoStats]:
+    """The memo counters of the map in use in this thread."""
+    return _TYPE_MAP.get().stats
 
 def csharp_identifier(name: str) -> str:
     """
@@ -65,85 +135,170 @@ def csharp_identifier(name: str) -> str:
 
 def python_type_to_csharp(tp: Any) -> str:
     """Convert a Python type annotation to a C# type string."""
-    origin = get_origin(tp)
-    if origin is None:
-        if isinstance(tp, type):
-            if tp in _PRIMITIVE_TYPE_MAP:
-                return _PRIMITIVE_TYPE_MAP[tp]
-            # Handle BaseType subclasses
-            try:
-                if issubclass(tp, BaseType):
-                    # Prefer fully-qualified names when available (cross-package references).
-                    if tp in _KNOWN_CSHARP_TYPE_NAMES:
-                        return _KNOWN_CSHARP_TYPE_NAMES[tp]
-                    # Fallback: best-effort (works if consumer has a using or types are in base namespace).
-                    return tp.__name__
-            except TypeError:
-                pass
-        # typing.Any or unknown
-        if tp is Any:
-            return "object"
-        # typing.Literal values
-        if str(tp).startswith("typing.Literal"):
-            args = get_args(tp)
-            if args:
-                return python_type_to_csharp(type(args[0]))
-        return "object"
+    from .describe import describe_annotation  # keeps rendering from IR free of nodetool imports
+    return typeref_to_csharp(describe_annotation(tp))
 
-    if origin is list:
-        args = get_args(tp)
-        inner = python_type_to_csharp(args[0]) if args else "object"
-        return f"List<{inner}>"
-    if origin is dict:
-        args = get_args(tp)
-        key = python_type_to_csharp(args[0]) if args else "object"
-        val = python_type_to_csharp(args[1]) if len(args) > 1 else "object"
-        return f"Dictionary<{key}, {val}>"
-    if origin is set:
-        args = get_args(tp)
-        inner = python_type_to_csharp(args[0]) if args else "object"
-        return f"HashSet<{inner}>"
-    if origin is tuple:
-        args = get_args(tp)
-        if len(args) == 2 and args[1] is ...:
-            inner = python_type_to_csharp(args[0])
-            return f"List<{inner}>"
-        else:
-            inner = python_type_to_csharp(args[0]) if args else "object"
-            return f"List<{inner}>"
-    if origin is type(None):
-        return "object"
-    if str(origin).startswith("typing.Union"):
-        args = [a for a in get_args(tp) if a is not type(None)]
-        if len(args) == 1:
-            return python_type_to_csharp(args[0]) + "?"
+def _map_primitive(ref: TypeRef, type_map: CSharpTypeMap) -> str:
+    return _PRIMITIVE_TYPE_MAP[ref.name]
+
+def _map_base_type(ref: TypeRef, type_map: CSharpTypeMap) -> str:
+    # Prefer fully-qualified names when available (cross-package references).
+    # Fallback: best-effort (works if consumer has a using or types are in base namespace).
+    return type_map.names.get(ref.key, ref.name)
+
+def _common_csharp(csharp_types: Iterable[str]) -> str | None:
+    """The one C# type that holds all of `csharp_types` (int widens to double), or None."""
+    unique = set(csharp_types)
+    if unique == {"int", "double"}:
+        return "double"
+    return unique.pop() if len(unique) == 1 else None
+
+_SCALAR_CSHARP = {str: "string", bool: "bool", int: "int", float: "double"}
+
+def _scalar_csharp(values: tuple[Any, ...]) -> str | None:
+    """C# type of Literal or enum values (nullable if one is None), or None if there is none."""
+    present = [v for v in values if v is not None]
+    csharp_type = _common_csharp(_SCALAR_CSHARP.get(type(v), "object") for v in present)
+    if csharp_type is None or csharp_type == "object":
+        return None
+    return csharp_type + "?" if len(present) < len(values) else csharp_type
+
+def _tuple_element(ref: TypeRef, type_map: CSharpTypeMap) -> str | None:
+    """Element type of a tuple (`tuple[int, ...]`, `tuple[int, int]`), or None if they differ."""
+    return _common_csharp(_to_csharp(a, type_map) for a in ref.args if a.kind != "ellipsis")
+
+def _map_list(ref: TypeRef, type_map: CSharpTypeMap) -> str:
+    inner = _to_csharp(ref.args[0], type_map) if ref.args else "object"
+    return f"List<{inner}>"
+
+def _map_tuple(ref: TypeRef, type_map: CSharpTypeMap) -> str:
+    return f"List<{_tuple_element(ref, type_map) or 'object'}>"
+
+def _map_dict(ref: TypeRef, type_map: CSharpTypeMap) -> str:
+    key = _to_csharp(ref.args[0], type_map) if ref.args else "object"
+    val = _to_csharp(ref.args[1], type_map) if len(ref.args) > 1 else "object"
+    return f"Dictionary<{key}, {val}>"
+
+def _map_set(ref: TypeRef, type_map: CSharpTypeMap) -> str:
+    inner = _to_csharp(ref.args[0], type_map) if ref.args else "object"
+    return f"HashSet<{inner}>"
+
+def _union_csharp(args: list[TypeRef], type_map: CSharpTypeMap) -> str | None:
+    """The C# type of a union's members (None excluded), or None if they have none in common."""
+    csharp_type = _common_csharp(_to_csharp(a, type_map) for a in args)
+    if csharp_type is None and all(a.kind == "base_type" for a in args):
+        # ImageRef | AudioRef -> their tagged union's base (see unions.py)
+        csharp_type = type_map.unions.common_base(a.key for a in args)
+    return csharp_type
+
+def _map_union(ref: TypeRef, type_map: CSharpTypeMap) -> str:
+    # Optional[X], X | None, int | float, unions whose members map to the same C# type,
+    # and unions of tagged BaseTypes
+    args = [a for a in ref.args if a != _NONE_REF]
+    csharp_type = _union_csharp(args, type_map)
+    if csharp_type is None:
         return "object"
+    if len(args) < len(ref.args) and not csharp_type.endswith("?"):
+        return csharp_type + "?"
+    return csharp_type
+
+def _map_scalars(ref: TypeRef, type_map: CSharpTypeMap) -> str:
+    # Literal["a", "b"] -> string; str/int enums -> their values' type
+    return _scalar_csharp(ref.values) or "object"
+
+# typing.Any, plain classes and unknown constructs map to "object" (see object_reason).
+_CSHARP_MAPPERS = {
+    "primitive": _map_primitive,
+    "base_type": _map_base_type,
+    "list": _map_list,
+    "tuple": _map_tuple,
+    "dict": _map_dict,
+    "set": _map_set,
+    "union": _map_union,
+    "literal": _map_scalars,
+    "enum": _map_scalars,
+}
 
-    return "object"
+def typeref_to_csharp(ref: TypeRef) -> str:
+    """
+    Convert a described type annotation to a C# type string.
+
+    Uses the C# name map of this thread (see `set_known_csharp_type_names`),
+    which memoizes the results per TypeRef object.
+    """
+    return _to_csharp(ref, _TYPE_MAP.get())
+
+def _to_csharp(ref: TypeRef, type_map: CSharpTypeMap) -> str:
+    entry = type_map.memo.get(id(ref))
+    if entry is not None and entry[0] is ref:
+        type_map.stats["csharp"].hits += 1
+        return entry[1]
+    type_map.stats["csharp"].misses += 1
+    mapper = _CSHARP_MAPPERS.get(ref.kind)
+    csharp_type = mapper(ref, type_map) if mapper is not None else "object"
+    type_map.memo[id(ref)] = (ref, csharp_type)
+    return csharp_type
+
+def object_reason(ref: TypeRef) -> str | None:
+    """
+    Why `typeref_to_csharp(ref)` is, or has an argument that is, `object`;
+    None if it is not.
+    """
+    kind = ref.kind
+    if kind == "base_type":
+        return None
+    if kind == "primitive":
+        return {"none": "None", "object": "object"}.get(ref.name)
+    if kind == "any":
+        return "Any"
+    if kind == "class":
+        return f"{ref.name} is not a BaseType or enum"
+    if kind in ("literal", "enum"):
+        if _scalar_csharp(ref.values) is not None:
+            return None
+        return f"{'Literal' if kind == 'literal' else 'enum ' + ref.name} with values of several types"
+    if kind in ("list", "set", "tuple", "dict"):
+        if len(ref.args) < (2 if kind == "dict" else 1):
+            return f"{kind} without element types"
+        if kind == "tuple" and _tuple_element(ref, _TYPE_MAP.get()) is None:
+            return "tuple of several element types"
+    elif kind == "union":
+        args = [a for a in ref.args if a != _NONE_REF]
+        if _union_csharp(args, _TYPE_MAP.get()) is None:
+            members = [typeref_to_csharp(a) for a in args]
+            return "union of " + " | ".join(dict.fromkeys(members)) if members else "None"
+    else:
+        return f"unsupported annotation {ref.name or kind}"
+    for arg in ref.args:
+        reason = object_reason(arg) if arg != _NONE_REF and arg.kind != "ellipsis" else None
+        if reason is not None:
+            return reason
+    return None
 
 def default_value_to_csharp(value: Any) -> str | None:
     """Convert a Python default value to C# default value string."""
-    if value is None:
+    from .describe import describe_default
+    return default_to_csharp(describe_default(value))
+
+def default_to_csharp(default: DefaultValue) -> str | None:
+    """Convert a described default value to C# default value string."""
+    kind = default.kind
+    if kind == "none":
         return "null"
-    if isinstance(value, str):
+    if kind == "str":
         # Use a verbatim string literal to safely represent multiline prompts and avoid
         # needing to escape backslashes. Double quotes must be doubled in verbatim strings.
-        escaped = value.replace('"', '""')
+        escaped = default.value.replace('"', '""')
         return f'@"{escaped}"'
-    if isinstance(value, bool):
-        return "true" if value else "false"
-    if isinstance(value, (int, float)):
-        return str(value)
-    if isinstance(value, list):
+    if kind == "bool":
+        return "true" if default.value else "false"
+    if kind == "number":
+        return str(default.value)
+    if kind in ("list", "dict"):
         # Caller should use target-typed new() when the property is a generic list.
         return "new()"
-    if isinstance(value, dict):
-        return "new()"
-    if isinstance(value, BaseType):
-        tp = type(value)
-        if tp in _KNOWN_CSHARP_TYPE_NAMES:
-            return f"new {_KNOWN_CSHARP_TYPE_NAMES[tp]}()"
-        return f"new {tp.__name__}()"
+    if kind == "base_type":
+        return f"new {typeref_to_csharp(default.type)}()"
     return None
 
 def get_package_name(raw_name: str) -> str:
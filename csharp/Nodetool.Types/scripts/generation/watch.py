@@ -0,0 +1,193 @@
+"""
+Regenerating on every source change from one long-running process (`--watch`).
+
+The process stays alive between edits, so nodetool, its dependencies and the
+type modules stay imported (a full run releases each package's node modules
+once they are described). Each batch of changes goes through
+`IncrementalGenerator.update`, which drops only the changed modules (and the
+modules importing them) from `sys.modules`, imports them again and re-renders
+the files they affect. The modules defining BaseType and BaseNode are the
+exception: changes to them need a restart.
+
+Changes are noticed with inotify on Linux and by polling modification times
+elsewhere (or if inotify is unavailable).
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+from typing import Dict, Iterable, List, Optional, Set
+
+from .discovery import DiscoveryOptions
+from .incremental import IncrementalGenerator
+from .orchestrator import generate_all_types_and_nodes
+
+# Changes arriving within this many seconds of each other are handled together
+# (editors often write a file in several steps).
+DEBOUNCE_SECONDS = 0.1
+
+_IN_MODIFY = 0x002
+_IN_CLOSE_WRITE = 0x008
+_IN_MOVED_FROM = 0x040
+_IN_MOVED_TO = 0x080
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_IN_ISDIR = 0x40000000
+_WATCH_MASK = _IN_CLOSE_WRITE | _IN_MODIFY | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+_EVENT_HEADER = struct.Struct("iIII")
+
+def _source_dirs(roots: Iterable[str]) -> List[str]:
+    """Every directory under `roots` (nested roots only once)."""
+    dirs: Set[str] = set()
+    for root in roots:
+        for dirpath, dirnames, _ in os.walk(root):
+            dirnames[:] = [d for d in dirnames if d != "__pycache__"]
+            dirs.add(dirpath)
+    return sorted(dirs)
+
+class InotifyWatcher:
+    """Directory watches through the inotify system calls (Linux only)."""
+
+    def __init__(self, roots: Iterable[str]):
+        libc_name = ctypes.util.find_library("c")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._dirs: Dict[int, str] = {}
+        for path in _source_dirs(roots):
+            self._add(path)
+
+    def _add(self, path: str) -> None:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), _WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {path}")
+        self._dirs[wd] = path
+
+    def wait(self, timeout: Optional[float]) -> Set[str]:
+        """Paths changed within `timeout` seconds (None waits for the first change)."""
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+        changed = set()
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            directory = self._dirs.get(wd)
+            if directory is None or not name:
+                continue
+            path = os.path.join(directory, name)
+            if mask & _IN_ISDIR:
+                if mask & (_IN_CREATE | _IN_MOVED_TO) and name != "__pycache__":
+                    # New package: watch it, and treat the sources it arrived with as changed.
+                    for new_dir in _source_dirs([path]):
+                        self._add(new_dir)
+                    changed.update(_py_files([path]))
+                continue
+            changed.add(path)
+        return changed
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+def _py_files(roots: Iterable[str]) -> Dict[str, float]:
+    files = {}
+    for directory in _source_dirs(roots):
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            continue
+        for name in names:
+            if name.endswith(".py"):
+                path = os.path.join(directory, name)
+                try:
+                    files[path] = os.stat(path).st_mtime
+                except OSError:
+                    pass
+    return files
+
+class PollingWatcher:
+    """Compares modification times of the `.py` files under the roots every `interval` seconds."""
+
+    def __init__(self, roots: Iterable[str], interval: float = 0.5):
+        self._roots = list(roots)
+        self.interval = interval
+        self._files = _py_files(self._roots)
+
+    def wait(self, timeout: Optional[float]) -> Set[str]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            time.sleep(self.interval if deadline is None else max(0.0, min(self.interval, deadline - time.monotonic())))
+            files = _py_files(self._roots)
+            changed = {p for p in files.keys() | self._files.keys() if files.get(p) != self._files.get(p)}
+            self._files = files
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+
+    def close(self) -> None:
+        pass
+
+def make_watcher(roots: List[str], poll: bool = False):
+    """An inotify watcher if possible, otherwise a polling one."""
+    if not poll:
+        try:
+            return InotifyWatcher(roots)
+        except (OSError, AttributeError) as e:
+            # AttributeError: no inotify_init1 in this libc (not Linux)
+            print(f"[WARNING] inotify unavailable ({e}); polling for changes instead")
+    return PollingWatcher(roots)
+
+def watch(
+    output_dir: str,
+    namespace: str = "Nodetool.Types",
+    options: Optional[DiscoveryOptions] = None,
+    poll: bool = False,
+) -> None:
+    """Bring the output up to date, then regenerate after every change until interrupted."""
+    options = options or DiscoveryOptions()
+    generator = IncrementalGenerator(output_dir, namespace, options)
+    if generator.load(report=False):
+        generator.update()
+    else:
+        # No usable stored run: a full (in-process) run also imports everything up front.
+        generate_all_types_and_nodes(output_dir, namespace, options=options)
+        if not generator.load():
+            return
+
+    roots = sorted({root.path for root in generator.roots if os.path.isdir(root.path)})
+    watcher = make_watcher(roots, poll)
+    print(f"\n>>> Watching {len(roots)} source trees for changes (Ctrl+C to stop)")
+    for root in roots:
+        print(f"  {root}")
+    try:
+        while True:
+            changed = watcher.wait(None)
+            while True:
+                more = watcher.wait(DEBOUNCE_SECONDS)
+                if not more:
+                    break
+                changed |= more
+            changed = {p for p in changed if p.endswith(".py")}
+            if not changed:
+                continue
+            started = time.perf_counter()
+            print(f"\n>>> {len(changed)} files changed")
+            try:
+                generator.update(files=changed)
+            except Exception as e:
+                print(f"[ERROR] Regeneration failed: {type(e).__name__}: {e}")
+                continue
+            print(f"  [OK] Regenerated in {time.perf_counter() - started:.2f}s")
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
+    finally:
+        watcher.close()
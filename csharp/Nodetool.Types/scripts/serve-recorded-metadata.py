@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Stub NodeTool server for `generate-all-types.py --from-server`.
+
+Serves recorded responses from a directory:
+
+- `nodes-metadata.json`: the body of `GET /api/nodes/metadata?fields=full`
+- `node-types.json` (optional): a `GET /api/sdk/v1/node-types` response with
+  every type in it; it is served in pages according to `cursor` and `limit`
+
+Record them from a real server with e.g.
+`curl "http://localhost:7777/api/nodes/metadata?fields=full" > nodes-metadata.json`.
+"""
+import argparse
+import json
+import os
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+def make_handler(recording_dir: str):
+    with open(os.path.join(recording_dir, "nodes-metadata.json"), "rb") as f:
+        nodes_body = f.read()
+    inventory = None
+    inventory_path = os.path.join(recording_dir, "node-types.json")
+    if os.path.isfile(inventory_path):
+        with open(inventory_path, encoding="utf-8") as f:
+            inventory = json.load(f)
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like the real server
+
+        def _send(self, status: int, body: bytes) -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            if url.path == "/api/nodes/metadata":
+                self._send(200, nodes_body)
+            elif url.path == "/api/sdk/v1/node-types" and inventory is not None:
+                query = parse_qs(url.query)
+                cursor = int(query.get("cursor", ["0"])[0])
+                limit = int(query.get("limit", ["100"])[0])
+                types = inventory.get("types", [])
+                page = dict(inventory, cursor=cursor, types=types[cursor:cursor + limit])
+                page["type_count"] = len(types)
+                page["next_cursor"] = cursor + limit if cursor + limit < len(types) else None
+                self._send(200, json.dumps(page).encode("utf-8"))
+            else:
+                self._send(404, b'{"detail": "Not Found"}')
+
+    return Handler
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve recorded NodeTool node metadata for --from-server")
+    parser.add_argument("recording_dir", help="Directory with nodes-metadata.json and optionally node-types.json")
+    parser.add_argument("--port", type=int, default=7777)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(args.recording_dir))
+    print(f"Serving {os.path.abspath(args.recording_dir)} on http://127.0.0.1:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Tests of the C# generator (`generation/`), run with pytest from any directory.
+
+End-to-end tests run `generate-all-types.py` in a fresh interpreter on a
+`Workspace`: `nodetool-*` packages next to the stand-in nodetool-core of
+benchmark-generator.py, so neither nodetool nor pydantic need to be installed.
+"""
+import importlib.util
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+GENERATOR = os.path.join(SCRIPTS_DIR, "generate-all-types.py")
+
+def _load_benchmark():
+    spec = importlib.util.spec_from_file_location("benchmark_generator", os.path.join(SCRIPTS_DIR, "benchmark-generator.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+CORE_FILES = _load_benchmark().CORE_FILES
+
+class Workspace:
+    """A stand-in nodetool-core and `nodetool-<name>` packages, each importable as if installed editable."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.core_src = os.path.join(root, "core", "src")
+        for rel_path, text in CORE_FILES.items():
+            self._write(os.path.join(self.core_src, *rel_path.split("/")), text)
+
+    def path(self, package: str, module: str) -> str:
+        """The file of `module` (e.g. "nodetool.types.alpha.shapes") in package `nodetool-<package>`."""
+        return os.path.join(self.root, f"nodetool-{package}", "src", *module.split(".")) + ".py"
+
+    def write(self, package: str, module: str, text: str) -> str:
+        path = self.path(package, module)
+        self._write(path, textwrap.dedent(text))
+        return path
+
+    def remove(self, package: str, module: str) -> None:
+        os.remove(self.path(package, module))
+
+    def rename(self, package: str, module: str, new_module: str) -> None:
+        new_path = self.path(package, new_module)
+        os.makedirs(os.path.dirname(new_path), exist_ok=True)
+        os.replace(self.path(package, module), new_path)
+        # A rename keeps the mtime; the file is new to the tree all the same.
+        os.utime(new_path)
+
+    def _write(self, path: str, text: str) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text.lstrip("\n"))
+
+    def _srcs(self):
+        packages = sorted(d for d in os.listdir(self.root) if d.startswith("nodetool-"))
+        return [self.core_src] + [os.path.join(self.root, d, "src") for d in packages]
+
+    def generate(self, output_dir: str, *args: str, env=None) -> str:
+        """Run the generator on the workspace; returns its output, and fails the test if it exits non-zero."""
+        completed = self.run(output_dir, *args, env=env)
+        assert completed.returncode == 0, completed.stdout[-4000:]
+        return completed.stdout
+
+    def run(self, output_dir: str, *args: str, env=None) -> subprocess.CompletedProcess:
+        command = [sys.executable, GENERATOR, "--output-dir", output_dir, *args]
+        return subprocess.run(command, env=self._environ(env), stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+
+    def python(self, code: str) -> subprocess.CompletedProcess:
+        """Run `code` in a fresh interpreter that imports the workspace and `generation`; stdout and stderr apart."""
+        command = [sys.executable, "-c", textwrap.dedent(code)]
+        return subprocess.run(command, env=self._environ(), cwd=SCRIPTS_DIR, capture_output=True, text=True)
+
+    def _environ(self, env=None) -> dict:
+        environ = dict(os.environ)
+        environ["PYTHONPATH"] = os.pathsep.join(self._srcs() + [SCRIPTS_DIR])
+        environ["NODETOOL_WORKSPACE_ROOT"] = self.root
+        # Sources are edited within the same second; stale bytecode would hide the edit.
+        environ["PYTHONDONTWRITEBYTECODE"] = "1"
+        environ.update(env or {})
+        return environ
+
+def generated_files(output_dir: str) -> dict:
+    """`{rel_path: text}` of the generated C# files (the generator's own state files left out)."""
+    files = {}
+    for dirpath, _, filenames in os.walk(output_dir):
+        for name in filenames:
+            if name.endswith(".cs"):
+                path = os.path.join(dirpath, name)
+                with open(path, encoding="utf-8") as f:
+                    files[os.path.relpath(path, output_dir).replace(os.sep, "/")] = f.read()
+    return files
+
+@pytest.fixture
+def workspace(tmp_path) -> Workspace:
+    return Workspace(str(tmp_path / "workspace"))
@@ -0,0 +1,138 @@
+"""
+`--artifact-cache`: a stored output is restored file for file, stale files are
+pruned, damaged entries are regenerated and the least recently used runs are
+evicted with the objects only they use.
+"""
+import os
+
+import pytest
+
+from conftest import generated_files
+from generation import artifacts
+from generation.artifacts import ArtifactCache
+from generation.graph import GRAPH_FILE_NAME
+from generation.output import OutputTree
+
+def _write_output(output_dir: str, files: dict, graph: str | None = None) -> None:
+    """A full run's output: `files` written and pruned against the previous manifest, and the graph."""
+    tree = OutputTree(output_dir)
+    for rel_path, text in sorted(files.items()):
+        tree.write(rel_path, text)
+    tree.prune()
+    graph_path = os.path.join(output_dir, GRAPH_FILE_NAME)
+    if graph is not None:
+        with open(graph_path, "w", encoding="utf-8") as f:
+            f.write(graph)
+    elif os.path.exists(graph_path):
+        os.remove(graph_path)
+
+def _read(output_dir: str, name: str) -> str | None:
+    path = os.path.join(output_dir, name)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+def _store(cache: ArtifactCache, tmp_path, key: str, files: dict, graph: str | None = None) -> None:
+    output_dir = str(tmp_path / f"run-{key}")
+    _write_output(output_dir, files, graph)
+    cache.store(key, output_dir, {"key": key})
+
+RUN = {
+    "Types/Core/ImageRef.cs": "class ImageRef {}\n",
+    "Nodes/Alpha/Draw.cs": "class Draw {}\n",
+    "NodeToolTypes.cs": "class NodeToolTypes {}\n",
+}
+
+def test_restore_round_trip(tmp_path):
+    cache = ArtifactCache(str(tmp_path / "cache"))
+    _store(cache, tmp_path, "a" * 64, RUN, graph='{"modules": {}}\n')
+    output_dir = str(tmp_path / "out")
+    # An earlier output with a file the stored run does not have, and one it has with other content.
+    _write_output(output_dir, {"Nodes/Alpha/Old.cs": "class Old {}\n", "Nodes/Alpha/Draw.cs": "class Stale {}\n"})
+
+    assert cache.restore("a" * 64, output_dir)
+
+    assert generated_files(output_dir) == RUN
+    assert not os.path.exists(os.path.join(output_dir, "Nodes", "Alpha", "Old.cs"))
+    assert _read(output_dir, GRAPH_FILE_NAME) == '{"modules": {}}\n'
+    assert sorted(OutputTree(output_dir).previous_files()) == sorted(RUN)
+
+def test_restore_removes_a_graph_the_stored_run_did_not_have(tmp_path):
+    cache = ArtifactCache(str(tmp_path / "cache"))
+    _store(cache, tmp_path, "a" * 64, RUN)
+    output_dir = str(tmp_path / "out")
+    _write_output(output_dir, RUN, graph='{"modules": {}}\n')
+
+    assert cache.restore("a" * 64, output_dir)
+
+    assert _read(output_dir, GRAPH_FILE_NAME) is None
+
+def test_unknown_or_damaged_entries_are_not_restored(tmp_path):
+    cache = ArtifactCache(str(tmp_path / "cache"))
+    _store(cache, tmp_path, "a" * 64, RUN)
+    output_dir = str(tmp_path / "out")
+
+    assert not cache.restore("b" * 64, output_dir)
+
+    # An object whose content no longer matches its digest.
+    objects_dir = tmp_path / "cache" / "objects"
+    damaged = next(p for p in objects_dir.rglob("*") if p.is_file())
+    damaged.write_bytes(b"damaged")
+    assert not cache.restore("a" * 64, output_dir)
+    assert not os.path.exists(output_dir)
+
+def test_least_recently_used_runs_are_evicted(tmp_path, monkeypatch):
+    monkeypatch.setattr(artifacts, "MAX_RUNS", 2)
+    cache = ArtifactCache(str(tmp_path / "cache"))
+    shared = {"Types/Core/ImageRef.cs": "class ImageRef {}\n"}
+    keys = ["1" * 64, "2" * 64, "3" * 64]
+    for age, key in zip([30, 20], keys):
+        _store(cache, tmp_path, key, {**shared, f"Nodes/Alpha/Run{key[0]}.cs": f"class Run{key[0]} {{}}\n"})
+        run_path = tmp_path / "cache" / "runs" / f"{key}.json"
+        os.utime(run_path, (run_path.stat().st_atime - age, run_path.stat().st_mtime - age))
+    # Restoring the oldest run makes it the most recently used one.
+    assert cache.restore(keys[0], str(tmp_path / "out"))
+
+    _store(cache, tmp_path, keys[2], {**shared, "Nodes/Alpha/Run3.cs": "class Run3 {}\n"})
+
+    runs = sorted(p.name for p in (tmp_path / "cache" / "runs").iterdir())
+    assert runs == [f"{keys[0]}.json", f"{keys[2]}.json"]
+    assert not cache.restore(keys[1], str(tmp_path / "evicted"))
+    objects = {p.read_text(encoding="utf-8") for p in (tmp_path / "cache" / "objects").rglob("*") if p.is_file()}
+    assert objects == {"class ImageRef {}\n", "class Run1 {}\n", "class Run3 {}\n"}
+    for key in (keys[0], keys[2]):
+        assert cache.restore(key, str(tmp_path / f"restored-{key[0]}"))
+
+@pytest.fixture
+def package(workspace):
+    workspace.write("alpha", "nodetool.nodes.alpha.draw", '''
+        from nodetool.workflows.base_node import BaseNode
+
+        class Draw(BaseNode):
+            scale: float = 1.0
+    ''')
+    return workspace
+
+def test_unchanged_environment_restores_the_output(package, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    first_dir, second_dir = str(tmp_path / "first"), str(tmp_path / "second")
+    output = package.generate(first_dir, "--artifact-cache", cache_dir)
+    assert "Stored" in output
+
+    output = package.generate(second_dir, "--artifact-cache", cache_dir)
+
+    assert "Restored" in output and ">>> Discovering" not in output
+    assert generated_files(second_dir) == generated_files(first_dir)
+    assert _read(second_dir, GRAPH_FILE_NAME) == _read(first_dir, GRAPH_FILE_NAME)
+
+    package.write("alpha", "nodetool.nodes.alpha.paint", '''
+        from nodetool.workflows.base_node import BaseNode
+
+        class Paint(BaseNode):
+            color: str = ""
+    ''')
+    output = package.generate(second_dir, "--artifact-cache", cache_dir)
+
+    assert "Restored" not in output
+    assert "Nodes/Alpha/Paint.cs" in generated_files(second_dir)
@@ -0,0 +1,122 @@
+"""
+The per-module metadata cache (cache.py): what a cached description is keyed on.
+"""
+import os
+import re
+
+import pytest
+
+from generation.cache import CACHE_FILE_NAME, MetadataCache
+from generation.static_scan import StaticIndex
+
+MODULE = "nodetool.types.alpha.scenes"
+DESCRIPTION = ["Scene"]
+
+@pytest.fixture
+def src(tmp_path):
+    """`scenes` imports `shapes`, which imports `base`; `base` is only a transitive dependency."""
+    root = tmp_path / "src"
+    sources = {
+        "nodetool/types/alpha/base.py": "class Base:\n    pass\n",
+        "nodetool/types/alpha/shapes.py": "from nodetool.types.alpha.base import Base\n\nclass Shape(Base):\n    size: int = 0\n",
+        "nodetool/types/alpha/scenes.py": "from nodetool.types.alpha.shapes import Shape\n\nclass Scene(Shape):\n    pass\n",
+    }
+    for rel_path, text in sources.items():
+        path = root / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding="utf-8")
+    return root
+
+def _lookup(src, cache_path, version="1.0"):
+    """Look MODULE up as a new run would (fresh index and connection); stores DESCRIPTION on a miss."""
+    cache = MetadataCache(str(cache_path), StaticIndex([str(src)]))
+    path = str(src / "nodetool" / "types" / "alpha" / "scenes.py")
+    digest = cache.digest(MODULE, path, version)
+    value = cache.get(path, "types", digest)
+    if value is None:
+        cache.put(path, "types", digest, DESCRIPTION)
+    cache.close()
+    return value, cache.stats
+
+def test_unchanged_input_hits(src, tmp_path):
+    cache_path = tmp_path / CACHE_FILE_NAME
+    assert _lookup(src, cache_path)[0] is None
+
+    value, stats = _lookup(src, cache_path)
+
+    assert value == DESCRIPTION
+    assert (stats.hits, stats.misses) == (1, 0)
+
+def test_digest_covers_transitive_nodetool_imports(src):
+    index = StaticIndex([str(src)])
+    files = index.dependency_files(MODULE, str(src / "nodetool" / "types" / "alpha" / "scenes.py"))
+    names = [os.path.relpath(f, src).replace(os.sep, "/") for f in files]
+    assert names == [
+        "nodetool/types/alpha/base.py",
+        "nodetool/types/alpha/scenes.py",
+        "nodetool/types/alpha/shapes.py",
+    ]
+
+def test_edited_transitive_dependency_misses(src, tmp_path):
+    cache_path = tmp_path / CACHE_FILE_NAME
+    _lookup(src, cache_path)
+    (src / "nodetool" / "types" / "alpha" / "base.py").write_text("class Base:\n    label: str = ''\n", encoding="utf-8")
+
+    value, stats = _lookup(src, cache_path)
+
+    assert value is None
+    assert (stats.hits, stats.misses) == (0, 1)
+
+def test_schema_version_bump_misses(src, tmp_path, monkeypatch):
+    cache_path = tmp_path / CACHE_FILE_NAME
+    _lookup(src, cache_path)
+    monkeypatch.setattr("generation.cache.SCHEMA_VERSION", "bumped")
+
+    value, stats = _lookup(src, cache_path)
+
+    assert value is None
+    assert (stats.hits, stats.misses) == (0, 1)
+
+def test_package_version_change_misses(src, tmp_path):
+    cache_path = tmp_path / CACHE_FILE_NAME
+    _lookup(src, cache_path, version="1.0")
+
+    assert _lookup(src, cache_path, version="1.1")[0] is None
+
+def _cache_counts(log):
+    """(hits, misses) from the generator's "Cache:" line."""
+    match = re.search(r"Cache: (\d+) hits, (\d+) misses", log)
+    return int(match.group(1)), int(match.group(2))
+
+def test_generator_reuses_and_invalidates_the_cache(workspace, tmp_path):
+    workspace.write("alpha", "nodetool.types.alpha.shapes", '''
+        from nodetool.metadata.types import BaseType
+
+        class Shape(BaseType):
+            size: int = 0
+    ''')
+    workspace.write("beta", "nodetool.types.beta.scenes", '''
+        from nodetool.types.alpha.shapes import Shape
+
+        class Scene(Shape):
+            name: str = ""
+    ''')
+    output_dir = str(tmp_path / "out")
+    workspace.generate(output_dir)
+
+    hits, misses = _cache_counts(workspace.generate(output_dir))
+    assert hits > 0 and misses == 0
+
+    # Scene inherits its fields from another package; editing that package must reach it.
+    workspace.write("alpha", "nodetool.types.alpha.shapes", '''
+        from nodetool.metadata.types import BaseType
+
+        class Shape(BaseType):
+            size: int = 0
+            color: str = ""
+    ''')
+    log = workspace.generate(output_dir)
+
+    assert _cache_counts(log)[1] > 0
+    with open(os.path.join(output_dir, "Types", "Beta", "Scene.cs"), encoding="utf-8") as f:
+        assert "public string color" in f.read()
@@ -0,0 +1,74 @@
+"""
+`generate_sources` as a library: progress of discovery goes to the `log` it is
+given, and each generation counts its own type mapping memo hits.
+"""
+import json
+
+import pytest
+
+@pytest.fixture
+def package(workspace):
+    workspace.write("alpha", "nodetool.types.alpha.shapes", '''
+        from typing import Literal
+        from nodetool.metadata.types import BaseType
+
+        class Circle(BaseType):
+            type: Literal["alpha.circle"] = "alpha.circle"
+            radius: float = 0.0
+    ''')
+    workspace.write("alpha", "nodetool.nodes.alpha.draw", '''
+        from nodetool.workflows.base_node import BaseNode
+        from nodetool.types.alpha.shapes import Circle
+
+        class Draw(BaseNode):
+            circles: list[Circle] = []
+            scale: float = 1.0
+    ''')
+    return workspace
+
+def test_discovery_progress_goes_to_the_log(package):
+    completed = package.python('''
+        import json
+        from generation.orchestrator import generate_sources
+        from generation.session import DiscoverySession
+
+        quiet_files = generate_sources(DiscoverySession())
+        messages = []
+        files = generate_sources(DiscoverySession(), log=messages.append)
+        print(json.dumps({"files": sorted(files), "same": files == quiet_files, "messages": messages}))
+    ''')
+    assert completed.returncode == 0, completed.stderr[-4000:]
+
+    # The only line on stdout is the script's own.
+    result = json.loads(completed.stdout)
+    assert result["same"]
+    assert "Nodes/Alpha/Draw.cs" in result["files"]
+    assert ">>> Discovering types..." in result["messages"]
+    assert "Found 1 types from Alpha (workspace)" in result["messages"]
+
+def test_concurrent_generations_count_their_own_memo_hits(package):
+    completed = package.python('''
+        import json
+        import threading
+        from generation.context import logging_to, quiet
+        from generation.orchestrator import generate_sources
+        from generation.session import DiscoverySession
+
+        session = DiscoverySession()
+        with logging_to(quiet):
+            session.nodes()
+        ir = session.to_ir()
+        logs = [[] for _ in range(4)]
+        threads = [threading.Thread(target=generate_sources, args=(ir,), kwargs={"log": log.append}) for log in logs]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        print(json.dumps([[m for m in log if "Type mapping memo" in m] for log in logs]))
+    ''')
+    assert completed.returncode == 0, completed.stderr[-4000:]
+
+    memo_lines = json.loads(completed.stdout)
+    assert len(memo_lines[0]) == 1
+    assert "csharp" in memo_lines[0][0] and "annotations unused" in memo_lines[0][0]
+    assert all(lines == memo_lines[0] for lines in memo_lines)
@@ -0,0 +1,118 @@
+"""
+Every way of running discovery generates the same files as a serial run:
+types referring across packages, nested generic annotations and nodes that
+use them, in two workspace packages on the stand-in nodetool-core.
+"""
+import re
+
+import pytest
+
+from conftest import generated_files
+
+@pytest.fixture
+def packages(workspace):
+    workspace.write("alpha", "nodetool.types.alpha.shapes", '''
+        from typing import Literal, Optional
+        from nodetool.metadata.types import BaseType, ImageRef
+
+        class Circle(BaseType):
+            type: Literal["alpha.circle"] = "alpha.circle"
+            radius: float = 0.0
+            fill: Optional[ImageRef] = None
+
+        class Polygon(BaseType):
+            type: Literal["alpha.polygon"] = "alpha.polygon"
+            points: list[tuple[float, float]] = []
+    ''')
+    workspace.write("alpha", "nodetool.nodes.alpha.draw", '''
+        from nodetool.workflows.base_node import BaseNode
+        from nodetool.types.alpha.shapes import Circle, Polygon
+
+        class Draw(BaseNode):
+            circles: list[Circle] = []
+            outline: Polygon | None = None
+            scale: float = 1.0
+
+        class Fill(BaseNode):
+            color: str = "#000000"
+    ''')
+    workspace.write("beta", "nodetool.types.beta.scene", '''
+        from typing import Literal
+        from nodetool.metadata.types import BaseType
+        from nodetool.types.alpha.shapes import Circle
+
+        class Scene(BaseType):
+            type: Literal["beta.scene"] = "beta.scene"
+            layers: dict[str, list[Circle]] = {}
+            title: str = ""
+    ''')
+    workspace.write("beta", "nodetool.nodes.beta.render", '''
+        from nodetool.workflows.base_node import BaseNode
+        from nodetool.types.beta.scene import Scene
+
+        class Render(BaseNode):
+            scene: Scene = Scene()
+            width: int = 512
+            height: int = 512
+
+            def helper(self) -> int:
+                return self.width * self.height
+    ''')
+    return workspace
+
+def _generate(workspace, output_dir, *args):
+    workspace.generate(output_dir, "--no-cache", *args)
+    return generated_files(output_dir)
+
+@pytest.fixture
+def serial_files(packages, tmp_path):
+    files = _generate(packages, str(tmp_path / "serial"))
+    assert {"Nodes/Alpha/Draw.cs", "Nodes/Alpha/Fill.cs", "Nodes/Beta/Render.cs"} <= set(files)
+    assert "Nodetool.Types.Alpha.Circle" in files["Types/Beta/Scene.cs"]
+    return files
+
+@pytest.mark.parametrize("jobs", ["1", "2", "0"])
+def test_jobs_match_a_serial_run(packages, serial_files, tmp_path, jobs):
+    assert _generate(packages, str(tmp_path / "jobs"), "--jobs", jobs) == serial_files
+
+@pytest.fixture
+def indirect_subclasses(packages):
+    """Subclasses the ast scan only finds by following bases through imports and aliases."""
+    packages.write("alpha", "nodetool.nodes.alpha.base", '''
+        from nodetool.workflows.base_node import BaseNode
+
+        class ShapeNode(BaseNode):
+            opacity: float = 1.0
+    ''')
+    packages.write("alpha", "nodetool.nodes.alpha.stroke", '''
+        from nodetool.nodes.alpha import base as shapes
+
+        class Stroke(shapes.ShapeNode):
+            width: float = 1.0
+    ''')
+    packages.write("alpha", "nodetool.nodes.alpha.colors", '''
+        PALETTE = ["#000000", "#ffffff"]
+
+        def darken(color: str) -> str:
+            return color
+    ''')
+    packages.write("beta", "nodetool.types.beta.framed", '''
+        from typing import Literal
+        from nodetool.types.beta.scene import Scene as _Scene
+
+        class FramedScene(_Scene):
+            type: Literal["beta.framed_scene"] = "beta.framed_scene"
+            border: int = 0
+    ''')
+    return packages
+
+@pytest.mark.parametrize("args", [("--static",), ("--static", "--jobs", "2")], ids=["static", "static-jobs"])
+def test_static_matches_a_serial_run(indirect_subclasses, tmp_path, args):
+    serial = _generate(indirect_subclasses, str(tmp_path / "serial"))
+    assert {"Nodes/Alpha/Stroke.cs", "Types/Beta/FramedScene.cs"} <= set(serial)
+
+    static_dir = str(tmp_path / "static")
+    output = indirect_subclasses.generate(static_dir, "--no-cache", *args)
+    assert generated_files(static_dir) == serial
+    # Modules without candidate classes (alpha.colors among them) are not imported.
+    assert re.search(r"skipped importing [1-9]", output)
@@ -0,0 +1,153 @@
+"""
+`--changed` (incremental.py): after a source edit, the incremental output equals a full run.
+"""
+import os
+
+import pytest
+
+from conftest import generated_files
+
+SHAPES = '''
+    from typing import Literal
+    from nodetool.metadata.types import BaseType
+
+    class Shape(BaseType):
+        type: Literal["alpha.shape"] = "alpha.shape"
+        size: int = 0
+
+    class Circle(Shape):
+        type: Literal["alpha.circle"] = "alpha.circle"
+        radius: float = 1.0
+'''
+
+@pytest.fixture
+def catalog(workspace, tmp_path):
+    """Two packages; beta's type and node reference alpha's `Shape`. Returns the output of a full run."""
+    workspace.write("alpha", "nodetool.types.alpha.shapes", SHAPES)
+    workspace.write("alpha", "nodetool.nodes.alpha.draw", '''
+        from nodetool.workflows.base_node import BaseNode
+        from nodetool.types.alpha.shapes import Shape
+
+        class Draw(BaseNode):
+            shape: Shape | None = None
+            __outputs__ = {"output": Shape}
+    ''')
+    workspace.write("beta", "nodetool.types.beta.scenes", '''
+        from typing import Literal
+        from nodetool.metadata.types import BaseType
+        from nodetool.types.alpha.shapes import Shape
+
+        class Scene(BaseType):
+            type: Literal["beta.scene"] = "beta.scene"
+            shapes: list[Shape] = []
+    ''')
+    workspace.write("beta", "nodetool.nodes.beta.render", '''
+        from nodetool.workflows.base_node import BaseNode
+        from nodetool.types.alpha.shapes import Circle
+        from nodetool.types.beta.scenes import Scene
+
+        class Render(BaseNode):
+            scene: Scene | None = None
+            focus: Circle = Circle()
+            scale: float = 1.0
+    ''')
+    output_dir = str(tmp_path / "incremental")
+    workspace.generate(output_dir)
+    return output_dir
+
+def _update_and_compare(workspace, tmp_path, output_dir, *modules):
+    """Run `--changed` on `output_dir` and a full run next to it; returns (before, after) of the former."""
+    before = generated_files(output_dir)
+    log = workspace.generate(output_dir, "--changed", *modules)
+    assert "=== Incremental Generation Summary ===" in log
+    after = generated_files(output_dir)
+    full_dir = str(tmp_path / "full")
+    workspace.generate(full_dir)
+    assert after == generated_files(full_dir)
+    return before, after
+
+def test_edit_regenerates_dependents_in_other_packages(workspace, tmp_path, catalog):
+    workspace.write("alpha", "nodetool.types.alpha.shapes", SHAPES.replace("radius: float = 1.0", "radius: float = 1.0\n        filled: bool = False"))
+
+    before, after = _update_and_compare(workspace, tmp_path, catalog)
+
+    assert "filled" in after["Types/Alpha/Circle.cs"]
+    assert before["Types/Alpha/Shape.cs"] == after["Types/Alpha/Shape.cs"]
+
+def test_edit_rediscovers_unchanged_importers(workspace, tmp_path, catalog):
+    # beta's modules are not touched, but the name they import now is another class.
+    workspace.write("alpha", "nodetool.types.alpha.shapes", SHAPES.replace("class Circle", "class Disc") + "\n    Circle = Disc\n")
+
+    before, after = _update_and_compare(workspace, tmp_path, catalog)
+
+    assert "Nodetool.Types.Alpha.Circle" in before["Nodes/Beta/Render.cs"]
+    assert "Nodetool.Types.Alpha.Disc" in after["Nodes/Beta/Render.cs"]
+
+def test_renamed_type_changes_the_files_that_reference_it(workspace, tmp_path, catalog):
+    workspace.write("alpha", "nodetool.types.alpha.shapes", SHAPES.replace("Circle", "Disc"))
+    workspace.write("beta", "nodetool.nodes.beta.render", '''
+        from nodetool.workflows.base_node import BaseNode
+        from nodetool.types.alpha.shapes import Disc
+        from nodetool.types.beta.scenes import Scene
+
+        class Render(BaseNode):
+            scene: Scene | None = None
+            focus: Disc = Disc()
+            scale: float = 1.0
+    ''')
+
+    before, after = _update_and_compare(workspace, tmp_path, catalog)
+
+    assert "Types/Alpha/Circle.cs" in before and "Types/Alpha/Circle.cs" not in after
+    assert "Nodetool.Types.Alpha.Disc" in after["Nodes/Beta/Render.cs"]
+
+def test_added_module(workspace, tmp_path, catalog):
+    workspace.write("beta", "nodetool.types.beta.lights", '''
+        from typing import Literal
+        from nodetool.metadata.types import BaseType
+        from nodetool.types.alpha.shapes import Shape
+
+        class Light(BaseType):
+            type: Literal["beta.light"] = "beta.light"
+            target: Shape | None = None
+    ''')
+    workspace.write("beta", "nodetool.nodes.beta.lighting", '''
+        from nodetool.workflows.base_node import BaseNode
+        from nodetool.types.beta.lights import Light
+
+        class Illuminate(BaseNode):
+            light: Light | None = None
+    ''')
+
+    _, after = _update_and_compare(workspace, tmp_path, catalog)
+
+    assert "Types/Beta/Light.cs" in after
+    assert "Nodes/Beta/Illuminate.cs" in after
+    assert '@"beta.light"' in after["Types/TypeManifest.cs"]
+
+def test_renamed_module(workspace, tmp_path, catalog):
+    workspace.rename("alpha", "nodetool.types.alpha.shapes", "nodetool.types.alpha.geometry")
+    for package, module in (("alpha", "nodetool.nodes.alpha.draw"), ("beta", "nodetool.types.beta.scenes"), ("beta", "nodetool.nodes.beta.render")):
+        with open(workspace.path(package, module), encoding="utf-8") as f:
+            text = f.read()
+        workspace.write(package, module, text.replace("nodetool.types.alpha.shapes", "nodetool.types.alpha.geometry"))
+
+    before, after = _update_and_compare(workspace, tmp_path, catalog)
+
+    assert set(before) == set(after)
+
+def test_removed_module(workspace, tmp_path, catalog):
+    workspace.remove("beta", "nodetool.nodes.beta.render")
+
+    before, after = _update_and_compare(workspace, tmp_path, catalog)
+
+    assert "Nodes/Beta/Render.cs" in before and "Nodes/Beta/Render.cs" not in after
+
+def test_named_module_widens_to_its_importers(workspace, tmp_path, catalog):
+    path = workspace.write("alpha", "nodetool.types.alpha.shapes", SHAPES.replace("size: int = 0", "size: int = 0\n        label: str = \"\""))
+    # Modification times say nothing here; only the named module counts as changed.
+    os.utime(path, (0, 0))
+
+    _, after = _update_and_compare(workspace, tmp_path, catalog, "nodetool.types.alpha.shapes")
+
+    assert "label" in after["Types/Alpha/Shape.cs"]
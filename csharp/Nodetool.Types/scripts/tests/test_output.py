@@ -0,0 +1,32 @@
+"""
+`OutputTree.write_all`: files written on the write threads get the same
+permissions as a plain write, and the process umask is left alone.
+"""
+import os
+import stat
+import sys
+
+import pytest
+
+from conftest import generated_files
+from generation.output import OutputTree
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="POSIX permissions")
+
+@pytest.fixture
+def umask():
+    old = os.umask(0o027)
+    yield 0o027
+    os.umask(old)
+
+def test_threaded_writes_keep_the_mode_of_a_plain_write(tmp_path, umask):
+    files = {f"Nodes/Alpha/Node{i}.cs": f"class Node{i} {{}}\n" for i in range(200)}
+    tree = OutputTree(str(tmp_path))
+
+    tree.write_all(sorted(files.items()), threads=4)
+
+    assert generated_files(str(tmp_path)) == files
+    modes = {stat.S_IMODE(os.stat(tmp_path / rel_path).st_mode) for rel_path in files}
+    assert modes == {0o666 & ~umask}
+    assert stat.S_IMODE(os.stat(tmp_path / "Nodes" / "Alpha").st_mode) == 0o777 & ~umask
+    assert os.umask(umask) == umask
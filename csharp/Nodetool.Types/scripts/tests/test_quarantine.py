@@ -0,0 +1,81 @@
+"""
+`--import-timeout`: a module that hangs on import is quarantined (quarantine.py,
+`discovery._run_isolated`) and the rest of its package is still generated.
+"""
+import json
+import os
+import time
+
+import pytest
+
+from conftest import generated_files
+from generation.quarantine import QUARANTINE_FILE_NAME
+
+SLOW = '''
+    import time
+    from typing import Literal
+    from nodetool.metadata.types import BaseType
+
+    time.sleep({seconds})
+
+    class Slow(BaseType):
+        type: Literal["alpha.slow"] = "alpha.slow"
+'''
+
+@pytest.fixture
+def package(workspace):
+    """alpha: a type module, a node module and a module that sleeps a minute on import."""
+    workspace.write("alpha", "nodetool.types.alpha.shapes", '''
+        from typing import Literal
+        from nodetool.metadata.types import BaseType
+
+        class Shape(BaseType):
+            type: Literal["alpha.shape"] = "alpha.shape"
+            size: int = 0
+    ''')
+    workspace.write("alpha", "nodetool.nodes.alpha.draw", '''
+        from nodetool.workflows.base_node import BaseNode
+        from nodetool.types.alpha.shapes import Shape
+
+        class Draw(BaseNode):
+            shape: Shape | None = None
+    ''')
+    workspace.write("alpha", "nodetool.types.alpha.slow", SLOW.format(seconds=60))
+    return workspace
+
+def _quarantined(output_dir):
+    with open(os.path.join(output_dir, QUARANTINE_FILE_NAME), encoding="utf-8") as f:
+        return {entry["module"]: entry for entry in json.load(f)["modules"]}
+
+def test_slow_module_is_quarantined_and_skipped(package, tmp_path):
+    output_dir = str(tmp_path / "out")
+
+    started = time.monotonic()
+    log = package.generate(output_dir, "--import-timeout", "2")
+    assert time.monotonic() - started < 60
+
+    assert "importing nodetool.types.alpha.slow took longer than 2s" in log
+    entry = _quarantined(output_dir)["nodetool.types.alpha.slow"]
+    assert (entry["package"], entry["seconds"]) == ("Alpha", 2)
+    files = generated_files(output_dir)
+    assert "Types/Alpha/Shape.cs" in files and "Nodes/Alpha/Draw.cs" in files
+    assert "Types/Alpha/Slow.cs" not in files
+
+    # The next run, without a budget, does not import the module at all.
+    started = time.monotonic()
+    log = package.generate(output_dir)
+    assert time.monotonic() - started < 60
+
+    assert "Skipped 1 quarantined modules: nodetool.types.alpha.slow" in log
+    assert generated_files(output_dir) == files
+
+def test_edited_module_is_tried_again(package, tmp_path):
+    output_dir = str(tmp_path / "out")
+    package.generate(output_dir, "--import-timeout", "2")
+    package.write("alpha", "nodetool.types.alpha.slow", SLOW.format(seconds=0))
+
+    log = package.generate(output_dir, "--import-timeout", "2")
+
+    assert "nodetool.types.alpha.slow imported within 2s; no longer quarantined" in log
+    assert not os.path.exists(os.path.join(output_dir, QUARANTINE_FILE_NAME))
+    assert "Types/Alpha/Slow.cs" in generated_files(output_dir)
@@ -0,0 +1,45 @@
+"""
+NodeToolTypes.cs: the formatter table of `NodeToolResolver` and the resolver
+and options it exposes.
+"""
+from conftest import generated_files
+from generation.codegen import member_formatters
+
+def test_member_formatters_cover_collections_and_their_arguments():
+    formatters = member_formatters([
+        "Dictionary<string, List<Nodetool.Types.Core.ImageRef?>>",
+        "HashSet<string>",
+        "int?",
+        "string?",
+        "Nodetool.Types.Core.ImageRef",
+        "object",
+    ])
+
+    assert formatters == {
+        "Dictionary<string, List<Nodetool.Types.Core.ImageRef>>":
+            "new DictionaryFormatter<string, List<Nodetool.Types.Core.ImageRef>>()",
+        "List<Nodetool.Types.Core.ImageRef>": "new ListFormatter<Nodetool.Types.Core.ImageRef>()",
+        "HashSet<string>": "new HashSetFormatter<string>()",
+        "object": "PrimitiveObjectFormatter.Instance",
+    }
+
+def test_summary_file_exposes_options_without_touching_defaults(workspace, tmp_path):
+    workspace.write("alpha", "nodetool.nodes.alpha.draw", '''
+        from nodetool.metadata.types import ImageRef
+        from nodetool.workflows.base_node import BaseNode
+
+        class Draw(BaseNode):
+            layers: list[ImageRef] = []
+            labels: dict[str, int] = {}
+    ''')
+    output_dir = str(tmp_path / "out")
+    workspace.generate(output_dir)
+    source = generated_files(output_dir)["NodeToolTypes.cs"]
+
+    assert "DefaultOptions" not in source
+    assert "StandardResolver" not in source
+    assert "public static MessagePackSerializerOptions Options { get; }" in source
+    assert "MessagePack.Resolvers.BuiltinResolver.Instance\n    );" in source
+    assert "[typeof(List<Nodetool.Types.Core.ImageRef>)] = new ListFormatter<Nodetool.Types.Core.ImageRef>()," in source
+    assert "[typeof(Dictionary<string, int>)] = new DictionaryFormatter<string, int>()," in source
+    assert "[typeof(Nodetool.Nodes.Alpha.Draw)] = new Nodetool.Nodes.Alpha.Draw.Formatter()," in source
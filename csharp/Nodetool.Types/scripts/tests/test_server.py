@@ -0,0 +1,157 @@
+"""
+`--from-server` against `serve-recorded-metadata.py`, serving the recorded
+responses in `fixtures/server`: three nodes in two packages, and an inventory
+of three types that lists one unavailable pack.
+"""
+import importlib.util
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from conftest import SCRIPTS_DIR, generated_files
+from generation import server
+from generation.server import ServerError, fetch_server_metadata
+
+RECORDING = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "server")
+STUB = os.path.join(SCRIPTS_DIR, "serve-recorded-metadata.py")
+
+def _load_stub():
+    spec = importlib.util.spec_from_file_location("serve_recorded_metadata", STUB)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+@contextmanager
+def _stub_process(recording_dir: str):
+    """`serve-recorded-metadata.py` on a free port; yields its URL."""
+    port = _free_port()
+    process = subprocess.Popen(
+        [sys.executable, STUB, recording_dir, "--port", str(port)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.monotonic() + 10
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                break
+            except OSError:
+                if process.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError("the stub server did not start")
+                time.sleep(0.05)
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        process.terminate()
+        process.wait()
+
+@contextmanager
+def _stub_thread(handler):
+    """The stub's `handler` served from a thread of this process; yields its URL."""
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+@pytest.fixture
+def circle_package(workspace):
+    """The BaseType the recorded nodes refer to as "alpha.circle"; types are discovered locally."""
+    workspace.write("alpha", "nodetool.types.alpha.shapes", '''
+        from typing import Literal
+        from nodetool.metadata.types import BaseType
+
+        class Circle(BaseType):
+            type: Literal["alpha.circle"] = "alpha.circle"
+            radius: float = 0.0
+    ''')
+    return workspace
+
+def test_nodes_tree_from_recorded_server(circle_package, tmp_path):
+    output_dir = str(tmp_path / "out")
+    with _stub_process(RECORDING) as url:
+        output = circle_package.generate(output_dir, "--from-server", url)
+
+    files = generated_files(output_dir)
+    assert sorted(path for path in files if path.startswith("Nodes/")) == [
+        "Nodes/Alpha/Draw.cs",
+        "Nodes/Alpha/Paint.cs",
+        "Nodes/Beta/Concat.cs",
+    ]
+    draw = files["Nodes/Alpha/Draw.cs"]
+    assert "namespace Nodetool.Nodes.Alpha;" in draw
+    assert "public List<Nodetool.Types.Alpha.Circle> circles { get; set; } = new();" in draw
+    assert "public Nodetool.Types.Alpha.Circle Process()" in draw
+    paint = files["Nodes/Alpha/Paint.cs"]
+    assert "public class PaintOutput" in paint
+    assert "public Nodetool.Types.Alpha.Circle circle { get; set; }" in paint
+    assert "public string? mask { get; set; }" in paint
+    assert "namespace Nodetool.Nodes.Beta;" in files["Nodes/Beta/Concat.cs"]
+    assert "(registry revision 7)" in output
+    assert "nodetool-gamma is unavailable on the server: missing dependency torch" in output
+
+def test_inventory_pages_are_fetched_over_pooled_connections(monkeypatch):
+    monkeypatch.setattr(server, "INVENTORY_PAGE_SIZE", 1)
+    clients = []
+
+    class Handler(_load_stub().make_handler(RECORDING)):
+        def do_GET(self):
+            clients.append(self.client_address)
+            super().do_GET()
+
+    with _stub_thread(Handler) as url:
+        metadata = fetch_server_metadata(url, connections=2)
+
+    with open(os.path.join(RECORDING, "node-types.json"), encoding="utf-8") as f:
+        recorded = json.load(f)
+    assert [n["node_type"] for n in metadata.nodes] == ["alpha.draw.Draw", "alpha.draw.Paint", "beta.text.Concat"]
+    assert [p["cursor"] for p in metadata.inventory_pages] == [0, 1, 2]
+    assert [t for p in metadata.inventory_pages for t in p["types"]] == recorded["types"]
+    assert metadata.unavailable_packs == recorded["unavailable_packs"]
+    # Four requests over keep-alive connections: no more connections than the pool holds.
+    assert len(clients) == 4
+    assert len(set(clients)) <= 2
+
+def test_registry_change_while_paging_is_an_error(monkeypatch):
+    monkeypatch.setattr(server, "INVENTORY_PAGE_SIZE", 1)
+
+    class Handler(_load_stub().make_handler(RECORDING)):
+        def _send(self, status, body):
+            if self.path.startswith(server.NODE_TYPE_INVENTORY_ENDPOINT):
+                page = json.loads(body)
+                page["registry_revision"] += page["cursor"]
+                body = json.dumps(page).encode("utf-8")
+            super()._send(status, body)
+
+    with _stub_thread(Handler) as url:
+        with pytest.raises(ServerError, match="changed while it was read"):
+            fetch_server_metadata(url)
+
+def test_registry_not_ready_is_an_error(tmp_path):
+    recording_dir = tmp_path / "recording"
+    recording_dir.mkdir()
+    with open(os.path.join(RECORDING, "node-types.json"), encoding="utf-8") as f:
+        inventory = json.load(f)
+    inventory["registry_ready"] = False
+    (recording_dir / "node-types.json").write_text(json.dumps(inventory), encoding="utf-8")
+    with open(os.path.join(RECORDING, "nodes-metadata.json"), "rb") as f:
+        (recording_dir / "nodes-metadata.json").write_bytes(f.read())
+
+    with _stub_thread(_load_stub().make_handler(str(recording_dir))) as url:
+        with pytest.raises(ServerError, match="not ready"):
+            fetch_server_metadata(url)
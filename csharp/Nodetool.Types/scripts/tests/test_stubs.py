@@ -0,0 +1,129 @@
+"""
+`--stub-imports`: modules that only name a heavy package are imported against
+stubs; a module that uses one at import time is imported again for real.
+"""
+import sys
+import textwrap
+
+import pytest
+
+from conftest import generated_files
+from generation.stubs import HeavyImportStubs, _StubModule
+
+HEAVY = '''
+    LOADED = True
+
+    class Tensor:
+        pass
+
+    def device(name):
+        return name
+'''
+
+@pytest.fixture
+def modules(tmp_path, monkeypatch):
+    """Writes importable modules to `tmp_path`; they are dropped from `sys.modules` afterwards."""
+    monkeypatch.syspath_prepend(str(tmp_path))
+    names = []
+
+    def write(name: str, text: str) -> None:
+        (tmp_path / f"{name}.py").write_text(textwrap.dedent(text), encoding="utf-8")
+        names.append(name)
+
+    yield write
+    for name in names:
+        sys.modules.pop(name, None)
+
+def test_names_of_a_stubbed_package_do_not_import_it(modules):
+    modules("codegen_heavy", HEAVY)
+    modules("codegen_names", '''
+        import codegen_heavy
+
+        class Model:
+            weights: codegen_heavy.Tensor | None = None
+    ''')
+    stubs = HeavyImportStubs(["codegen_heavy"])
+
+    model = stubs.load("codegen_names", lambda module: module.Model)
+
+    assert isinstance(sys.modules["codegen_heavy"], _StubModule)
+    assert model.__annotations__["weights"].__args__[0].__qualname__ == "Tensor"
+    assert stubs.stubbed_roots == {"codegen_heavy"}
+    assert stubs.needed_real == {}
+
+def test_using_a_stub_imports_the_module_for_real(modules):
+    modules("codegen_heavy", HEAVY)
+    modules("codegen_names", '''
+        import codegen_heavy
+
+        class Model:
+            weights: codegen_heavy.Tensor | None = None
+    ''')
+    modules("codegen_values", '''
+        import codegen_heavy
+
+        DEVICE = codegen_heavy.device("cpu")
+    ''')
+    stubs = HeavyImportStubs(["codegen_heavy"])
+    stubs.load("codegen_names", lambda module: module)
+
+    device = stubs.load("codegen_values", lambda module: module.DEVICE)
+
+    assert device == "cpu"
+    assert sys.modules["codegen_heavy"].LOADED
+    assert "codegen_heavy.device was called while stubbed" in stubs.needed_real["codegen_values"]
+    assert list(stubs.needed_real) == ["codegen_values"]
+
+def test_a_failure_in_describe_through_a_stub_also_falls_back(modules):
+    modules("codegen_heavy", HEAVY)
+    modules("codegen_names", '''
+        import codegen_heavy
+
+        class Model:
+            weights: codegen_heavy.Tensor | None = None
+    ''')
+    stubs = HeavyImportStubs(["codegen_heavy"])
+
+    tensor = stubs.load("codegen_names", lambda module: module.Model.__annotations__["weights"].__args__[0]())
+
+    assert type(tensor).__module__ == "codegen_heavy"
+    assert "codegen_names" in stubs.needed_real
+
+def test_errors_unrelated_to_stubs_are_raised(modules):
+    modules("codegen_broken", '''
+        raise ValueError("broken module")
+    ''')
+    stubs = HeavyImportStubs(["codegen_heavy"])
+
+    with pytest.raises(ValueError, match="broken module"):
+        stubs.load("codegen_broken", lambda module: module)
+    assert stubs.needed_real == {}
+
+def test_stub_imports_match_a_real_import_run(workspace, tmp_path):
+    workspace.write("alpha", "torch", HEAVY)
+    workspace.write("alpha", "nodetool.nodes.alpha.model", '''
+        import torch
+        from nodetool.workflows.base_node import BaseNode
+
+        class Infer(BaseNode):
+            steps: int = 20
+            weights: torch.Tensor | None = None
+    ''')
+    workspace.write("alpha", "nodetool.nodes.alpha.device", '''
+        import torch
+        from nodetool.workflows.base_node import BaseNode
+
+        DEVICE = torch.device("cpu")
+
+        class Place(BaseNode):
+            device: str = DEVICE
+    ''')
+    real_dir, stubbed_dir = str(tmp_path / "real"), str(tmp_path / "stubbed")
+    workspace.generate(real_dir, "--no-cache")
+
+    output = workspace.generate(stubbed_dir, "--no-cache", "--stub-imports")
+
+    assert generated_files(stubbed_dir) == generated_files(real_dir)
+    assert {"Nodes/Alpha/Infer.cs", "Nodes/Alpha/Place.cs"} <= set(generated_files(real_dir))
+    assert "1 modules needed the real dependency:" in output
+    assert "nodetool.nodes.alpha.device: torch.device was called while stubbed" in output
@@ -0,0 +1,151 @@
+"""
+Tagged-union planning (unions.py) and the base formatters rendered from it.
+"""
+from generation.codegen import render_type_manifest_source, render_union_root_source, render_union_source
+from generation.schema import DefaultValue, FieldSchema, TypeRef, TypeSchema
+from generation.unions import plan, tag_of
+
+CORE = "nodetool.metadata.types"
+
+def _tagged(name, tag, base="", module=CORE):
+    field = FieldSchema("type", TypeRef("literal", values=(tag,)), DefaultValue("str", tag))
+    return TypeSchema(name, module, [field, FieldSchema("uri", TypeRef("primitive", "str"))], base)
+
+def _hierarchy():
+    """
+    AssetRef <- ImageRef <- Thumbnail (inherits "image"), AssetRef <- AudioRef,
+    ColorRef on its own, two unrelated classes tagged "model", an untagged class.
+    """
+    core = [
+        _tagged("AssetRef", "asset"),
+        _tagged("ImageRef", "image", f"{CORE}.AssetRef"),
+        _tagged("AudioRef", "audio", f"{CORE}.AssetRef"),
+        _tagged("Thumbnail", "image", f"{CORE}.ImageRef"),
+        _tagged("ColorRef", "color"),
+        TypeSchema("Plain", CORE, [FieldSchema("name", TypeRef("primitive", "str"))]),
+    ]
+    alpha = [_tagged("AlphaModel", "model", module="nodetool.types.alpha")]
+    beta = [_tagged("BetaModel", "model", module="nodetool.types.beta")]
+    all_types = {"nodetool.metadata.types": core, "nodetool.types.alpha": alpha, "nodetool.types.beta": beta}
+    names = {t.key: f"Nodetool.Types.Core.{t.name}" for t in core}
+    names.update({t.key: f"Nodetool.Types.Alpha.{t.name}" for t in alpha})
+    names.update({t.key: f"Nodetool.Types.Beta.{t.name}" for t in beta})
+    return all_types, names
+
+def _key(name, module=CORE):
+    return f"{module}.{name}"
+
+def test_tag_of_literal_and_str_default():
+    assert tag_of(_tagged("ImageRef", "image")) == "image"
+    plain = TypeSchema("Named", CORE, [FieldSchema("type", TypeRef("primitive", "str"), DefaultValue("str", "named"))])
+    assert tag_of(plain) == "named"
+    assert tag_of(TypeSchema("Plain", CORE, [FieldSchema("name", TypeRef("primitive", "str"))])) is None
+
+def test_plan_families_and_bases():
+    unions = plan(*_hierarchy())
+
+    assert [f.csharp for f in unions.families] == ["Nodetool.Types.Core.AssetRefBase"]
+    family = unions.families[0]
+    assert family.origin == "AssetRef"
+    assert [m.csharp for m in family.members] == [
+        "Nodetool.Types.Core.AssetRef",
+        "Nodetool.Types.Core.AudioRef",
+        "Nodetool.Types.Core.ImageRef",
+        "Nodetool.Types.Core.Thumbnail",
+    ]
+    assert unions.root.csharp == "Nodetool.Types.BaseType"
+    assert len(unions.root.members) == 7  # every tagged class; Plain has no tag
+    assert unions.bases[_key("Thumbnail")] == "Nodetool.Types.Core.AssetRefBase"
+    assert unions.bases[_key("ColorRef")] == "Nodetool.Types.BaseType"
+    assert _key("Plain") not in unions.bases
+    assert unions.skipped == []
+
+def test_shared_tag_belongs_to_the_class_it_is_inherited_from():
+    unions = plan(*_hierarchy())
+    family = unions.families[0]
+
+    assert {tag: m.csharp for tag, m in family.dispatch.items()} == {
+        "asset": "Nodetool.Types.Core.AssetRef",
+        "audio": "Nodetool.Types.Core.AudioRef",
+        "image": "Nodetool.Types.Core.ImageRef",
+    }
+    assert list(family.dispatch) == sorted(family.dispatch)
+    assert family.ambiguous == {}
+    assert unions.root.dispatch["image"].csharp == "Nodetool.Types.Core.ImageRef"
+
+def test_tag_of_unrelated_classes_is_ambiguous():
+    unions = plan(*_hierarchy())
+
+    assert "model" not in unions.root.dispatch
+    assert [m.csharp for m in unions.root.ambiguous["model"]] == [
+        "Nodetool.Types.Alpha.AlphaModel",
+        "Nodetool.Types.Beta.BetaModel",
+    ]
+    assert _key("AlphaModel", "nodetool.types.alpha") not in unions.decoders
+
+def test_common_base():
+    unions = plan(*_hierarchy())
+
+    assert unions.common_base([_key("ImageRef"), _key("AudioRef")]) == "Nodetool.Types.Core.AssetRefBase"
+    assert unions.common_base([_key("ImageRef"), _key("ColorRef")]) == "Nodetool.Types.BaseType"
+    # Decoded by no base: the union stays `object`.
+    assert unions.common_base([_key("ImageRef"), _key("AlphaModel", "nodetool.types.alpha")]) is None
+    assert unions.common_base([_key("Thumbnail")]) is None
+    assert unions.common_base([]) is None
+
+def test_family_base_named_like_a_class_is_skipped():
+    all_types, names = _hierarchy()
+    all_types[CORE].append(TypeSchema("AssetRefBase", CORE))
+    names[_key("AssetRefBase")] = "Nodetool.Types.Core.AssetRefBase"
+
+    unions = plan(all_types, names)
+
+    assert unions.families == []
+    assert unions.skipped == ["Nodetool.Types.Core.AssetRefBase"]
+    assert unions.bases[_key("ImageRef")] == "Nodetool.Types.BaseType"
+
+def test_no_tagged_classes():
+    unions = plan({CORE: [TypeSchema("Plain", CORE)]}, {_key("Plain"): "Nodetool.Types.Core.Plain"})
+    assert unions.root is None and unions.families == []
+
+def test_family_formatter_switches_on_owned_tags():
+    unions = plan(*_hierarchy())
+    source = render_union_source(unions.families[0], unions.root)
+
+    assert "namespace Nodetool.Types.Core;" in source
+    assert "[MessagePackFormatter(typeof(AssetRefBaseFormatter))]\npublic abstract class AssetRefBase : Nodetool.Types.BaseType" in source
+    cases = [line.strip() for line in source.splitlines() if line.strip().startswith("case @")]
+    assert cases == ['case @"asset":', 'case @"audio":', 'case @"image":']
+    image = source.index('case @"image":')
+    assert source.index("GetFormatterWithVerify<Nodetool.Types.Core.ImageRef>().Deserialize", image) < source.index("case null:", image)
+    # Every member is written with its own formatter, subclasses included.
+    assert "case Nodetool.Types.Core.Thumbnail v:" in source
+
+def test_root_formatter_leaves_out_ambiguous_tags():
+    unions = plan(*_hierarchy())
+    source = render_union_root_source(unions)
+
+    assert "[MessagePackFormatter(typeof(BaseTypeFormatter))]\npublic abstract class BaseType\n" in source
+    assert 'case @"model":' not in source
+    assert "Tags shared by unrelated classes (model) are not decoded." in source
+    assert "case Nodetool.Types.Alpha.AlphaModel v:" in source
+    assert "if (type == typeof(Nodetool.Types.Core.AssetRefBase))" in source
+    assert "return new Nodetool.Types.Core.AssetRefBaseFormatter();" in source
+
+def test_manifest_lists_shared_tags_by_first_class():
+    unions = plan(*_hierarchy())
+    source = render_type_manifest_source(unions.root)
+
+    entries = [line.strip() for line in source.splitlines() if line.strip().startswith("[@")]
+    assert [e.split("]")[0] for e in entries] == ['[@"asset"', '[@"audio"', '[@"color"', '[@"image"', '[@"model"']
+    assert '[@"model"] = (typeof(Nodetool.Types.Alpha.AlphaModel), "Nodetool.Types.Alpha.AlphaModel",' in source
+    assert "Nodetool.Types.Beta.BetaModel" not in source
+    assert "Tags shared by unrelated classes (model), which BaseTypeFormatter" in source
+
+def test_manifest_without_tagged_classes_is_empty():
+    source = render_type_manifest_source(None)
+
+    assert "namespace Nodetool.Types;" in source
+    assert "public static class TypeManifest" in source
+    assert "new Dictionary<string, (Type Type, string CSharpName, Func<object> Create)>(0, StringComparer.Ordinal)" in source
+    assert "[@" not in source
@@ -0,0 +1,69 @@
+"""
+The nodes of a workspace package installed editable are generated for that
+package only, not under Core as well, whichever way discovery runs; and
+`--subclass-scan` finds the same classes as the default scan.
+"""
+import pytest
+
+from conftest import generated_files
+
+@pytest.fixture
+def package(workspace):
+    workspace.write("alpha", "nodetool.nodes.alpha.draw", '''
+        from nodetool.workflows.base_node import BaseNode
+
+        class Draw(BaseNode):
+            scale: float = 1.0
+    ''')
+    return workspace
+
+def _nodes(files):
+    return sorted(path for path in files if path.startswith("Nodes/"))
+
+MODES = {
+    "serial": (),
+    "jobs": ("--jobs", "2"),
+    "subclass-scan": ("--subclass-scan",),
+    "subclass-scan-jobs": ("--subclass-scan", "--jobs", "2"),
+}
+
+@pytest.mark.parametrize("args", MODES.values(), ids=MODES.keys())
+def test_workspace_nodes_are_left_out_of_core(package, tmp_path, args):
+    output_dir = str(tmp_path / "out")
+    package.generate(output_dir, *args)
+
+    assert _nodes(generated_files(output_dir)) == ["Nodes/Alpha/Draw.cs"]
+
+@pytest.mark.parametrize("args", [(), ("--subclass-scan",)], ids=["default", "subclass-scan"])
+def test_changed_agrees_with_a_full_run(package, tmp_path, args):
+    output_dir = str(tmp_path / "incremental")
+    package.generate(output_dir, *args)
+    package.write("alpha", "nodetool.nodes.alpha.paint", '''
+        from nodetool.workflows.base_node import BaseNode
+
+        class Paint(BaseNode):
+            color: str = ""
+    ''')
+
+    package.generate(output_dir, *args, "--changed")
+    full_dir = str(tmp_path / "full")
+    package.generate(full_dir, *args)
+
+    assert generated_files(output_dir) == generated_files(full_dir)
+    assert _nodes(generated_files(full_dir)) == ["Nodes/Alpha/Draw.cs", "Nodes/Alpha/Paint.cs"]
+
+def test_subclass_scan_matches_the_default_scan(package, tmp_path):
+    package.write("alpha", "nodetool.types.alpha.shapes", '''
+        from typing import Literal
+        from nodetool.metadata.types import BaseType
+
+        class Circle(BaseType):
+            type: Literal["alpha.circle"] = "alpha.circle"
+            radius: float = 0.0
+    ''')
+    default_dir = str(tmp_path / "default")
+    package.generate(default_dir)
+    subclass_dir = str(tmp_path / "subclass")
+    package.generate(subclass_dir, "--subclass-scan")
+
+    assert generated_files(subclass_dir) == generated_files(default_dir)